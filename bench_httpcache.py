@@ -0,0 +1,210 @@
+"""Benchmark the conditional-request cache against a local GitHub stand-in.
+
+The stand-in serves /repos/{owner}/{name} and /search/repositories with
+ETags. Only non-304 responses count against its quota, as on GitHub. Each
+run looks up a list of repos (as getgitrepo.py does) and pages through the
+trending searches (as repos.py does), in this order:
+
+  uncached        no cache at all
+  cold            empty cache, stores everything
+  warm, fresh     repeat within max-age: served without a request
+  warm, 304       max-age over: every lookup revalidated
+  warm, churn     some repos changed, so those come back as misses
+  tiny cache      LRU bounded below the working set
+
+Every run must return the same data as the uncached one.
+
+A last check repeats the repo lookups through GitHubClient with the
+stand-in's quota nearly spent: fresh hits and 304s must not use up the
+client's local budget, so it never waits for the reset.
+
+    python bench_httpcache.py --repos 100 --languages 4 --latency-ms 50
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from ghclient import GitHubClient
+from httpcache import ResponseCache, cached_session
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "gettrendingrepos"))
+from repos import TrendingClient, trending
+
+class StandIn:
+    """GitHub-shaped repo and search endpoints with ETags and a quota that ignores 304s"""
+    def __init__(self, repos: int, latency: float, seed: int = 1):
+        self.rng = random.Random(seed)
+        self.repos = {}
+        for i in range(repos):
+            self.repos[f"org{i % 50}/repo{i}"] = self.make(f"org{i % 50}/repo{i}")
+        self.latency = latency
+        self.max_age = 60
+        self.quota = 100000
+        self.reset_in = 3600
+        self.charged = 0
+        self.not_modified = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                time.sleep(server.latency)
+                url = urlparse(self.path)
+                headers = {}
+                if url.path.startswith("/repos/"):
+                    repo = server.repos.get(url.path[len("/repos/"):])
+                    status, payload = (200, repo) if repo else (404, {"message": "Not Found"})
+                    headers["Cache-Control"] = f"public, max-age={server.max_age}"
+                elif url.path == "/search/repositories":
+                    status, payload, headers["Link"] = server.search(url, self.headers["Host"])
+                    headers["Cache-Control"] = "no-cache"
+                else:
+                    status, payload = 404, {"message": "Not Found"}
+                body = json.dumps(payload).encode()
+                etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+                with server.lock:
+                    if status == 200 and self.headers.get("If-None-Match") == etag:
+                        server.not_modified += 1
+                        status, body = 304, b""
+                    else:
+                        server.charged += 1
+                    remaining = max(0, server.quota - server.charged)
+                headers.update({"ETag": etag, "X-RateLimit-Remaining": str(remaining),
+                                "X-RateLimit-Reset": str(int(time.time()) + server.reset_in)})
+                self.send_response(status)
+                for name, value in headers.items():
+                    if value:
+                        self.send_header(name, value)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def make(self, full_name):
+        return {"full_name": full_name, "stargazers_count": self.rng.randint(10, 90000),
+                "forks_count": self.rng.randint(0, 30000), "open_issues_count": self.rng.randint(0, 500),
+                "created_at": "2014-05-01T00:00:00Z", "owner": {"login": full_name.split("/")[0]},
+                "description": "y" * 400}
+
+    def search(self, url, host):
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        language = query.get("q", "").partition("language:")[2]
+        items = sorted((r for i, r in enumerate(self.repos.values()) if sum(map(ord, language)) % 3 != i % 3),
+                       key=lambda r: r["stargazers_count"], reverse=True)
+        per_page, page = int(query.get("per_page", 30)), int(query.get("page", 1))
+        pages = max(1, -(-len(items) // per_page))
+        link = lambda p, rel: f'<http://{host}{url.path}?{urlencode({**query, "page": p})}>; rel="{rel}"'
+        links = ", ".join([link(page + 1, "next"), link(pages, "last")]) if page < pages else ""
+        return 200, {"total_count": len(items), "items": items[(page - 1) * per_page:page * per_page]}, links
+
+    def churn(self, n):
+        for name in self.rng.sample(sorted(self.repos), n):
+            self.repos[name]["stargazers_count"] += 1
+
+def run(server, names, languages, cache):
+    session = cached_session(cache)
+    start = time.perf_counter()
+    charged, revalidated = server.charged, server.not_modified
+    repos = [session.get(f"{server.base}/repos/{name}").json() for name in names]
+    client = TrendingClient(f"{server.base}/search/repositories", concurrency=4, cache=cache)
+    stats, _ = trending(languages, top_n=10, per_page=50, max_pages=5, concurrency=4, client=client)
+    client.close()
+    session.close()
+    elapsed = time.perf_counter() - start
+    result = (repos, {lang: (s.repos, s.total_stars, [r["full_name"] for r in s.top()]) for lang, s in stats.items()})
+    return result, elapsed, server.charged - charged, server.not_modified - revalidated
+
+def quota_check(server, names, root, spare=5):
+    """Warm repeat runs with `spare` requests of quota left; returns (waits, seconds, charged)"""
+    cache = ResponseCache(os.path.join(root, "quota.db"))
+    server.max_age = 60
+    client = GitHubClient(concurrency=4, cache=cache)
+    for name in names:
+        client.get(f"{server.base}/repos/{name}")
+    client.close()
+    # a budget the client would spend several times over if hits and 304s counted
+    server.quota, server.reset_in = server.charged + spare, 5
+    client = GitHubClient(concurrency=4, cache=cache)
+    start, charged = time.perf_counter(), server.charged
+    for max_age in (60, 0):  # fresh hits, then 304 revalidations
+        server.max_age = max_age
+        for name in names:
+            client.get(f"{server.base}/repos/{name}")
+    elapsed = time.perf_counter() - start
+    client.close()
+    cache.close()
+    return client.gate.waits, elapsed, server.charged - charged
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repos", type=int, default=100)
+    parser.add_argument("--languages", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--churn", type=int, default=10)
+    args = parser.parse_args()
+
+    server = StandIn(args.repos, args.latency_ms / 1000)
+    names = sorted(server.repos) + ["fake/repo-that-does-not-exist"]
+    languages = ["python", "go", "rust", "java", "ruby", "swift"][:args.languages]
+    root = tempfile.mkdtemp(prefix="github-cache-")
+    cache = ResponseCache(os.path.join(root, "cache.db"))
+    rows = []
+
+    expected, elapsed, charged, _ = run(server, names, languages, None)
+    rows.append(("uncached", elapsed, charged, 0, ""))
+    agree = True
+    for name in ["cold", "warm, fresh", "warm, 304", "warm, churn", "tiny cache"]:
+        if name == "warm, 304":
+            server.max_age = 0
+            cache.clear()
+            run(server, names, languages, cache)  # re-store with max-age 0
+        if name == "warm, churn":
+            server.churn(args.churn)
+            expected, *_ = run(server, names, languages, None)
+        if name == "tiny cache":
+            cache.close()
+            cache = ResponseCache(os.path.join(root, "tiny.db"), max_entries=args.repos // 4)
+            run(server, names, languages, cache)
+        cache.stats.clear()
+        result, elapsed, charged, revalidated = run(server, names, languages, cache)
+        agree = agree and result == expected
+        s = cache.stats
+        rows.append((name, elapsed, charged, revalidated,
+                     f"hits {s['hits']}, 304s {s['revalidated']}, misses {s['misses']}, evicted {s['evictions']}"))
+    cache.close()
+    waits, quota_elapsed, quota_charged = quota_check(server, names, root)
+    server.httpd.shutdown()
+
+    print(f"{len(names)} repo lookups + {len(languages)} trending searches, {args.latency_ms:g} ms latency")
+    print(f"{'run':14s} {'seconds':>8s} {'quota used':>11s} {'304s':>6s}  cache")
+    for name, elapsed, charged, revalidated, note in rows:
+        print(f"{name:14s} {elapsed:8.2f} {charged:11d} {revalidated:6d}  {note}")
+    print(f"results agree: {agree}")
+    print(f"warm runs with 5 requests of quota left: {quota_elapsed:.2f}s, {quota_charged} charged, "
+          f"{waits} waits for the reset")
+    if not agree:
+        raise SystemExit("cached results differ from uncached ones")
+    if waits:
+        raise SystemExit("cache hits or 304s used up the client's rate-limit budget")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Batch what-if costing: many workload profiles against one catalog at once.
+
+PricingAnalyzer.calculate_workload_costs prices one profile at a time.
+Capacity planning sweeps tens of thousands of generated profiles, so this
+module flattens the analyzer's staircase indexes into NumPy arrays and
+prices a whole column-oriented batch with vectorized lookups. It returns
+a profiles x providers cost matrix. Very large sweeps can be split across
+a process pool.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from cloud import PricingAnalyzer, Staircase
+
+# (ascending sizes, rates) where rates carries a trailing +inf so a
+# searchsorted index past the end prices as "cannot serve"
+Table = Tuple[np.ndarray, np.ndarray]
+
+@dataclass
+class ProfileBatch:
+    """Workload profiles as parallel columns, one row per profile"""
+    vcpus: np.ndarray
+    ram: np.ndarray
+    hours: np.ndarray
+    capacity: np.ndarray
+    storage_type: np.ndarray
+    bandwidth: np.ndarray
+    region: np.ndarray  # codes into `regions`
+    regions: List[str]
+
+    @classmethod
+    def from_profiles(cls, profiles: Sequence[Dict]) -> "ProfileBatch":
+        """Build from dicts shaped like WORKLOAD_PROFILES values"""
+        codes: Dict[str, int] = {}
+        region = [codes.setdefault(p["network"]["region"], len(codes)) for p in profiles]
+        return cls(
+            vcpus=np.array([p["compute"]["vcpus"] for p in profiles], dtype=np.int64),
+            ram=np.array([p["compute"]["ram"] for p in profiles], dtype=np.float64),
+            hours=np.array([p["compute"]["hours"] for p in profiles], dtype=np.float64),
+            capacity=np.array([p["storage"]["capacity"] for p in profiles], dtype=np.float64),
+            storage_type=np.array([p["storage"]["type"] for p in profiles], dtype=np.int64),
+            bandwidth=np.array([p["network"]["bandwidth"] for p in profiles], dtype=np.float64),
+            region=np.array(region, dtype=np.int32),
+            regions=list(codes),
+        )
+
+    def __len__(self):
+        return len(self.vcpus)
+
+    def slice(self, start: int, stop: int) -> "ProfileBatch":
+        return ProfileBatch(*(column[start:stop] for column in (
+            self.vcpus, self.ram, self.hours, self.capacity, self.storage_type, self.bandwidth, self.region)),
+            regions=self.regions)
+
+@dataclass
+class BatchCosts:
+    """Monthly costs per (profile, provider); +inf where a provider can't serve"""
+    providers: List[str]
+    compute: np.ndarray
+    storage: np.ndarray
+    network: np.ndarray
+
+    @property
+    def total(self) -> np.ndarray:
+        return self.compute + self.storage + self.network
+
+    def cheapest(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Index of the cheapest provider per profile (-1 if none) and its total"""
+        total = self.total
+        best = np.argmin(total, axis=1)
+        cost = total[np.arange(len(total)), best]
+        return np.where(np.isfinite(cost), best, -1), cost
+
+    @classmethod
+    def concat(cls, parts: List["BatchCosts"]) -> "BatchCosts":
+        return cls(parts[0].providers,
+                   np.concatenate([p.compute for p in parts]),
+                   np.concatenate([p.storage for p in parts]),
+                   np.concatenate([p.network for p in parts]))
+
+def _table(stair: Staircase, rate) -> Table:
+    sizes = np.array(stair.sizes, dtype=np.float64)
+    rates = np.array([rate(item) for item in stair.items] + [np.inf], dtype=np.float64)
+    return sizes, rates
+
+def _lookup(table: Table, thresholds: np.ndarray) -> np.ndarray:
+    sizes, rates = table
+    return rates[np.searchsorted(sizes, thresholds, side="left")]
+
+def _group_rows(column: np.ndarray) -> List[Tuple[Any, np.ndarray]]:
+    """(value, row indices) for each distinct value, from a single sort.
+
+    Each bucket then touches only its own rows, where a boolean mask per
+    bucket would scan the whole batch every time.
+    """
+    if not len(column):
+        return []
+    order = np.argsort(column, kind="stable")
+    ordered = column[order]
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    ends = np.r_[starts[1:], len(order)]
+    return [(ordered[a].item(), order[a:b]) for a, b in zip(starts, ends)]
+
+def _scale(rate: np.ndarray, quantity: np.ndarray) -> np.ndarray:
+    # inf * 0 would be nan; an unserved profile stays unserved
+    return np.where(np.isinf(rate), np.inf, rate * quantity)
+
+@dataclass
+class CostTables:
+    """The analyzer's indexes as plain arrays, cheap to ship to workers"""
+    providers: List[str]
+    compute: Dict[str, Tuple[np.ndarray, List[Table]]]
+    storage: Dict[str, Dict[int, Table]]
+    network: Dict[str, Dict[str, Table]]
+
+    @classmethod
+    def from_analyzer(cls, analyzer: PricingAnalyzer) -> "CostTables":
+        compute = {
+            provider: (np.array(index.levels, dtype=np.int64),
+                       [_table(stair, lambda c: c.cost_per_hour) for stair in index.stairs])
+            for provider, index in analyzer.compute_index.items()
+        }
+        storage: Dict[str, Dict[int, Table]] = {}
+        for type_id, stairs in analyzer.storage_index.items():
+            for provider, stair in stairs.items():
+                storage.setdefault(provider, {})[type_id] = _table(stair, lambda s: s.price_per_gb)
+        network: Dict[str, Dict[str, Table]] = {}
+        for region, stairs in analyzer.network_index.items():
+            for provider, stair in stairs.items():
+                network.setdefault(provider, {})[region] = _table(stair, lambda n: n.base_cost)
+        providers = sorted(compute.keys() | storage.keys() | network.keys())
+        return cls(providers, compute, storage, network)
+
+    def evaluate(self, batch: ProfileBatch) -> BatchCosts:
+        rows, cols = len(batch), len(self.providers)
+        compute = np.full((rows, cols), np.inf)
+        storage = np.full((rows, cols), np.inf)
+        network = np.full((rows, cols), np.inf)
+        bandwidth_units = batch.bandwidth / 1000
+        # Grouped once per batch and shared by every provider
+        by_vcpus = _group_rows(batch.vcpus)
+        by_type = _group_rows(batch.storage_type)
+        by_region = [(batch.regions[code], group) for code, group in _group_rows(batch.region)]
+
+        for k, provider in enumerate(self.providers):
+            rate = np.full(rows, np.inf)
+            if provider in self.compute:
+                levels, stairs = self.compute[provider]
+                for vcpus, group in by_vcpus:
+                    level = np.searchsorted(levels, vcpus, side="left")
+                    if level < len(stairs):
+                        rate[group] = _lookup(stairs[level], batch.ram[group])
+            compute[:, k] = _scale(rate, batch.hours)
+
+            rate = np.full(rows, np.inf)
+            tables = self.storage.get(provider, {})
+            for type_id, group in by_type:
+                if type_id in tables:
+                    rate[group] = _lookup(tables[type_id], batch.capacity[group])
+            storage[:, k] = _scale(rate, batch.capacity)
+
+            rate = np.full(rows, np.inf)
+            tables = self.network.get(provider, {})
+            for region, group in by_region:
+                if region in tables:
+                    rate[group] = _lookup(tables[region], batch.bandwidth[group])
+            network[:, k] = _scale(rate, bandwidth_units)
+
+        return BatchCosts(self.providers, compute, storage, network)
+
+_worker_tables: Optional[CostTables] = None
+
+def _init_worker(tables: CostTables):
+    global _worker_tables
+    _worker_tables = tables
+
+def _evaluate_chunk(batch: ProfileBatch) -> BatchCosts:
+    return _worker_tables.evaluate(batch)
+
+class BatchCostEngine:
+    """Prices whole batches of workload profiles against one catalog"""
+    def __init__(self, analyzer: PricingAnalyzer):
+        self.tables = CostTables.from_analyzer(analyzer)
+
+    @property
+    def providers(self) -> List[str]:
+        return self.tables.providers
+
+    def calculate(self, batch: ProfileBatch, workers: int = 1, chunk_size: int = 100000) -> BatchCosts:
+        """Cost matrix for every profile in `batch`.
+
+        With workers > 1, batches larger than one chunk are split across a
+        process pool; the tables are sent to each worker once.
+        """
+        if workers <= 1 or len(batch) <= chunk_size:
+            return self.tables.evaluate(batch)
+        chunks = [batch.slice(start, start + chunk_size) for start in range(0, len(batch), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self.tables,)) as pool:
+            return BatchCosts.concat(list(pool.map(_evaluate_chunk, chunks)))
@@ -0,0 +1,88 @@
+"""Benchmark BatchCostEngine against per-profile calculate_workload_costs.
+
+Generates a what-if sweep of random workload profiles, prices it in one
+batch (optionally across a process pool), checks the matrix against the
+per-profile loop on a sample, and reports throughput.
+
+    python bench_batch.py --skus 50000 --profiles 200000 --workers 4
+"""
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+from batch import BatchCostEngine, ProfileBatch
+from bench_matching import RAM_PER_VCPU, REGIONS, VCPU_SIZES, synthetic_catalog
+from cloud import PricingAnalyzer
+
+def synthetic_profiles(n: int, seed: int = 3):
+    rng = random.Random(seed)
+    profiles = []
+    for _ in range(n):
+        vcpus = rng.choice(VCPU_SIZES)
+        profiles.append({
+            "compute": {"vcpus": vcpus, "ram": vcpus * rng.choice(RAM_PER_VCPU), "hours": rng.randint(0, 730)},
+            "storage": {"capacity": 100 * 2 ** rng.randint(0, 11), "type": rng.randint(1, 3)},
+            "network": {"bandwidth": 100 * 2 ** rng.randint(0, 9), "region": rng.choice(REGIONS)},
+        })
+    return profiles
+
+def mismatches(engine, costs, analyzer, profiles):
+    """Rows where the batch matrix disagrees with the per-profile result"""
+    bad = 0
+    for row, profile in enumerate(profiles):
+        expected = analyzer.calculate_workload_costs(profile)
+        for k, provider in enumerate(engine.providers):
+            got = costs.total[row, k]
+            if provider in expected:
+                bad += got != expected[provider]["total"]
+            else:
+                bad += np.isfinite(got)
+    return bad
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--skus", type=int, default=50000, help="SKUs per service kind")
+    parser.add_argument("--profiles", type=int, default=200000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--check", type=int, default=2000, help="profiles to verify with the per-profile loop")
+    args = parser.parse_args()
+
+    analyzer = PricingAnalyzer(*synthetic_catalog(args.skus))
+    profiles = synthetic_profiles(args.profiles)
+    start = time.perf_counter()
+    batch = ProfileBatch.from_profiles(profiles)
+    engine = BatchCostEngine(analyzer)
+    print(f"{args.profiles} profiles, {args.skus} SKUs/kind: setup {time.perf_counter() - start:.2f}s")
+
+    sample = profiles[:args.check]
+    start = time.perf_counter()
+    for profile in sample:
+        analyzer.calculate_workload_costs(profile)
+    loop = (time.perf_counter() - start) / len(sample)
+    print(f"per-profile loop: {loop * 1e6:8.1f} us/profile (~{loop * len(profiles):.1f}s for the sweep)")
+
+    start = time.perf_counter()
+    costs = engine.calculate(batch)
+    single = time.perf_counter() - start
+    print(f"batch, 1 process: {single * 1e6 / len(profiles):8.2f} us/profile ({single:.2f}s, x{loop * len(profiles) / single:.0f})")
+
+    if args.workers > 1:
+        start = time.perf_counter()
+        pooled = engine.calculate(batch, workers=args.workers, chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - start
+        print(f"batch, {args.workers} workers: {elapsed * 1e6 / len(profiles):6.2f} us/profile ({elapsed:.2f}s)")
+        if not np.array_equal(pooled.total, costs.total):
+            raise SystemExit("process-pool results differ from single-process batch")
+
+    bad = mismatches(engine, costs, analyzer, sample)
+    served = np.isfinite(costs.total).any(axis=1).mean()
+    print(f"mismatches {bad}/{len(sample) * len(engine.providers)}, profiles served by some provider {served:.1%}")
+    if bad:
+        raise SystemExit("batch costs differ from calculate_workload_costs")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark PricingAnalyzer's indexed best-match queries against brute force.
+
+Builds a large synthetic catalog, runs the same random queries through the
+indexes and through a full scan, checks they pick the same SKUs, and
+reports the speedup.
+
+    python bench_matching.py --skus 50000 --queries 5000
+"""
+import argparse
+import random
+import time
+
+from cloud import (ComputeInstance, NetworkService, PricingAnalyzer, StorageService,
+                   compute_key, network_key, storage_key)
+
+PROVIDERS = ["AWS", "Azure", "GCP"]
+VCPU_SIZES = [1, 2, 4, 8, 16, 32, 48, 64, 96, 128]
+RAM_PER_VCPU = [0.5, 1, 2, 4, 8, 16]
+REGIONS = ["us-east", "us-west", "eu-west", "eu-central", "asia-east", "asia-south", "sa-east", "af-south"]
+
+def synthetic_catalog(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    compute, storage, network = [], [], []
+    for i in range(n):
+        provider = rng.choice(PROVIDERS)
+        vcpus = rng.choice(VCPU_SIZES)
+        ram = vcpus * rng.choice(RAM_PER_VCPU)
+        cost = vcpus * 0.02 * (1 + ram / vcpus / 8) * rng.uniform(0.7, 1.3)
+        compute.append(ComputeInstance(provider, f"c-{i}", vcpus, ram, round(cost, 4)))
+
+        type_id = rng.randint(1, 3)
+        price = (0.023, 0.045, 0.10)[type_id - 1] * rng.uniform(0.7, 1.3)
+        storage.append(StorageService(provider, f"s-{i}", type_id, 100 * 2 ** rng.randint(0, 10), round(price, 4)))
+
+        network.append(NetworkService(provider, f"n-{i}", rng.randint(1, 2), 100 * 2 ** rng.randint(0, 8),
+                                      rng.choice(REGIONS), round(rng.uniform(5, 40), 2)))
+    return compute, storage, network
+
+def synthetic_queries(n: int, seed: int = 11):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        vcpus = rng.choice(VCPU_SIZES)
+        queries.append((vcpus, vcpus * rng.choice(RAM_PER_VCPU), 100 * 2 ** rng.randint(0, 11),
+                        rng.randint(1, 3), 100 * 2 ** rng.randint(0, 9), rng.choice(REGIONS)))
+    return queries
+
+def cheapest_per_provider(items, key):
+    best = {}
+    for item in items:
+        if item.provider not in best or key(item) < key(best[item.provider]):
+            best[item.provider] = item
+    return best
+
+def brute_force(compute, storage, network, query):
+    vcpus, ram, capacity, type_id, bandwidth, region = query
+    return (
+        cheapest_per_provider((c for c in compute if c.vcpus >= vcpus and c.ram_gb >= ram), compute_key),
+        cheapest_per_provider((s for s in storage if s.type_id == type_id and s.capacity_gb >= capacity), storage_key),
+        cheapest_per_provider((n for n in network if n.region == region and n.bandwidth >= bandwidth), network_key),
+    )
+
+def indexed(analyzer, query):
+    vcpus, ram, capacity, type_id, bandwidth, region = query
+    return (
+        analyzer.find_best_compute_match(vcpus, ram),
+        analyzer.find_best_storage_match(capacity, type_id),
+        analyzer.find_best_network_match(bandwidth, region),
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--skus", type=int, default=50000, help="SKUs per service kind")
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--brute-queries", type=int, default=200,
+                        help="queries to run through the full scan (it is slow)")
+    args = parser.parse_args()
+
+    compute, storage, network = synthetic_catalog(args.skus)
+    queries = synthetic_queries(args.queries)
+
+    start = time.perf_counter()
+    analyzer = PricingAnalyzer(compute, storage, network)
+    build = time.perf_counter() - start
+    frontier = sum(len(stair) for index in analyzer.compute_index.values() for stair in index.stairs)
+    print(f"{args.skus} SKUs/kind: index build {build * 1000:.0f} ms, compute frontier entries {frontier}")
+
+    start = time.perf_counter()
+    results = [indexed(analyzer, q) for q in queries]
+    fast = (time.perf_counter() - start) / len(queries)
+
+    checked = queries[:args.brute_queries]
+    start = time.perf_counter()
+    expected = [brute_force(compute, storage, network, q) for q in checked]
+    slow = (time.perf_counter() - start) / len(checked)
+
+    mismatches = sum(1 for got, want in zip(results, expected) if got != want)
+    print(f"indexed:     {fast * 1e6:9.1f} us/query ({args.queries} queries)")
+    print(f"brute force: {slow * 1e6:9.1f} us/query ({len(checked)} queries)")
+    print(f"speedup x{slow / fast:.0f}, mismatches {mismatches}/{len(checked)}")
+    if mismatches:
+        raise SystemExit("indexed results differ from brute force")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Benchmark snapshot startup, conditional refresh and incremental reindexing.
+
+Serves large synthetic catalogs from a local ETag-aware server and times:
+a cold fetch+parse, startup from on-disk snapshots, an unchanged refresh
+(304, no parsing), and a refresh after a small catalog change, which the
+client applies to its analyzer as a diff, versus a full index rebuild.
+Queries against the patched analyzer are checked against a freshly built
+one.
+
+    python bench_refresh.py --records 60000 --churn 0.01
+"""
+import argparse
+import json
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench_matching import indexed, synthetic_queries
+from cloud import CloudPricingClient, PricingAnalyzer, RateLimiter
+
+class CatalogServer:
+    """Serves /<provider> as a list of {"id": n} records with a versioned ETag"""
+    def __init__(self, providers, records: int):
+        self.ids = {provider: list(range(1, records + 1)) for provider in providers}
+        self.version = {provider: 1 for provider in providers}
+        self.bodies = {provider: self._encode(provider) for provider in providers}
+        self.not_modified = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                provider = self.path.strip("/")
+                etag = f'"v{server.version[provider]}"'
+                if self.headers.get("If-None-Match") == etag:
+                    server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = server.bodies[provider]
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def _encode(self, provider):
+        return json.dumps([{"id": i} for i in self.ids[provider]]).encode()
+
+    def churn(self, provider, fraction: float, rng: random.Random):
+        """Drop a fraction of SKUs and add as many new ones"""
+        ids = self.ids[provider]
+        count = max(1, int(len(ids) * fraction))
+        dropped = set(rng.sample(ids, count))
+        top = max(ids)
+        self.ids[provider] = [i for i in ids if i not in dropped] + list(range(top + 1, top + 1 + count))
+        self.version[provider] += 1
+        self.bodies[provider] = self._encode(provider)
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def make_client(server, snapshot_dir):
+    catalogs = {provider: f"{server.base}/{provider}" for provider in server.ids}
+    client = CloudPricingClient(catalogs, snapshot_dir=snapshot_dir)
+    client.rate_limiter = RateLimiter(calls_per_minute=6000, burst=len(catalogs))
+    return client
+
+def catalog(client):
+    return client.get_compute_instances(), client.get_storage_services(), client.get_network_services()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=60000, help="catalog records per provider")
+    parser.add_argument("--churn", type=float, default=0.01, help="fraction of one provider's SKUs replaced")
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    server = CatalogServer(["AWS", "Azure", "GCP"], args.records)
+    snapshot_dir = tempfile.mkdtemp(prefix="pricing-snapshots-")
+
+    cold = make_client(server, snapshot_dir)
+    _, elapsed = timed(cold.load_catalogs)
+    print(f"cold fetch + parse:        {elapsed * 1000:8.1f} ms")
+    cold.close()
+
+    client, elapsed = timed(lambda: make_client(server, snapshot_dir))
+    print(f"startup from snapshots:    {elapsed * 1000:8.1f} ms")
+    stamped = {provider: snapshot.parsed_at for provider, snapshot in client.snapshots.items()}
+    diff, elapsed = timed(client.refresh_catalogs)
+    restamped = all(client.snapshots[p].parsed_at > t for p, t in stamped.items())
+    print(f"unchanged refresh (304s):  {elapsed * 1000:8.1f} ms, {server.not_modified} not-modified, "
+          f"diff empty: {not diff}, restamped: {restamped}")
+    analyzer, elapsed = timed(client.get_analyzer)
+    print(f"full index build:          {elapsed * 1000:8.1f} ms")
+
+    server.churn("Azure", args.churn, random.Random(5))
+    diff, elapsed = timed(client.refresh_catalogs)
+    print(f"changed refresh + diff:    {elapsed * 1000:8.1f} ms ({diff.summary()})")
+    fresh, rebuild = timed(lambda: PricingAnalyzer(*catalog(client)))
+    print(f"full rebuild instead:      {rebuild * 1000:8.1f} ms")
+
+    queries = synthetic_queries(args.queries)
+    mismatches = sum(1 for q in queries if indexed(analyzer, q) != indexed(fresh, q))
+    print(f"query mismatches after diff: {mismatches}/{len(queries)}")
+    client.close()
+    server.httpd.shutdown()
+    if mismatches or not restamped:
+        raise SystemExit("patched analyzer disagrees with a fresh build, or a 304 left parsed_at stale")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,20 @@
 import requests
+from requests.adapters import HTTPAdapter
+import bisect
 import time
 import json
 import logging
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from dataclasses import astuple, dataclass, field
+
+# Shared helpers live one directory up, next to weatherserv/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ratelimit import ThreadSafeRateLimiter as RateLimiter
+from snapshots import SnapshotStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -14,6 +25,22 @@ AWS_PRICING_API = "https://jsonplaceholder.typicode.com/users"
 AZURE_PRICING_API = "https://jsonplaceholder.typicode.com/posts"
 GCP_PRICING_API = "https://jsonplaceholder.typicode.com/comments"
 
+# One catalog endpoint per provider; each lists compute, storage and network SKUs
+PROVIDER_CATALOGS = {
+    "AWS": AWS_PRICING_API,
+    "Azure": AZURE_PRICING_API,
+    "GCP": GCP_PRICING_API,
+}
+
+# The placeholder endpoints carry no prices, so SKU figures are derived from
+# each record's id; these nudge providers apart so comparisons are meaningful
+PROVIDER_PRICE_FACTOR = {"AWS": 1.0, "Azure": 0.96, "GCP": 1.04}
+REGIONS = ["us-east", "eu-west", "asia-east"]
+STORAGE_BASE_PRICE = {1: 0.023, 2: 0.045, 3: 0.10}  # $/GB-month by type_id
+
+# Directory for per-provider catalog snapshots; unset keeps them in memory only
+SNAPSHOT_DIR = os.getenv("PRICING_SNAPSHOT_DIR")
+
 # Workload profiles for cost estimation
 WORKLOAD_PROFILES = {
     "small_web_app": {
@@ -70,73 +97,339 @@ class NetworkService:
         """Calculate monthly cost based on bandwidth"""
         return self.base_cost * (bandwidth / 1000)
 
-class RateLimiter:
-    """Simple rate limiter to prevent API throttling"""
-    def __init__(self, calls_per_minute: int = 30):
-        self.calls_per_minute = calls_per_minute
-        self.call_timestamps = []
-    
-    def wait_if_needed(self):
-        """Wait if we've exceeded our rate limit"""
-        current_time = time.time()
-        
-        # Remove timestamps older than 1 minute
-        self.call_timestamps = [ts for ts in self.call_timestamps if current_time - ts < 60]
-        
-        # If we've reached the limit, wait until we can make another call
-        if len(self.call_timestamps) >= self.calls_per_minute:
-            oldest_timestamp = min(self.call_timestamps)
-            wait_time = 60 - (current_time - oldest_timestamp)
-            if wait_time > 0:
-                logger.info(f"Rate limit reached. Waiting for {wait_time:.2f} seconds")
-                time.sleep(wait_time)
-        
-        # Add current timestamp
-        self.call_timestamps.append(time.time())
+def parse_catalog(provider: str, records: List[Dict]) -> Tuple[List[ComputeInstance], List[StorageService], List[NetworkService]]:
+    """Turn one provider's catalog records into compute/storage/network SKUs"""
+    factor = PROVIDER_PRICE_FACTOR.get(provider, 1.0)
+    compute, storage, network = [], [], []
+    for record in records:
+        try:
+            sku_id = int(record["id"])
+        except (KeyError, TypeError, ValueError):
+            logger.warning(f"Skipping malformed {provider} catalog record: {record!r:.80}")
+            continue
+        tier = sku_id // 3
+        kind = sku_id % 3
+        if kind == 0:
+            vcpus = 2 ** (tier % 6)
+            ram_gb = float(vcpus * (2, 4, 8)[tier % 3])
+            cost = vcpus * 0.0104 * (1 + ram_gb / vcpus / 8) * factor
+            compute.append(ComputeInstance(provider, f"{provider.lower()}-c{vcpus}-m{ram_gb:g}-{sku_id}",
+                                           vcpus, ram_gb, round(cost, 4)))
+        elif kind == 1:
+            type_id = 1 + tier % 3
+            price = STORAGE_BASE_PRICE[type_id] * factor * (1 + (sku_id % 7) / 20)
+            storage.append(StorageService(provider, f"{provider.lower()}-s{type_id}-{sku_id}", type_id,
+                                          100 * 2 ** (tier % 8), round(price, 4)))
+        else:
+            region = REGIONS[tier % len(REGIONS)]
+            network.append(NetworkService(provider, f"{provider.lower()}-n-{region}-{sku_id}", 1 + (tier // 3) % 2,
+                                          500 * 2 ** (tier % 4), region, round((8 + sku_id % 11) * factor, 2)))
+    return compute, storage, network
+
+KINDS = ("compute", "storage", "network")
+KIND_TYPES = {"compute": ComputeInstance, "storage": StorageService, "network": NetworkService}
+
+@dataclass
+class CatalogSnapshot:
+    """One provider's parsed catalog plus the validators needed to refresh it"""
+    provider: str
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    parsed_at: float
+    compute: List[ComputeInstance]
+    storage: List[StorageService]
+    network: List[NetworkService]
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def meta(self) -> Dict[str, Any]:
+        return {"url": self.url, "etag": self.etag, "last_modified": self.last_modified, "parsed_at": self.parsed_at}
+
+    def to_rows(self) -> Tuple[Dict[str, Any], Dict[str, List[tuple]]]:
+        return self.meta(), {kind: [astuple(item) for item in getattr(self, kind)] for kind in KINDS}
+
+    @classmethod
+    def from_rows(cls, provider: str, meta: Dict[str, Any], rows: Dict[str, List[tuple]]) -> "CatalogSnapshot":
+        items = {kind: [KIND_TYPES[kind](*row) for row in rows.get(kind, ())] for kind in KINDS}
+        return cls(provider, meta["url"], meta.get("etag"), meta.get("last_modified"), meta["parsed_at"], **items)
+
+@dataclass
+class CatalogDiff:
+    """SKUs added and removed per kind; a re-priced SKU appears in both"""
+    added: Dict[str, List[Any]] = field(default_factory=lambda: {kind: [] for kind in KINDS})
+    removed: Dict[str, List[Any]] = field(default_factory=lambda: {kind: [] for kind in KINDS})
+
+    def __bool__(self):
+        return any(self.added.values()) or any(self.removed.values())
+
+    def update(self, other: "CatalogDiff"):
+        for kind in KINDS:
+            self.added[kind].extend(other.added[kind])
+            self.removed[kind].extend(other.removed[kind])
+
+    def summary(self) -> str:
+        return ", ".join(f"{kind} +{len(self.added[kind])}/-{len(self.removed[kind])}" for kind in KINDS)
+
+def diff_catalogs(old: Optional[CatalogSnapshot], new: CatalogSnapshot) -> CatalogDiff:
+    """What changed between two snapshots of the same provider, keyed by SKU name"""
+    diff = CatalogDiff()
+    for kind in KINDS:
+        before = {item.name: item for item in getattr(old, kind)} if old else {}
+        after = {item.name: item for item in getattr(new, kind)}
+        diff.added[kind] = [item for name, item in after.items() if before.get(name) != item]
+        diff.removed[kind] = [item for name, item in before.items() if after.get(name) != item]
+    return diff
 
 class CloudPricingClient:
     """Client for fetching cloud pricing data"""
-    def __init__(self):
-        self.rate_limiter = RateLimiter()
+    def __init__(self, catalogs: Optional[Dict[str, str]] = None, timeout: float = 10,
+                 snapshot_dir: Optional[str] = SNAPSHOT_DIR):
+        self.catalogs = catalogs or PROVIDER_CATALOGS
+        self.timeout = timeout
+        # Shared by every catalog fetch, so it must be thread-safe
+        self.rate_limiter = RateLimiter(calls_per_minute=30)
         self.cache = {}  # Simple cache to store results
-    
-    def fetch_with_retry(self, url: str, max_retries: int = 3) -> Optional[List[Dict]]:
-        """Fetch data with retry logic"""
-        # Implement retry logic with backoff
+        # One pooled keep-alive session shared by the fetch threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.catalogs), pool_maxsize=len(self.catalogs))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.snapshot_store = SnapshotStore(snapshot_dir) if snapshot_dir else None
+        self.snapshots: Dict[str, CatalogSnapshot] = {}
+        # Built on first use, then patched by each refresh's diff
+        self.analyzer: Optional["PricingAnalyzer"] = None
+        self._refreshed = False
+        self._load_snapshots()
+
+    def _load_snapshots(self):
+        """Start from the last saved catalogs so the first refresh is conditional"""
+        if self.snapshot_store is None:
+            return
+        for provider, url in self.catalogs.items():
+            loaded = self.snapshot_store.load(provider)
+            if loaded is None:
+                continue
+            meta, rows = loaded
+            if meta.get("url") != url:
+                logger.info(f"Ignoring {provider} snapshot taken from {meta.get('url')}")
+                continue
+            try:
+                self.snapshots[provider] = CatalogSnapshot.from_rows(provider, meta, rows)
+            except (KeyError, TypeError) as e:
+                logger.warning(f"Ignoring {provider} snapshot that does not match the catalog types: {e}")
+
+    def _request_with_retry(self, url: str, headers: Optional[Dict[str, str]] = None,
+                            max_retries: int = 3) -> Optional[requests.Response]:
+        """GET url with backoff and Retry-After handling; None after max_retries"""
         retry_delay = 1
         for attempt in range(max_retries):
             self.rate_limiter.wait_if_needed()
             try:
                 logger.info(f"Fetching data from {url} (Attempt {attempt+1}/{max_retries})")
-                response = requests.get(url, timeout=10)
-                
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+
+                # Honor Retry-After on throttling
+                if response.status_code == 429:
+                    try:
+                        wait_time = float(response.headers.get("Retry-After", retry_delay))
+                    except ValueError:
+                        wait_time = retry_delay
+                    logger.warning(f"Rate limited by {url}. Waiting for {wait_time} seconds.")
+                    time.sleep(wait_time)
+                    continue
+
                 # Check for successful response
                 response.raise_for_status()  # Raises an exception for 4XX/5XX responses
-                
-                # Return the JSON data
-                return response.json()
+                return response
             except requests.exceptions.RequestException as e:
                 logger.error(f"Request error: {e}")
-        pass
-    
+                if attempt < max_retries - 1:
+                    time.sleep(retry_delay)
+                    retry_delay *= 2  # Exponential backoff
+        logger.error(f"Giving up on {url} after {max_retries} attempts")
+        return None
+
+    def fetch_with_retry(self, url: str, max_retries: int = 3) -> Optional[List[Dict]]:
+        """Fetch data with retry logic"""
+        if url in self.cache:
+            return self.cache[url]
+        response = self._request_with_retry(url, max_retries=max_retries)
+        if response is None:
+            return None
+        try:
+            data = response.json()
+        except ValueError as e:
+            logger.error(f"Invalid JSON from {url}: {e}")
+            return None
+        self.cache[url] = data
+        return data
+
+    def refresh_catalog(self, provider: str, url: str) -> Optional[CatalogDiff]:
+        """Conditionally refetch one provider's catalog.
+
+        A 304 reuses the current snapshot without parsing anything and only
+        restamps it. Returns what changed, or None if the catalog could not
+        be fetched (any existing snapshot is kept).
+        """
+        previous = self.snapshots.get(provider)
+        headers = previous.conditional_headers() if previous else None
+        response = self._request_with_retry(url, headers=headers)
+        if response is None:
+            if previous:
+                logger.warning(f"Keeping {provider} snapshot from {time.time() - previous.parsed_at:.0f}s ago")
+            return None
+        if response.status_code == 304 and previous is not None:
+            logger.info(f"{provider} catalog unchanged (304)")
+            # Still current as of now; a 304 may also carry updated validators
+            previous.parsed_at = time.time()
+            previous.etag = response.headers.get("ETag", previous.etag)
+            previous.last_modified = response.headers.get("Last-Modified", previous.last_modified)
+            if self.snapshot_store is not None:
+                self.snapshot_store.touch(provider, previous.meta())
+            return CatalogDiff()
+
+        try:
+            records = response.json()
+        except ValueError as e:
+            logger.error(f"Invalid JSON from {url}: {e}")
+            return None
+        if not isinstance(records, list):
+            logger.error(f"Unexpected {provider} catalog payload: {type(records).__name__}")
+            return None
+
+        snapshot = CatalogSnapshot(provider, url, response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                                   time.time(), *parse_catalog(provider, records))
+        diff = diff_catalogs(previous, snapshot)
+        self.snapshots[provider] = snapshot
+        if self.snapshot_store is not None:
+            self.snapshot_store.save(provider, *snapshot.to_rows())
+        logger.info(f"{provider} catalog refreshed: {diff.summary()}")
+        return diff
+
+    def refresh_catalogs(self) -> CatalogDiff:
+        """Refresh every provider catalog concurrently and merge what changed.
+
+        Takes about as long as the slowest provider. If an analyzer has been
+        built, the merged diff is applied to it.
+        """
+        with ThreadPoolExecutor(max_workers=len(self.catalogs)) as pool:
+            futures = [pool.submit(self.refresh_catalog, provider, url) for provider, url in self.catalogs.items()]
+            diffs = [future.result() for future in futures]
+        self._refreshed = True
+
+        merged = CatalogDiff()
+        for diff in diffs:
+            if diff:
+                merged.update(diff)
+        if self.analyzer is not None and merged:
+            self.analyzer.apply_diff(merged)
+        return merged
+
+    def load_catalogs(self) -> bool:
+        """Refresh every provider catalog; False if any has no usable data"""
+        self.refresh_catalogs()
+        missing = [provider for provider in self.catalogs if provider not in self.snapshots]
+        for provider in missing:
+            logger.error(f"No usable catalog from {provider}")
+        return not missing
+
+    def _collect(self, kind: str) -> List[Any]:
+        if not self._refreshed:
+            self.load_catalogs()
+        return [item for provider in self.catalogs if provider in self.snapshots
+                for item in getattr(self.snapshots[provider], kind)]
+
     def get_compute_instances(self) -> List[ComputeInstance]:
         """Fetch and parse compute instances data"""
-        # Fetch AWS-like compute pricing
-        url = 'https://jsonplaceholder.typicode.com/users'
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        pass
-    
+        return self._collect("compute")
+
     def get_storage_services(self) -> List[StorageService]:
         """Fetch and parse storage services data"""
-        # Fetch Azure-like storage pricing
-        pass
-    
+        return self._collect("storage")
+
     def get_network_services(self) -> List[NetworkService]:
         """Fetch and parse network services data"""
-        # Fetch GCP-like network pricing
-        pass
+        return self._collect("network")
+
+    def get_analyzer(self) -> "PricingAnalyzer":
+        """Analyzer over the current catalogs, kept up to date by refresh_catalogs"""
+        if self.analyzer is None:
+            self.analyzer = PricingAnalyzer(self.get_compute_instances(), self.get_storage_services(),
+                                            self.get_network_services())
+        return self.analyzer
+
+    def close(self):
+        self.session.close()
+
+def compute_key(instance: ComputeInstance):
+    """Ordering for 'cheapest' instances; later fields break price ties"""
+    return (instance.cost_per_hour, instance.vcpus, instance.ram_gb, instance.name)
+
+def storage_key(service: StorageService):
+    return (service.price_per_gb, service.capacity_gb, service.name)
+
+def network_key(service: NetworkService):
+    return (service.base_cost, service.bandwidth, service.name)
+
+class Staircase:
+    """Cheapest item whose `size` meets a threshold, in O(log n).
+
+    Keeps only the Pareto frontier: walking sizes from largest to smallest,
+    an item survives if it is cheaper than everything bigger. Along the
+    frontier cost rises with size, so the first frontier item at or above
+    the threshold is the cheapest one that qualifies.
+    """
+    def __init__(self, items: List[Any], size: Callable[[Any], float], key: Callable[[Any], Any]):
+        frontier = []
+        best = None
+        for item in sorted(items, key=lambda i: (-size(i), key(i))):
+            item_key = key(item)
+            if best is None or item_key < best:
+                frontier.append(item)
+                best = item_key
+        frontier.reverse()
+        self.items = frontier
+        self.sizes = [size(item) for item in frontier]
+
+    def __len__(self):
+        return len(self.items)
+
+    def query(self, threshold: float) -> Optional[Any]:
+        i = bisect.bisect_left(self.sizes, threshold)
+        return self.items[i] if i < len(self.items) else None
+
+class ComputeIndex:
+    """Per-provider compute index over (vcpus, ram).
+
+    One staircase over ram for each distinct vcpus level, covering every
+    instance with at least that many vcpus. Catalogs have a handful of
+    vcpus sizes, so a query is two binary searches.
+    """
+    def __init__(self, instances: List[ComputeInstance]):
+        by_vcpus = defaultdict(list)
+        for instance in instances:
+            by_vcpus[instance.vcpus].append(instance)
+        self.levels = sorted(by_vcpus)
+        self.stairs: List[Staircase] = [None] * len(self.levels)
+        carried = []
+        for i in range(len(self.levels) - 1, -1, -1):
+            # Anything off the frontier of a higher level can't win here either
+            stair = Staircase(carried + by_vcpus[self.levels[i]], lambda c: c.ram_gb, compute_key)
+            self.stairs[i] = stair
+            carried = stair.items
+
+    def query(self, vcpus: int, ram_gb: float) -> Optional[ComputeInstance]:
+        i = bisect.bisect_left(self.levels, vcpus)
+        if i == len(self.levels):
+            return None
+        return self.stairs[i].query(ram_gb)
 
 class PricingAnalyzer:
     """Analyzes cloud pricing data to generate insights"""
@@ -146,27 +439,135 @@ class PricingAnalyzer:
         self.compute_instances = compute_instances
         self.storage_services = storage_services
         self.network_services = network_services
-    
+        self._build_indexes()
+
+    CATALOG_ATTRS = {"compute": "compute_instances", "storage": "storage_services", "network": "network_services"}
+    # Staircase size and price order for the bucketed kinds
+    BUCKET_FIELDS = {
+        "storage": (lambda s: s.capacity_gb, storage_key),
+        "network": (lambda n: n.bandwidth, network_key),
+    }
+
+    @staticmethod
+    def _partition(kind: str, item: Any):
+        """Index partition an item lives in: the unit a catalog diff rebuilds"""
+        if kind == "compute":
+            return item.provider
+        if kind == "storage":
+            return (item.type_id, item.provider)
+        return (item.region, item.provider)
+
+    def _catalog(self, kind: str) -> List[Any]:
+        return getattr(self, self.CATALOG_ATTRS[kind])
+
+    def _build_indexes(self):
+        """Index the catalog once so each best-match query is O(log n)"""
+        # {kind: {partition: {sku name: item}}}
+        self._items = {kind: defaultdict(dict) for kind in KINDS}
+        for kind in KINDS:
+            for item in self._catalog(kind):
+                self._items[kind][self._partition(kind, item)][item.name] = item
+
+        self.compute_index: Dict[str, ComputeIndex] = {}
+        self.storage_index: Dict[int, Dict[str, Staircase]] = {}
+        self.network_index: Dict[str, Dict[str, Staircase]] = {}
+        for kind in KINDS:
+            for partition in list(self._items[kind]):
+                self._reindex(kind, partition)
+
+    def _reindex(self, kind: str, partition):
+        items = self._items[kind].get(partition)
+        if not items:
+            self._items[kind].pop(partition, None)
+        if kind == "compute":
+            if items:
+                self.compute_index[partition] = ComputeIndex(list(items.values()))
+            else:
+                self.compute_index.pop(partition, None)
+            return
+
+        bucket, provider = partition
+        index = self.storage_index if kind == "storage" else self.network_index
+        if items:
+            size, key = self.BUCKET_FIELDS[kind]
+            index.setdefault(bucket, {})[provider] = Staircase(list(items.values()), size, key)
+        elif bucket in index:
+            index[bucket].pop(provider, None)
+            if not index[bucket]:
+                del index[bucket]
+
+    def apply_diff(self, diff: CatalogDiff):
+        """Fold a catalog diff in, rebuilding only the index partitions it touches"""
+        touched = set()
+        for kind in KINDS:
+            for item in diff.removed[kind]:
+                partition = self._partition(kind, item)
+                self._items[kind][partition].pop(item.name, None)
+                touched.add((kind, partition))
+            for item in diff.added[kind]:
+                partition = self._partition(kind, item)
+                self._items[kind][partition][item.name] = item
+                touched.add((kind, partition))
+        for kind, partition in touched:
+            self._reindex(kind, partition)
+
+        for kind in KINDS:
+            if not diff.added[kind] and not diff.removed[kind]:
+                continue
+            gone = {(item.provider, item.name) for item in diff.removed[kind]}
+            kept = [item for item in self._catalog(kind) if (item.provider, item.name) not in gone]
+            setattr(self, self.CATALOG_ATTRS[kind], kept + diff.added[kind])
+        logger.info(f"Applied catalog diff ({diff.summary()}), rebuilt {len(touched)} index partitions")
+
     def find_best_compute_match(self, vcpus: int, ram_gb: float) -> Dict[str, ComputeInstance]:
         """Find the best instance for each provider matching the requirements"""
-        # Implement logic to find instances that meet or exceed the requirements
-        # with the lowest cost
-        pass
+        matches = {}
+        for provider, index in self.compute_index.items():
+            instance = index.query(vcpus, ram_gb)
+            if instance is not None:
+                matches[provider] = instance
+        return matches
     
     def find_best_storage_match(self, capacity_gb: int, type_id: int) -> Dict[str, StorageService]:
         """Find the best storage service for each provider matching the requirements"""
-        # Implement logic to find storage that meets or exceeds the requirements
-        pass
+        return self._query_buckets(self.storage_index.get(type_id, {}), capacity_gb)
     
     def find_best_network_match(self, bandwidth: int, region: str) -> Dict[str, NetworkService]:
         """Find the best network service for each provider matching the requirements"""
-        # Implement logic to find network services that meet or exceed the requirements
-        pass
+        return self._query_buckets(self.network_index.get(region, {}), bandwidth)
+
+    @staticmethod
+    def _query_buckets(stairs: Dict[str, Staircase], threshold: float) -> Dict[str, Any]:
+        matches = {}
+        for provider, stair in stairs.items():
+            item = stair.query(threshold)
+            if item is not None:
+                matches[provider] = item
+        return matches
     
     def calculate_workload_costs(self, workload_profile: Dict) -> Dict[str, Dict[str, float]]:
-        """Calculate costs per provider for a given workload profile"""
-        # Implement workload cost calculation
-        pass
+        """Calculate costs per provider for a given workload profile
+
+        Only providers that can serve all three parts of the workload are
+        included.
+        """
+        compute = workload_profile["compute"]
+        storage = workload_profile["storage"]
+        network = workload_profile["network"]
+        instances = self.find_best_compute_match(compute["vcpus"], compute["ram"])
+        volumes = self.find_best_storage_match(storage["capacity"], storage["type"])
+        links = self.find_best_network_match(network["bandwidth"], network["region"])
+
+        costs = {}
+        for provider in sorted(instances.keys() & volumes.keys() & links.keys()):
+            breakdown = {
+                "compute": instances[provider].monthly_cost(compute["hours"]),
+                "storage": volumes[provider].monthly_cost(storage["capacity"]),
+                "network": links[provider].monthly_cost(network["bandwidth"]),
+            }
+            breakdown["total"] = sum(breakdown.values())
+            costs[provider] = breakdown
+        return costs
 
 def generate_report(workload_costs: Dict[str, Dict[str, Dict[str, float]]]):
     """Generate a report with price comparisons and recommendations"""
@@ -178,7 +579,10 @@ def main():
     client = CloudPricingClient()
     
     try:
-        # Fetch pricing data
+        # Fetch all provider catalogs concurrently, then read the parsed lists
+        start = time.perf_counter()
+        client.load_catalogs()
+        logger.info(f"Loaded pricing catalogs in {time.perf_counter() - start:.2f}s")
         compute_instances = client.get_compute_instances()
         storage_services = client.get_storage_services()
         network_services = client.get_network_services()
@@ -188,8 +592,8 @@ def main():
             logger.error("Failed to fetch complete pricing data")
             return
         
-        # Initialize analyzer
-        analyzer = PricingAnalyzer(compute_instances, storage_services, network_services)
+        # Initialize analyzer; later refreshes patch it rather than rebuild it
+        analyzer = client.get_analyzer()
         
         # Calculate costs for each workload profile
         workload_costs = {}
@@ -201,6 +605,8 @@ def main():
         
     except Exception as e:
         logger.error(f"An error occurred: {e}")
+    finally:
+        client.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
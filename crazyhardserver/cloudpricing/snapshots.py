@@ -0,0 +1,93 @@
+"""On-disk pricing catalog snapshots, one gzipped JSON file per provider.
+
+A snapshot holds the HTTP validators (ETag / Last-Modified) that make the
+next refresh conditional, plus the parsed SKU rows as plain lists. Plain
+rows serialize far smaller and load far faster than dataclass instances,
+so startup only pays for rebuilding the objects. Unlike pickle, loading
+JSON never runs code from the file. Writes go to a temp
+file and then os.replace, so a crash leaves the previous snapshot intact.
+
+A 304 only changes the metadata (parse time, maybe the validators), so
+touch() writes that to a small <provider>.meta.json beside the rows
+instead of rewriting them. The sidecar names the rows meta it amends and
+is ignored once the rows file has been replaced.
+"""
+import gzip
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2
+
+Rows = Dict[str, List[list]]
+
+def _valid(meta: Any, rows: Any) -> bool:
+    return (isinstance(meta, dict) and isinstance(rows, dict)
+            and all(isinstance(kind_rows, list) for kind_rows in rows.values()))
+
+class SnapshotStore:
+    """Directory of <provider>.json.gz files holding (meta, rows)"""
+    def __init__(self, root: str):
+        self.root = root
+        self._base: Dict[str, Dict[str, Any]] = {}  # provider -> meta stored with its rows
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, provider: str) -> str:
+        return os.path.join(self.root, f"{provider.lower()}.json.gz")
+
+    def _meta_path(self, provider: str) -> str:
+        return os.path.join(self.root, f"{provider.lower()}.meta.json")
+
+    def load(self, provider: str) -> Optional[Tuple[Dict[str, Any], Rows]]:
+        """Return (meta, rows) for provider, or None if missing or unreadable"""
+        path = self._path(provider)
+        try:
+            with open(path, "rb") as f:
+                state = json.loads(gzip.decompress(f.read()))
+            version, meta, rows = state["version"], state["meta"], state["rows"]
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable snapshot {path}: {e}")
+            return None
+        if version != FORMAT_VERSION:
+            logger.warning(f"Ignoring snapshot {path} with format version {version}")
+            return None
+        if not _valid(meta, rows):
+            logger.warning(f"Ignoring malformed snapshot {path}")
+            return None
+        self._base[provider] = meta
+        try:
+            with open(self._meta_path(provider)) as f:
+                touched = json.load(f)
+            if isinstance(touched, dict) and touched.get("base") == meta and isinstance(touched.get("meta"), dict):
+                meta = touched["meta"]
+        except (OSError, ValueError):
+            pass
+        return meta, rows
+
+    def save(self, provider: str, meta: Dict[str, Any], rows: Dict[str, List[tuple]]) -> None:
+        path = self._path(provider)
+        tmp = f"{path}.tmp"
+        # level 1: most of the size win for a fraction of the time
+        body = json.dumps({"version": FORMAT_VERSION, "meta": meta, "rows": rows}, separators=(",", ":"))
+        with open(tmp, "wb") as f:
+            f.write(gzip.compress(body.encode(), compresslevel=1))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self._base[provider] = meta
+
+    def touch(self, provider: str, meta: Dict[str, Any]) -> None:
+        """Record new metadata for the rows already saved, without rewriting them"""
+        base = self._base.get(provider)
+        if base is None:
+            return
+        path = self._meta_path(provider)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"base": base, "meta": meta}, f)
+        os.replace(tmp, path)
@@ -0,0 +1,130 @@
+"""Token-bucket rate limiting shared by the weather and cloud pricing clients.
+
+TokenBucket holds the refill arithmetic and does no locking of its own.
+AsyncRateLimiter and ThreadSafeRateLimiter wrap it for coroutines and
+threads respectively; every acquire is O(1).
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Optional
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Bucket of up to `capacity` tokens refilled at `rate` tokens per second"""
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive and capacity at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+
+    def _refill(self) -> float:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return now
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available right now"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def time_until_token(self) -> float:
+        """Seconds until a whole token is available (0 if one is available now)"""
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def reserve(self) -> float:
+        """Take a token now, borrowing against future refills if needed.
+
+        Returns how long the caller must wait before using it. Successive
+        reservations queue up behind each other in call order.
+        """
+        self._refill()
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+def _default_burst(calls_per_minute: int) -> int:
+    # A tenth of the per-minute budget can go out at once
+    return max(1, calls_per_minute // 10)
+
+class AsyncRateLimiter:
+    """Rate limiter for coroutines sharing one event loop.
+
+    Callers that can't get a token immediately join a FIFO queue, and a
+    single drain task hands out permits as the bucket refills, so only one
+    timer is pending however many coroutines are waiting.
+    """
+    def __init__(self, calls_per_minute: int = 60, burst: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.calls_per_minute = calls_per_minute
+        self.burst = burst or _default_burst(calls_per_minute)
+        self.bucket = TokenBucket(calls_per_minute / 60, self.burst, clock)
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._drainer: Optional[asyncio.Task] = None
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self):
+        """Wait until a permit is granted"""
+        # Nobody is queued ahead of us, so taking a free token is fair
+        if not self._waiters and self.bucket.try_acquire():
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        if self._drainer is None or self._drainer.done():
+            self._drainer = asyncio.ensure_future(self._drain())
+        await future
+
+    # Name used by the original limiter
+    wait_if_needed = acquire
+
+    def try_acquire(self) -> bool:
+        """Take a permit only if one is free now and nobody is queued"""
+        return not self._waiters and self.bucket.try_acquire()
+
+    async def _drain(self):
+        while self._waiters:
+            head = self._waiters[0]
+            if head.done():
+                # Waiter was cancelled; it never consumed a token
+                self._waiters.popleft()
+                continue
+            wait_time = self.bucket.time_until_token()
+            if wait_time > 0:
+                logger.debug(f"Rate limit reached. {len(self._waiters)} waiting, next permit in {wait_time:.3f} seconds")
+                await asyncio.sleep(wait_time)
+                continue
+            if self.bucket.try_acquire():
+                self._waiters.popleft().set_result(None)
+
+class ThreadSafeRateLimiter:
+    """Rate limiter for threads; waiting happens outside the lock"""
+    def __init__(self, calls_per_minute: int = 60, burst: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.calls_per_minute = calls_per_minute
+        self.burst = burst or _default_burst(calls_per_minute)
+        self.bucket = TokenBucket(calls_per_minute / 60, self.burst, clock)
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a permit is granted"""
+        with self._lock:
+            wait_time = self.bucket.reserve()
+        if wait_time > 0:
+            logger.debug(f"Rate limit reached. Waiting for {wait_time:.2f} seconds")
+            time.sleep(wait_time)
+
+    # Name used by the original limiter
+    wait_if_needed = acquire
@@ -0,0 +1,60 @@
+"""Benchmark ColumnarWeatherAnalyzer against the per-object WeatherAnalyzer.
+
+Generates synthetic fleets, checks both analyzers return identical dicts,
+and reports the speedup.
+
+    python bench_analyzer.py --sites 10000 1000000
+"""
+import argparse
+import random
+import time
+
+from columnar import ColumnarWeatherAnalyzer, WeatherColumns
+from mock_server import CONDITIONS
+from weather import WeatherAnalyzer, WeatherData
+
+CONDITION_POOL = CONDITIONS + ["heavy intensity rain", "tornado", "hurricane", "light shower snow"]
+
+def synthetic_fleet(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [
+        WeatherData(
+            location=f"site-{i}",
+            temperature=round(rng.uniform(260.0, 318.0), 2),
+            humidity=rng.randint(5, 100),
+            wind_speed=round(rng.uniform(0.0, 25.0), 1),
+            conditions=rng.choice(CONDITION_POOL),
+            timestamp=1700000000 + i,
+        )
+        for i in range(n)
+    ]
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sites", type=int, nargs="+", default=[10000, 1000000])
+    args = parser.parse_args()
+
+    loop_analyzer = WeatherAnalyzer()
+    columnar = ColumnarWeatherAnalyzer()
+    for n in args.sites:
+        fleet = synthetic_fleet(n)
+        expected, loop_time = timed(lambda: (
+            loop_analyzer.identify_extreme_conditions(fleet),
+            loop_analyzer.calculate_cost_impacts(fleet),
+            loop_analyzer.generate_risk_assessment(fleet),
+        ))
+        cols, load_time = timed(lambda: WeatherColumns.from_readings(fleet))
+        actual, analyze_time = timed(lambda: columnar.analyze(cols))
+        assert actual == expected, "columnar output differs from WeatherAnalyzer"
+        print(f"{n:>9} sites  loops={loop_time * 1000:9.1f} ms  "
+              f"columnar={(load_time + analyze_time) * 1000:9.1f} ms "
+              f"(load {load_time * 1000:.1f} + analyze {analyze_time * 1000:.1f})  "
+              f"speedup={loop_time / (load_time + analyze_time):.1f}x")
+
+if __name__ == "__main__":
+    main()
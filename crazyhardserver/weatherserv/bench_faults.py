@@ -0,0 +1,102 @@
+"""Check WeatherClient's retry policy against a fault-injecting mock server.
+
+1. Tail latency: 2% of responses stall. Compares a fleet refresh with and
+   without hedged requests.
+2. Outage: every response is a 503. The circuit breaker should open after a
+   few failures, later calls fail fast, and cached readings are served.
+
+    python bench_faults.py --sites 500
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+import urllib.request
+
+import mock_server
+from cache import TTLCache
+from resilience import RetryPolicy
+from weather import AiohttpTransport, RateLimiter, WeatherClient
+
+def set_faults(port: int, **faults):
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}{mock_server.FAULTS_PATH}",
+        data=json.dumps(faults).encode(), headers={"Content-Type": "application/json"},
+    )
+    urllib.request.urlopen(request).read()
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+async def refresh(client: WeatherClient, sites: int):
+    latencies = []
+
+    async def one(i: int):
+        start = time.perf_counter()
+        result = await client.get_weather(round(i * 0.01, 2), 10.0, f"site-{i}")
+        latencies.append(time.perf_counter() - start)
+        return result
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(sites)))
+    return time.perf_counter() - start, latencies, sum(r is not None for r in results)
+
+def make_client(url: str, sites: int, policy: RetryPolicy, ttl: float = 600) -> WeatherClient:
+    limiter = RateLimiter(calls_per_minute=600 * sites, burst=2 * sites)
+    # Enough pooled connections that requests don't queue behind each other;
+    # queueing delay would otherwise look like upstream slowness to the hedger
+    transport = AiohttpTransport(limit_per_host=2 * sites)
+    return WeatherClient("bench", url, transport=transport, rate_limiter=limiter, retry_policy=policy,
+                         cache=TTLCache(max_entries=2 * sites, ttl=ttl))
+
+async def tail_latency(url: str, sites: int, hedge: bool):
+    policy = RetryPolicy(hedge=hedge, attempt_timeout=5, deadline=10)
+    async with make_client(url, sites, policy) as client:
+        # Warm-up pass on other coordinates so the p95 estimate exists
+        await asyncio.gather(*(client.get_weather(-1.0 - i * 0.01, 0.0, "warm") for i in range(sites)))
+        elapsed, latencies, ok = await refresh(client, sites)
+    print(f"hedge={'on ' if hedge else 'off'}  ok={ok}/{sites}  fleet refresh={elapsed:.2f}s  "
+          f"p50={percentile(latencies, 50) * 1000:.0f} ms  p99={percentile(latencies, 99) * 1000:.0f} ms  "
+          f"hedges={client.stats['hedges']} won={client.stats['hedge_wins']}")
+
+async def outage(url: str, port: int, sites: int):
+    policy = RetryPolicy(hedge=False, backoff_initial=0.1, deadline=5, breaker_failure_threshold=5)
+    async with make_client(url, sites, policy, ttl=0.5) as client:
+        _, _, ok = await refresh(client, sites)
+        print(f"healthy refresh: ok={ok}/{sites}")
+        set_faults(port, error_rate=1.0)
+        await asyncio.sleep(0.6)  # let every cached reading expire
+        elapsed, latencies, ok = await refresh(client, sites)
+        print(f"outage refresh:  served={ok}/{sites} in {elapsed:.2f}s  p99={percentile(latencies, 99) * 1000:.0f} ms  "
+              f"breaker={client.breaker.state}  rejected={client.stats['circuit_rejections']}  "
+              f"stale fallbacks={client.stats['stale_fallbacks']}")
+        set_faults(port, error_rate=0.0)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sites", type=int, default=500)
+    parser.add_argument("--slow-rate", type=float, default=0.02)
+    parser.add_argument("--slow-ms", type=float, default=3000)
+    args = parser.parse_args()
+
+    logging.getLogger("weather").setLevel(logging.CRITICAL)
+    logging.getLogger("resilience").setLevel(logging.CRITICAL)
+    port = mock_server.free_port()
+    server = mock_server.spawn(port, ["--latency-ms", "10", "--slow-rate", str(args.slow_rate),
+                                      "--slow-ms", str(args.slow_ms)])
+    url = f"http://127.0.0.1:{port}{mock_server.WEATHER_PATH}"
+    try:
+        print(f"Tail latency: {args.slow_rate:.0%} of responses take {args.slow_ms:.0f} ms")
+        asyncio.run(tail_latency(url, args.sites, hedge=False))
+        asyncio.run(tail_latency(url, args.sites, hedge=True))
+        set_faults(port, slow_rate=0.0)
+        print("Outage: upstream returns 503 for everything")
+        asyncio.run(outage(url, port, args.sites))
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
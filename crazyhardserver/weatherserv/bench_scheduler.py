@@ -0,0 +1,88 @@
+"""Check PollingScheduler against the mock server.
+
+Sites are paired up at the same coordinates, so half the refreshes are
+answered by a cache entry the other site of the pair fetched. Every site
+must still get its own deltas and its own history, and the scheduler
+gauges must drop schedulers once they are gone.
+
+    python bench_scheduler.py --pairs 50 --seconds 3
+"""
+import argparse
+import asyncio
+import gc
+import logging
+import tempfile
+import time
+
+import mock_server
+from cache import TTLCache
+from history import HistoryStore
+from scheduler import PollingScheduler, Site
+from weather import METRICS, AiohttpTransport, RateLimiter, WeatherClient
+
+async def poll(url: str, pairs: int, seconds: float, root: str):
+    sites = []
+    for i in range(pairs):
+        lat, lon = round(i * 0.01, 2), 10.0
+        sites += [Site(f"site-{i}a", lat, lon, interval=0.5), Site(f"site-{i}b", lat, lon, interval=0.5)]
+    deltas = []
+    history = HistoryStore(root)
+    limiter = RateLimiter(calls_per_minute=600 * len(sites), burst=2 * len(sites))
+    # Long TTL: the second site of each pair is always served the first one's reading
+    async with WeatherClient("bench", url, transport=AiohttpTransport(), rate_limiter=limiter,
+                             cache=TTLCache(max_entries=2 * len(sites), ttl=600)) as client:
+        scheduler = PollingScheduler(client, sites, on_delta=deltas.append, history=history)
+        stop = asyncio.Event()
+        asyncio.get_running_loop().call_later(seconds, stop.set)
+        start = time.perf_counter()
+        await scheduler.run(stop)
+        elapsed = time.perf_counter() - start
+    stats = dict(scheduler.stats)
+    gauge = METRICS.snapshot().get("weather_scheduler_refreshes")
+    print(f"{len(sites)} sites in {pairs} shared locations, {elapsed:.1f}s: {stats}")
+    return sites, deltas, history, stats, gauge, scheduler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    logging.getLogger("weather").setLevel(logging.CRITICAL)
+    port = mock_server.free_port()
+    server = mock_server.spawn(port, ["--latency-ms", "5"])
+    url = f"http://127.0.0.1:{port}{mock_server.WEATHER_PATH}"
+    failures = []
+    try:
+        with tempfile.TemporaryDirectory() as root:
+            sites, deltas, history, stats, gauge, scheduler = asyncio.run(poll(url, args.pairs, args.seconds, root))
+            names = {site.name for site in sites}
+            first_delta = {}
+            for delta in deltas:
+                if delta.reading.location != delta.location:
+                    failures.append(f"delta for {delta.location} carries a reading for {delta.reading.location}")
+                first_delta.setdefault(delta.location, delta)
+            missing = names - set(first_delta)
+            if missing:
+                failures.append(f"{len(missing)} sites never got a delta, e.g. {sorted(missing)[:3]}")
+            if set(history.sites()) != names:
+                failures.append(f"history has {len(history.sites())} sites, expected {len(names)}")
+            if gauge != stats["refreshes"]:
+                failures.append(f"weather_scheduler_refreshes gauge is {gauge}, scheduler counted {stats['refreshes']}")
+            del scheduler
+            gc.collect()
+            after = METRICS.snapshot().get("weather_scheduler_refreshes")
+            if after != 0:
+                failures.append(f"weather_scheduler_refreshes gauge still reads {after} with no scheduler alive")
+            print(f"deltas: {len(deltas)} for {len(first_delta)}/{len(names)} sites, "
+                  f"history sites: {len(history.sites())}, gauge after release: {after}")
+    finally:
+        server.terminate()
+        server.wait()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
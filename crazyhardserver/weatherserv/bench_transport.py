@@ -0,0 +1,71 @@
+"""Compare the pooled aiohttp transport against the to_thread + requests path.
+
+Spawns mock_server.py locally and fires N weather requests concurrently
+through each transport, reporting requests per second and p50/p99 latency.
+
+    python bench_transport.py --requests 2000 --latency-ms 20
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import List
+
+import mock_server
+from weather import AiohttpTransport, RateLimiter, ThreadedTransport, WeatherClient
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+async def run(transport, url: str, n: int) -> dict:
+    latencies = []
+    # Rate limiting is not what we're measuring here
+    limiter = RateLimiter(calls_per_minute=60 * n, burst=n)
+
+    async def one(i: int, client: WeatherClient):
+        start = time.perf_counter()
+        result = await client.get_weather(i * 0.001, -i * 0.001, f"site-{i}")
+        latencies.append(time.perf_counter() - start)
+        return result is not None
+
+    async with WeatherClient("bench", url, transport=transport, rate_limiter=limiter) as client:
+        start = time.perf_counter()
+        ok = await asyncio.gather(*(one(i, client) for i in range(n)))
+        elapsed = time.perf_counter() - start
+    return {
+        "ok": sum(ok),
+        "rps": n / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--limit-per-host", type=int, default=100)
+    args = parser.parse_args()
+
+    logging.getLogger("weather").setLevel(logging.WARNING)
+    port = mock_server.free_port()
+    server = mock_server.spawn(port, ["--latency-ms", str(args.latency_ms)])
+    url = f"http://127.0.0.1:{port}{mock_server.WEATHER_PATH}"
+    try:
+        transports = [
+            ("to_thread + requests", ThreadedTransport()),
+            (f"aiohttp pooled (limit_per_host={args.limit_per_host})",
+             AiohttpTransport(limit_per_host=args.limit_per_host)),
+        ]
+        print(f"{args.requests} requests, {args.latency_ms:.0f} ms server latency")
+        for name, transport in transports:
+            r = asyncio.run(run(transport, url, args.requests))
+            print(f"{name:<40} ok={r['ok']:<6} {r['rps']:>8.0f} req/s  "
+                  f"p50={r['p50_ms']:.1f} ms  p99={r['p99_ms']:.1f} ms")
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
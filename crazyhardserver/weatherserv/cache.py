@@ -0,0 +1,153 @@
+"""Bounded TTL/LRU cache with single-flight fetches for WeatherClient.
+
+Concurrent misses for the same key share one pending fetch. With
+stale_while_revalidate, an expired entry is returned immediately while a
+single background refresh replaces it. An optional persistent store (see
+disk_store.py) is consulted on a memory miss and written after each fetch.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+    store_loads: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        return (self.hits + self.stale_hits) / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "hit_ratio": round(self.hit_ratio, 4)}
+
+class TTLCache:
+    """LRU cache of at most max_entries values, each fresh for ttl seconds.
+
+    Expired entries stay until evicted so the last known value can still be
+    read with peek(); they are never returned as fresh by get().
+    """
+    def __init__(self, max_entries: int = 10000, ttl: float = 600,
+                 stale_while_revalidate: bool = False,
+                 store: Optional[Any] = None,
+                 clock: Callable[[], float] = time.time):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        # Second tier with get(key) -> (value, stored_at) and set(key, value, stored_at)
+        self.store = store
+        self.clock = clock
+        self.stats = CacheStats()
+        # key -> (value, stored_at); ordered oldest-used first
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def _is_fresh(self, stored_at: float) -> bool:
+        return self.clock() - stored_at < self.ttl
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a fresh value without touching the stats, or None"""
+        entry = self._entries.get(key)
+        if entry is None or not self._is_fresh(entry[1]):
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def peek(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Return (value, stored_at) regardless of age, without changing LRU order"""
+        return self._entries.get(key)
+
+    def set(self, key: Hashable, value: Any, stored_at: Optional[float] = None):
+        self._entries[key] = (value, self.clock() if stored_at is None else stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Optional[Any]]]) -> Optional[Any]:
+        """Return the cached value for key, calling fetch() at most once per key at a time.
+
+        A None result from fetch() is returned but not cached.
+        """
+        entry = self._entries.get(key)
+        if entry is None and self.store is not None and key not in self._inflight:
+            entry = self._load_from_store(key)
+        if entry is not None:
+            if self._is_fresh(entry[1]):
+                self.stats.hits += 1
+                self._entries.move_to_end(key)
+                logger.debug(f"Cache hit for {key}")
+                return entry[0]
+            if self.stale_while_revalidate:
+                self.stats.stale_hits += 1
+                self._entries.move_to_end(key)
+                if key not in self._inflight:
+                    self._start_fetch(key, fetch).add_done_callback(self._log_refresh_failure)
+                return entry[0]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats.coalesced += 1
+        else:
+            self.stats.misses += 1
+            task = self._start_fetch(key, fetch)
+        # Shield so one cancelled caller doesn't cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    def _load_from_store(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        try:
+            stored = self.store.get(key)
+        except Exception as e:
+            logger.error(f"Persistent cache read failed for {key}: {e}")
+            return None
+        if stored is None:
+            return None
+        self.stats.store_loads += 1
+        # Keep the original stored_at so freshness carries over from the last run
+        self.set(key, stored[0], stored_at=stored[1])
+        return self._entries[key]
+
+    def _start_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Optional[Any]]]) -> asyncio.Task:
+        task = asyncio.ensure_future(self._fetch_and_store(key, fetch))
+        self._inflight[key] = task
+        return task
+
+    @staticmethod
+    def _log_refresh_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Background refresh failed: {task.exception()}")
+
+    async def _fetch_and_store(self, key: Hashable, fetch: Callable[[], Awaitable[Optional[Any]]]) -> Optional[Any]:
+        try:
+            value = await fetch()
+            if value is not None:
+                self.set(key, value)
+                if self.store is not None:
+                    try:
+                        self.store.set(key, value, self._entries[key][1])
+                    except Exception as e:
+                        logger.error(f"Persistent cache write failed for {key}: {e}")
+            return value
+        finally:
+            self._inflight.pop(key, None)
@@ -0,0 +1,180 @@
+"""Vectorized WeatherAnalyzer for fleets of thousands of sites.
+
+Readings are loaded once into NumPy columns; every rule in WeatherAnalyzer
+becomes a small integer category per site (temperature band, humidity
+band, wind band, condition class). The category combination indexes a
+precomputed table of issue lists / assessment strings, so the output dicts
+are identical to the per-object loops in weather.py.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+# Condition classes, derived once per distinct description
+COND_NONE, COND_PRECIP, COND_STORM, COND_CATASTROPHIC = 0, 1, 2, 3
+
+def classify_condition(description: str) -> int:
+    condition_lower = description.lower()
+    if any(term in condition_lower for term in ["hurricane", "tornado"]):
+        return COND_CATASTROPHIC
+    if any(term in condition_lower for term in ["storm", "thunder"]):
+        return COND_STORM
+    if any(term in condition_lower for term in ["rain", "shower", "drizzle"]):
+        return COND_PRECIP
+    return COND_NONE
+
+@dataclass
+class WeatherColumns:
+    locations: List[str]
+    temperature_c: np.ndarray   # float64
+    humidity: np.ndarray        # float64
+    wind_speed: np.ndarray      # float64
+    condition_code: np.ndarray  # int8, one of the COND_* classes
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    @classmethod
+    def from_readings(cls, weather_data_list: Sequence) -> "WeatherColumns":
+        """Build columns from WeatherData objects in a single pass"""
+        n = len(weather_data_list)
+        locations = [None] * n
+        raw = np.empty((n, 3), dtype=np.float64)
+        codes = np.empty(n, dtype=np.int8)
+        code_of: Dict[str, int] = {}
+        for i, weather in enumerate(weather_data_list):
+            locations[i] = weather.location
+            raw[i] = (weather.temperature, weather.humidity, weather.wind_speed)
+            code = code_of.get(weather.conditions)
+            if code is None:
+                code = code_of[weather.conditions] = classify_condition(weather.conditions)
+            codes[i] = code
+        return cls(locations, raw[:, 0] - 273.15, raw[:, 1].copy(), raw[:, 2].copy(), codes)
+
+    @classmethod
+    def from_arrays(cls, locations: List[str], temperature_k: np.ndarray, humidity: np.ndarray,
+                    wind_speed: np.ndarray, conditions: Iterable[str]) -> "WeatherColumns":
+        """Build columns from raw arrays (temperature in Kelvin, as in WeatherData)"""
+        conditions = np.asarray(list(conditions) if not isinstance(conditions, np.ndarray) else conditions)
+        unique, inverse = np.unique(conditions, return_inverse=True)
+        lookup = np.array([classify_condition(str(c)) for c in unique], dtype=np.int8)
+        return cls(list(locations), np.asarray(temperature_k, dtype=np.float64) - 273.15,
+                   np.asarray(humidity, dtype=np.float64), np.asarray(wind_speed, dtype=np.float64),
+                   lookup[inverse])
+
+# identify_extreme_conditions tables
+_EXTREME_TEMP = ([], ["Extreme heat"], ["Extreme cold"])
+_EXTREME_HUMIDITY = ([], ["High humidity"], ["Low humidity"])
+_EXTREME_WIND = ([], ["High winds"])
+_EXTREME_COND = {COND_NONE: [], COND_PRECIP: ["Precipitation"],
+                 COND_STORM: ["Severe weather"], COND_CATASTROPHIC: ["Severe weather"]}
+
+def _build_extreme_table() -> List[List[str]]:
+    table = []
+    for t in range(3):
+        for h in range(3):
+            for w in range(2):
+                for c in range(4):
+                    table.append(_EXTREME_TEMP[t] + _EXTREME_HUMIDITY[h] + _EXTREME_WIND[w] + _EXTREME_COND[c])
+    return table
+
+# generate_risk_assessment tables. WeatherAnalyzer escalates with max() on
+# the level strings, so the table replays exactly that comparison.
+_LEVELS = ["Low", "Medium", "High", "Critical"]
+_RISK_TEMP = ((None, None), ("Critical", "Extreme heat may cause equipment failure"),
+              ("High", "High heat increases cooling system strain"),
+              ("High", "Extreme cold may affect facility operations"))
+_RISK_COND = ((None, None), ("Medium", "Precipitation increases humidity concerns"),
+              ("High", "Storms may cause power disruptions"),
+              ("Critical", "Severe weather threatens physical infrastructure"))
+_RISK_WIND = ((None, None), ("Medium", "Moderate winds may affect cooling efficiency"),
+              ("High", "High winds may damage cooling infrastructure"))
+
+def _build_risk_table() -> List[str]:
+    table = []
+    for t in range(4):
+        for c in range(4):
+            for w in range(3):
+                risk_level, risk_factors = "Low", []
+                for level, factor, overrides in ((*_RISK_TEMP[t], t == 1), (*_RISK_COND[c], c == 3),
+                                                 (*_RISK_WIND[w], False)):
+                    if level is None:
+                        continue
+                    risk_level = level if overrides else max(risk_level, level)
+                    risk_factors.append(factor)
+                if risk_factors:
+                    table.append(f"{risk_level} risk - {'; '.join(risk_factors)}")
+                else:
+                    table.append("Low risk - Normal operating conditions")
+    return table
+
+_EXTREME_TABLE = _build_extreme_table()
+_RISK_TABLE = np.array(_build_risk_table(), dtype=object)
+_COOLING_FACTORS = np.array([0.5, 1.0, 1.5, 2.0, 3.0])
+_COOLING_BOUNDS = np.array([20.0, 25.0, 30.0, 35.0])
+
+def _round2(values: np.ndarray) -> np.ndarray:
+    """Round to 2 decimals exactly like Python's round(x, 2).
+
+    np.round scales by 100 first, which can pick the wrong side of a tie;
+    values whose scaled fraction is near .5 are redone with round().
+    """
+    scaled = values * 100
+    rounded = np.rint(scaled) / 100
+    frac = scaled - np.floor(scaled)
+    ambiguous = np.flatnonzero(np.abs(frac - 0.5) < 1e-6)
+    for i in ambiguous.tolist():
+        rounded[i] = round(float(values[i]), 2)
+    return rounded
+
+class ColumnarWeatherAnalyzer:
+    """WeatherAnalyzer with the same outputs, computed from NumPy columns"""
+
+    def analyze(self, readings) -> Tuple[Dict[str, List[str]], Dict[str, float], Dict[str, str]]:
+        """Return (extreme_conditions, cost_impacts, risk_assessment) in one pipeline.
+
+        `readings` is a list of WeatherData or a prebuilt WeatherColumns.
+        """
+        cols = self._columns(readings)
+        return self._extreme(cols), self._costs(cols), self._risk(cols)
+
+    def identify_extreme_conditions(self, readings) -> Dict[str, List[str]]:
+        return self._extreme(self._columns(readings))
+
+    def calculate_cost_impacts(self, readings) -> Dict[str, float]:
+        return self._costs(self._columns(readings))
+
+    def generate_risk_assessment(self, readings) -> Dict[str, str]:
+        return self._risk(self._columns(readings))
+
+    @staticmethod
+    def _columns(readings) -> WeatherColumns:
+        return readings if isinstance(readings, WeatherColumns) else WeatherColumns.from_readings(readings)
+
+    def _extreme(self, cols: WeatherColumns) -> Dict[str, List[str]]:
+        t, h = cols.temperature_c, cols.humidity
+        temp_band = np.where(t > 35, 1, np.where(t < 0, 2, 0))
+        humidity_band = np.where(h > 80, 1, np.where(h < 20, 2, 0))
+        wind_band = (cols.wind_speed > 10).astype(np.int64)
+        combo = ((temp_band * 3 + humidity_band) * 2 + wind_band) * 4 + cols.condition_code
+        flagged = np.flatnonzero(combo != 0)
+        locations = map(cols.locations.__getitem__, flagged.tolist())
+        # Fresh lists per site, as the loop version returns
+        issues = map(list, map(_EXTREME_TABLE.__getitem__, combo[flagged].tolist()))
+        return dict(zip(locations, issues))
+
+    def _costs(self, cols: WeatherColumns) -> Dict[str, float]:
+        cost_factor = _COOLING_FACTORS[np.searchsorted(_COOLING_BOUNDS, cols.temperature_c, side="left")]
+        h = cols.humidity
+        cost_factor = np.where(h > 60, cost_factor * (1 + ((h - 60) / 100)), cost_factor)
+        cost_factor = np.where(cols.condition_code >= COND_STORM, cost_factor * 1.5, cost_factor)
+        daily_impact = cost_factor * 100
+        return dict(zip(cols.locations, _round2(daily_impact).tolist()))
+
+    def _risk(self, cols: WeatherColumns) -> Dict[str, str]:
+        t, w = cols.temperature_c, cols.wind_speed
+        temp_band = np.select([t > 40, t > 35, t < -5], [1, 2, 3], 0)
+        wind_band = np.select([w > 20, w > 10], [2, 1], 0)
+        combo = (temp_band * 4 + cols.condition_code) * 3 + wind_band
+        return dict(zip(cols.locations, _RISK_TABLE[combo].tolist()))
@@ -0,0 +1,72 @@
+"""SQLite-backed key/value tier that sits behind TTLCache.
+
+Each put is its own transaction in WAL mode, so a crash mid-write leaves
+either the old row or the new one, never a torn file. Nothing is read at
+open time; lookups go through the primary-key index on demand, so startup
+cost doesn't grow with the number of cached coordinates.
+"""
+import json
+import logging
+import sqlite3
+import time
+from typing import Any, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class SQLiteStore:
+    """Persistent map of key -> (encoded value, stored_at)"""
+    def __init__(self, path: str,
+                 encode: Callable[[Any], str] = json.dumps,
+                 decode: Callable[[str], Any] = json.loads,
+                 mmap_size: int = 64 * 1024 * 1024):
+        self.path = path
+        self.encode = encode
+        self.decode = decode
+        self._conn = sqlite3.connect(path, isolation_level=None)  # autocommit; one txn per statement
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL in WAL mode can lose the last commits on power loss but never corrupts
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, stored_at) for key, or None"""
+        row = self._conn.execute(
+            "SELECT value, stored_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            return self.decode(row[0]), row[1]
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Dropping undecodable cache row {key}: {e}")
+            self.delete(key)
+            return None
+
+    def set(self, key: str, value: Any, stored_at: Optional[float] = None):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, stored_at) VALUES (?, ?, ?)",
+            (key, self.encode(value), time.time() if stored_at is None else stored_at),
+        )
+
+    def delete(self, key: str):
+        self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def prune(self, max_age: float) -> int:
+        """Delete rows older than max_age seconds; returns how many were removed"""
+        cursor = self._conn.execute(
+            "DELETE FROM entries WHERE stored_at < ?", (time.time() - max_age,)
+        )
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
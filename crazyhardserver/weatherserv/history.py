@@ -0,0 +1,221 @@
+"""Append-only, column-oriented history of WeatherData readings.
+
+Layout under the store's root directory:
+
+    sites.json          site name -> directory id
+    conditions.json     interned condition descriptions (code = list index)
+    <id>/ts.i64 temp.f32 humidity.f32 wind.f32 cond.u16
+
+Each site has its own fixed-width column files, so a reading costs 22
+bytes on disk (measurements as float32) and reading one site's history maps only that site's files
+(read-only mmap). Timestamps are kept in order per site, which makes range
+queries a binary search. A crash mid-append can leave columns of unequal
+length; they are truncated to the shortest on open.
+"""
+import json
+import logging
+import os
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = {
+    "ts": np.dtype("<i8"),
+    "temp": np.dtype("<f4"),
+    "humidity": np.dtype("<f4"),
+    "wind": np.dtype("<f4"),
+    "cond": np.dtype("<u2"),
+}
+
+def _write_json_atomic(path: str, payload) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class SiteHistory:
+    """Read-only view of one site's readings in [start, end]"""
+    def __init__(self, location: str, columns: Dict[str, np.ndarray], conditions: List[str]):
+        self.location = location
+        self.timestamps = columns["ts"]
+        self.temperature = columns["temp"]   # Kelvin, like WeatherData
+        self.humidity = columns["humidity"]
+        self.wind_speed = columns["wind"]
+        self.condition_codes = columns["cond"]
+        self._conditions = conditions
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def readings(self, factory: Callable) -> Iterator:
+        """Yield factory(location, temperature, humidity, wind_speed, conditions, timestamp) lazily;
+        pass WeatherData to get WeatherData objects back"""
+        for ts, temp, humidity, wind, code in zip(self.timestamps.tolist(), self.temperature.tolist(),
+                                                  self.humidity.tolist(), self.wind_speed.tolist(),
+                                                  self.condition_codes.tolist()):
+            yield factory(self.location, temp, humidity, wind, self._conditions[code], ts)
+
+    def aggregate(self) -> Dict[str, Optional[float]]:
+        """Mean temperature (Celsius) and max wind over the whole view"""
+        if not len(self):
+            return {"count": 0, "mean_temperature_c": None, "max_wind_speed": None}
+        return {
+            "count": len(self),
+            "mean_temperature_c": float(self.temperature.astype(np.float64).mean() - 273.15),
+            "max_wind_speed": float(self.wind_speed.max()),
+        }
+
+    def rolling(self, window: float) -> Dict[str, np.ndarray]:
+        """Trailing-window aggregates at each reading: mean temperature (C) and max wind.
+
+        The window covers readings with timestamp in (ts - window, ts].
+        """
+        ts = self.timestamps
+        starts = np.searchsorted(ts, ts - window, side="right")
+        # Prefix sums give every window mean in O(n)
+        prefix = np.concatenate(([0.0], np.cumsum(self.temperature.astype(np.float64))))
+        counts = np.arange(1, len(ts) + 1) - starts
+        mean_temp = (prefix[1:] - prefix[starts]) / counts - 273.15
+
+        # Monotonic deque keeps the window max in amortized O(1) per reading
+        wind = self.wind_speed.tolist()
+        max_wind = np.empty(len(ts), dtype=np.float64)
+        candidates: deque = deque()
+        for i, start in enumerate(starts.tolist()):
+            while candidates and wind[candidates[-1]] <= wind[i]:
+                candidates.pop()
+            candidates.append(i)
+            while candidates[0] < start:
+                candidates.popleft()
+            max_wind[i] = wind[candidates[0]]
+        return {"timestamp": np.asarray(ts), "mean_temperature_c": mean_temp, "max_wind_speed": max_wind}
+
+class HistoryStore:
+    """Append readings per site and query them back by time range"""
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._sites_path = os.path.join(root, "sites.json")
+        self._conditions_path = os.path.join(root, "conditions.json")
+        self._sites: Dict[str, str] = self._load_json(self._sites_path, {})
+        self._conditions: List[str] = self._load_json(self._conditions_path, [])
+        self._condition_codes = {c: i for i, c in enumerate(self._conditions)}
+        self._last_ts: Dict[str, int] = {}
+        self._repaired: set = set()
+
+    @staticmethod
+    def _load_json(path: str, default):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return default
+
+    def sites(self) -> List[str]:
+        return list(self._sites)
+
+    def _site_dir(self, location: str) -> Optional[str]:
+        site_id = self._sites.get(location)
+        return None if site_id is None else os.path.join(self.root, site_id)
+
+    def _register(self, locations: Iterable[str], descriptions: Iterable[str]) -> None:
+        """Give new sites and conditions ids, writing each index at most once per batch.
+
+        Runs before any column data is written, so a crash never leaves
+        columns under an id the index does not know about.
+        """
+        new_sites = [loc for loc in dict.fromkeys(locations) if loc not in self._sites]
+        for location in new_sites:
+            site_id = self._sites[location] = str(len(self._sites))
+            os.makedirs(os.path.join(self.root, site_id), exist_ok=True)
+        if new_sites:
+            _write_json_atomic(self._sites_path, self._sites)
+        new_conditions = [c for c in dict.fromkeys(descriptions) if c not in self._condition_codes]
+        for description in new_conditions:
+            self._condition_codes[description] = len(self._conditions)
+            self._conditions.append(description)
+        if new_conditions:
+            _write_json_atomic(self._conditions_path, self._conditions)
+
+    def _rows(self, site_dir: str) -> int:
+        """Row count, after truncating any column left longer by an interrupted append"""
+        sizes = {}
+        for name, dtype in COLUMNS.items():
+            path = self._column_path(site_dir, name)
+            sizes[path] = (os.path.getsize(path) if os.path.exists(path) else 0, dtype.itemsize)
+        rows = min(size // itemsize for size, itemsize in sizes.values())
+        if site_dir not in self._repaired:
+            for path, (size, itemsize) in sizes.items():
+                if size != rows * itemsize:
+                    logger.warning(f"Truncating partial write in {path}")
+                    with open(path, "r+b") as f:
+                        f.truncate(rows * itemsize)
+            self._repaired.add(site_dir)
+        return rows
+
+    def _column_path(self, site_dir: str, name: str) -> str:
+        dtype = COLUMNS[name]
+        return os.path.join(site_dir, f"{name}.{dtype.kind}{dtype.itemsize * 8}")
+
+    def _last_timestamp(self, location: str, site_dir: str) -> Optional[int]:
+        if location not in self._last_ts:
+            rows = self._rows(site_dir)
+            if not rows:
+                return None
+            ts = np.memmap(self._column_path(site_dir, "ts"), dtype=COLUMNS["ts"], mode="r")
+            self._last_ts[location] = int(ts[rows - 1])
+        return self._last_ts[location]
+
+    def append(self, readings: Iterable) -> int:
+        """Append WeatherData readings; returns how many were stored.
+
+        Repeats of a site's latest timestamp (e.g. cached readings) and
+        out-of-order readings are skipped so each site stays sorted.
+        """
+        by_site: Dict[str, List] = {}
+        for weather in readings:
+            by_site.setdefault(weather.location, []).append(weather)
+        self._register(by_site, (w.conditions for site in by_site.values() for w in site))
+        codes = self._condition_codes
+        stored = 0
+        for location, site_readings in by_site.items():
+            site_dir = self._site_dir(location)
+            last = self._last_timestamp(location, site_dir)
+            rows = []
+            for weather in site_readings:
+                if last is not None and weather.timestamp <= last:
+                    continue
+                rows.append((weather.timestamp, weather.temperature, weather.humidity,
+                             weather.wind_speed, codes[weather.conditions]))
+                last = weather.timestamp
+            if not rows:
+                continue
+            self._rows(site_dir)  # repair before appending
+            for index, name in enumerate(COLUMNS):
+                column = np.array([row[index] for row in rows], dtype=COLUMNS[name])
+                with open(self._column_path(site_dir, name), "ab") as f:
+                    f.write(column.tobytes())
+            self._last_ts[location] = last
+            stored += len(rows)
+        return stored
+
+    def query(self, location: str, start: Optional[int] = None, end: Optional[int] = None) -> SiteHistory:
+        """Readings for one site with start <= timestamp <= end (either bound optional)"""
+        site_dir = self._site_dir(location)
+        rows = self._rows(site_dir) if site_dir else 0
+        if not rows:
+            empty = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+            return SiteHistory(location, empty, self._conditions)
+        columns = {
+            name: np.memmap(self._column_path(site_dir, name), dtype=dtype, mode="r", shape=(rows,))
+            for name, dtype in COLUMNS.items()
+        }
+        ts = columns["ts"]
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        hi = rows if end is None else int(np.searchsorted(ts, end, side="right"))
+        return SiteHistory(location, {name: col[lo:hi] for name, col in columns.items()}, self._conditions)
@@ -0,0 +1,129 @@
+"""Load-test WeatherClient + WeatherAnalyzer against the local mock server.
+
+Each fleet size runs in a fresh child process so peak RSS is per tier.
+The mock server injects latency, 429s, 5xx bursts and malformed payloads
+(see mock_server.py for the knobs).
+
+    python loadtest.py --sites 10 1000 100000 --latency-ms 20 --latency-dist lognormal
+"""
+import argparse
+import asyncio
+import json
+import logging
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+import mock_server
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+def synthetic_sites(n: int) -> List[Dict[str, Any]]:
+    # Unique coordinates spread over a lat/lon grid
+    return [{"name": f"dc-{i}", "lat": round(-80 + (i % 16000) * 0.01, 4),
+             "lon": round(-170 + (i // 16000) * 0.05, 4)} for i in range(n)]
+
+async def run_tier(url: str, n: int, connections: int, columnar: bool) -> Dict[str, Any]:
+    from columnar import ColumnarWeatherAnalyzer
+    from resilience import RetryPolicy
+    from weather import (FETCH_FAILURES, RATE_LIMITED, REQUESTS, RETRIES, AiohttpTransport,
+                         RateLimiter, WeatherAnalyzer, WeatherClient)
+
+    sites = synthetic_sites(n)
+    latencies: List[float] = []
+    policy = RetryPolicy(backoff_initial=0.05, max_retry_after=1.0, deadline=30.0)
+
+    async def timed_fetch(client: WeatherClient, site: Dict[str, Any]):
+        start = time.perf_counter()
+        result = await client.get_weather(site["lat"], site["lon"], site["name"])
+        latencies.append(time.perf_counter() - start)
+        return result
+
+    start = time.perf_counter()
+    async with WeatherClient("loadtest", url,
+                             transport=AiohttpTransport(limit_per_host=connections),
+                             rate_limiter=RateLimiter(calls_per_minute=60 * 10 ** 6, burst=10 ** 6),
+                             retry_policy=policy) as client:
+        readings = await asyncio.gather(*(timed_fetch(client, site) for site in sites))
+    fetch_seconds = time.perf_counter() - start
+
+    readings = [r for r in readings if r is not None]
+    analyze_start = time.perf_counter()
+    if columnar:
+        ColumnarWeatherAnalyzer().analyze(readings)
+    else:
+        analyzer = WeatherAnalyzer()
+        analyzer.identify_extreme_conditions(readings)
+        analyzer.calculate_cost_impacts(readings)
+        analyzer.generate_risk_assessment(readings)
+    analyze_seconds = time.perf_counter() - analyze_start
+    total = time.perf_counter() - start
+
+    return {
+        "sites": n,
+        "ok": len(readings),
+        "throughput": n / total,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "fetch_s": fetch_seconds,
+        "analyze_s": analyze_seconds,
+        "requests": REQUESTS.value(),
+        "retries": RETRIES.value(),
+        "rate_limited": RATE_LIMITED.value(),
+        "failures": FETCH_FAILURES.value(),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sites", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--connections", type=int, default=200, help="pooled connections to the mock server")
+    parser.add_argument("--columnar", action="store_true", help="use ColumnarWeatherAnalyzer")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--latency-dist", default="lognormal")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.01)
+    parser.add_argument("--burst-every", type=float, default=10.0)
+    parser.add_argument("--burst-duration", type=float, default=0.2)
+    parser.add_argument("--malformed-rate", type=float, default=0.001)
+    # Internal: run a single tier against an existing server and print JSON
+    parser.add_argument("--child-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.getLogger("weather").setLevel(logging.CRITICAL)
+    logging.getLogger("resilience").setLevel(logging.CRITICAL)
+    if args.child_url:
+        result = asyncio.run(run_tier(args.child_url, args.sites[0], args.connections, args.columnar))
+        print(json.dumps(result))
+        return
+
+    port = mock_server.free_port()
+    server = mock_server.spawn(port, [
+        "--latency-ms", str(args.latency_ms), "--latency-dist", args.latency_dist,
+        "--rate-limit-rate", str(args.rate_limit_rate), "--retry-after", "0",
+        "--burst-every", str(args.burst_every), "--burst-duration", str(args.burst_duration),
+        "--malformed-rate", str(args.malformed_rate),
+    ])
+    url = f"http://127.0.0.1:{port}{mock_server.WEATHER_PATH}"
+    print(f"{'sites':>8} {'ok':>8} {'sites/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'analyze s':>10} "
+          f"{'requests':>9} {'retries':>8} {'429s':>6} {'failed':>7} {'peak RSS MB':>12}")
+    try:
+        for n in args.sites:
+            cmd = [sys.executable, __file__, "--child-url", url, "--sites", str(n),
+                   "--connections", str(args.connections)] + (["--columnar"] if args.columnar else [])
+            r = json.loads(subprocess.run(cmd, check=True, capture_output=True, text=True).stdout.splitlines()[-1])
+            print(f"{r['sites']:>8} {r['ok']:>8} {r['throughput']:>9.0f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+                  f"{r['analyze_s']:>10.3f} {r['requests']:>9.0f} {r['retries']:>8.0f} {r['rate_limited']:>6.0f} "
+                  f"{r['failures']:>7.0f} {r['peak_rss_mb']:>12.1f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
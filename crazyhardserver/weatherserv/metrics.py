@@ -0,0 +1,185 @@
+"""Low-overhead metrics for the weather pipeline.
+
+Counters and fixed-bucket histograms cost a dict lookup and a bisect per
+update, so they can stay on in production. A registry renders them as
+Prometheus text or as a JSON-friendly snapshot. LogSampler caps how many
+per-fetch log lines are formatted each second.
+"""
+import json
+import logging
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; spans rate-limit waits and slow upstream responses
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _labels(label_name: Optional[str], label: Optional[str], extra: str = "") -> str:
+    parts = []
+    if label_name is not None and label is not None:
+        parts.append(f'{label_name}="{label}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_name: Optional[str] = None):
+        self.name = name
+        self.help = help_text
+        self.label_name = label_name
+        self.values: Dict[Optional[str], float] = {}
+
+    def inc(self, amount: float = 1, label: Optional[str] = None):
+        self.values[label] = self.values.get(label, 0) + amount
+
+    def value(self, label: Optional[str] = None) -> float:
+        return self.values.get(label, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label, value in self.values.items():
+            lines.append(f"{self.name}{_labels(self.label_name, label)} {value}")
+        return lines
+
+    def snapshot(self) -> Any:
+        return self.values.get(None, 0) if self.label_name is None else dict(self.values)
+
+class _Timer:
+    __slots__ = ("histogram", "label", "start")
+
+    def __init__(self, histogram: "Histogram", label: Optional[str]):
+        self.histogram = histogram
+        self.label = label
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, self.label)
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 label_name: Optional[str] = None):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.label_name = label_name
+        # label -> [per-bucket counts (last is +Inf), sum, count]
+        self.series: Dict[Optional[str], List[Any]] = {}
+
+    def observe(self, value: float, label: Optional[str] = None):
+        series = self.series.get(label)
+        if series is None:
+            series = self.series[label] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def time(self, label: Optional[str] = None) -> _Timer:
+        """Context manager that observes the elapsed wall time of its block"""
+        return _Timer(self, label)
+
+    def quantile(self, q: float, label: Optional[str] = None) -> float:
+        """Upper bound of the bucket holding the q-th quantile (inf if past the last bucket)"""
+        series = self.series.get(label)
+        if not series or not series[2]:
+            return 0.0
+        target, seen = q * series[2], 0
+        for bound, count in zip(self.buckets + (float("inf"),), series[0]):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label, (counts, total, count) in self.series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_name, label, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_name, label)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_name, label)} {count}")
+        return lines
+
+    def snapshot(self) -> Dict[str, Any]:
+        out = {}
+        for label, (counts, total, count) in self.series.items():
+            out[label if label is not None else "all"] = {
+                "count": count,
+                "sum": round(total, 6),
+                "p50": self.quantile(0.5, label),
+                "p99": self.quantile(0.99, label),
+                "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], counts)),
+            }
+        return out
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+    def counter(self, name: str, help_text: str, label_name: Optional[str] = None) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help_text, label_name))
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS,
+                  label_name: Optional[str] = None) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help_text, buckets, label_name))
+
+    def gauge(self, name: str, help_text: str, fn: Callable[[], float]):
+        """Register a gauge read from fn() at export time (replaces any previous one)"""
+        self._gauges[name] = (help_text, fn)
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for name, (help_text, fn) in self._gauges.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {fn()}"]
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        out = {name: metric.snapshot() for name, metric in self._metrics.items()}
+        out.update({name: fn() for name, (_, fn) in self._gauges.items()})
+        out["timestamp"] = time.time()
+        return out
+
+    def write(self, path: str):
+        """Write Prometheus text, or a JSON snapshot if path ends in .json"""
+        if path.endswith(".json"):
+            payload = json.dumps(self.snapshot(), indent=2)
+        else:
+            payload = self.to_prometheus()
+        with open(path, "w") as f:
+            f.write(payload)
+
+class LogSampler:
+    """Lets at most per_second messages through per second and reports the rest in bulk.
+
+    Check allow() before formatting the message so suppressed lines cost nothing.
+    """
+    def __init__(self, logger: logging.Logger, name: str, per_second: int = 5,
+                 clock: Callable[[], float] = time.monotonic):
+        self.logger = logger
+        self.name = name
+        self.per_second = per_second
+        self.clock = clock
+        self.suppressed = 0
+        self._window = 0
+        self._count = 0
+
+    def allow(self) -> bool:
+        window = int(self.clock())
+        if window != self._window:
+            if self.suppressed:
+                self.logger.info(f"{self.suppressed} {self.name} messages suppressed")
+                self.suppressed = 0
+            self._window = window
+            self._count = 0
+        self._count += 1
+        if self._count <= self.per_second:
+            return True
+        self.suppressed += 1
+        return False
@@ -0,0 +1,181 @@
+"""Local stand-in for the OpenWeatherMap current-weather endpoint.
+
+Run it directly for manual testing:
+
+    python mock_server.py --port 8081 --latency-ms 20 --latency-dist lognormal \
+        --rate-limit-rate 0.01 --burst-every 30 --burst-duration 2 --malformed-rate 0.001
+
+and point WeatherClient at http://127.0.0.1:8081/data/2.5/weather. Fault
+settings can be changed while it runs by POSTing JSON to /_faults, e.g.
+{"error_rate": 1.0} to simulate an outage.
+"""
+import argparse
+import asyncio
+import math
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+WEATHER_PATH = "/data/2.5/weather"
+FAULTS_PATH = "/_faults"
+
+DEFAULT_FAULTS = {
+    "latency": 0.0,          # mean seconds added to every response
+    "latency_dist": "fixed", # fixed | uniform (0..2x mean) | exponential | lognormal
+    "latency_sigma": 0.5,    # shape of the lognormal distribution
+    "slow_rate": 0.0,        # fraction of responses delayed by slow_latency instead
+    "slow_latency": 2.0,
+    "error_rate": 0.0,       # fraction answered with 503
+    "rate_limit_rate": 0.0,  # fraction answered with 429
+    "retry_after": 1,        # Retry-After header sent with 429s
+    "burst_every": 0.0,      # every N seconds (0 = never) ...
+    "burst_duration": 0.0,   # ... answer everything with 500 for this long
+    "malformed_rate": 0.0,   # fraction of 200s with a broken body
+}
+
+MALFORMED_BODIES = [
+    b'{"main": {"temp": 290.1, "humidity"',                       # truncated JSON
+    b'{"weather": [], "main": {"temp": 290.1, "humidity": 40}, "wind": {"speed": 1}, "dt": 0}',
+    b'{"weather": [{"description": "clear sky"}], "wind": {"speed": 1}, "dt": 0}',
+    b'{"weather": [{"description": "clear sky"}], "main": {"temp": "hot", "humidity": 40}, '
+    b'"wind": {"speed": 1}, "dt": 0}',
+    b'<html>502 Bad Gateway</html>',
+]
+
+CONDITIONS = [
+    "clear sky", "few clouds", "scattered clouds", "broken clouds", "overcast clouds",
+    "light rain", "shower rain", "drizzle", "thunderstorm", "snow", "mist",
+]
+
+def make_payload(lat: float, lon: float) -> Dict[str, Any]:
+    """Build a deterministic OpenWeatherMap-shaped payload for a coordinate"""
+    rng = random.Random(f"{lat:.4f}_{lon:.4f}")
+    return {
+        "coord": {"lat": lat, "lon": lon},
+        "weather": [{"description": rng.choice(CONDITIONS)}],
+        "main": {
+            "temp": round(rng.uniform(250.0, 318.0), 2),  # Kelvin
+            "humidity": rng.randint(5, 100),
+        },
+        "wind": {"speed": round(rng.uniform(0.0, 25.0), 1)},
+        "dt": int(time.time()),
+    }
+
+def sample_latency(faults: Dict[str, Any]) -> float:
+    mean = faults["latency"]
+    if not mean:
+        return 0.0
+    dist = faults["latency_dist"]
+    if dist == "uniform":
+        return random.uniform(0, 2 * mean)
+    if dist == "exponential":
+        return random.expovariate(1 / mean)
+    if dist == "lognormal":
+        sigma = faults["latency_sigma"]
+        # Pick mu so the distribution's mean is `mean`
+        return random.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+    return mean
+
+def in_burst(faults: Dict[str, Any]) -> bool:
+    every = faults["burst_every"]
+    return bool(every) and time.monotonic() % every < faults["burst_duration"]
+
+async def handle_weather(request: web.Request) -> web.Response:
+    faults = request.app["faults"]
+    latency = sample_latency(faults)
+    if faults["slow_rate"] and random.random() < faults["slow_rate"]:
+        latency = faults["slow_latency"]
+    if latency:
+        await asyncio.sleep(latency)
+    if in_burst(faults):
+        return web.json_response({"cod": "500", "message": "internal error"}, status=500)
+    if faults["error_rate"] and random.random() < faults["error_rate"]:
+        return web.json_response({"cod": "503", "message": "service unavailable"}, status=503)
+    if faults["rate_limit_rate"] and random.random() < faults["rate_limit_rate"]:
+        return web.json_response({"cod": 429, "message": "rate limited"}, status=429,
+                                 headers={"Retry-After": str(faults["retry_after"])})
+    try:
+        lat = float(request.query["lat"])
+        lon = float(request.query["lon"])
+    except (KeyError, ValueError):
+        return web.json_response({"cod": "400", "message": "wrong latitude"}, status=400)
+    if faults["malformed_rate"] and random.random() < faults["malformed_rate"]:
+        return web.Response(body=random.choice(MALFORMED_BODIES), content_type="application/json")
+    return web.json_response(make_payload(lat, lon))
+
+async def handle_faults(request: web.Request) -> web.Response:
+    """Update fault settings at runtime and return the current ones"""
+    if request.method == "POST":
+        updates = await request.json()
+        unknown = set(updates) - set(DEFAULT_FAULTS)
+        if unknown:
+            return web.json_response({"error": f"unknown settings: {sorted(unknown)}"}, status=400)
+        request.app["faults"].update(updates)
+    return web.json_response(request.app["faults"])
+
+def create_app(**faults: Any) -> web.Application:
+    """Create the mock application; see DEFAULT_FAULTS for settings (seconds / fractions)"""
+    app = web.Application()
+    app["faults"] = {**DEFAULT_FAULTS, **faults}
+    app.router.add_get(WEATHER_PATH, handle_weather)
+    app.router.add_get(FAULTS_PATH, handle_faults)
+    app.router.add_post(FAULTS_PATH, handle_faults)
+    return app
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def spawn(port: int, extra_args: Optional[List[str]] = None, startup_timeout: float = 10) -> subprocess.Popen:
+    """Start the mock server in a child process and wait until it accepts connections"""
+    cmd = [sys.executable, __file__, "--port", str(port)] + (extra_args or [])
+    proc = subprocess.Popen(cmd)
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.terminate()
+    raise RuntimeError(f"Mock server did not start on port {port}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenWeatherMap server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="mean added latency")
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "exponential", "lognormal"], default="fixed")
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-ms", type=float, default=2000.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--burst-every", type=float, default=0.0, help="seconds between 5xx bursts")
+    parser.add_argument("--burst-duration", type=float, default=0.0, help="seconds each 5xx burst lasts")
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    app = create_app(
+        latency=args.latency_ms / 1000,
+        latency_dist=args.latency_dist,
+        latency_sigma=args.latency_sigma,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_ms / 1000,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        burst_every=args.burst_every,
+        burst_duration=args.burst_duration,
+        malformed_rate=args.malformed_rate,
+    )
+    web.run_app(app, host=args.host, port=args.port, print=None, access_log=None)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Retry policy, latency tracking and circuit breaking for WeatherClient."""
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Optional
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 3
+    attempt_timeout: float = 10.0   # per HTTP attempt
+    deadline: float = 30.0          # total budget per get_weather call, including waits
+    backoff_initial: float = 1.0
+    backoff_multiplier: float = 2.0
+    backoff_max: float = 8.0
+    max_retry_after: float = 10.0   # cap on how long a Retry-After header can make us sleep
+    hedge: bool = True              # send a second request if the first is slower than the hedge percentile
+    hedge_percentile: float = 95.0
+    hedge_min_delay: float = 0.05
+    hedge_min_samples: int = 20
+    hedge_budget: float = 0.1       # hedges may add at most this fraction of extra requests
+    breaker_failure_threshold: int = 5   # consecutive failures that open the breaker
+    breaker_reset_timeout: float = 30.0  # seconds open before one probe is let through
+
+class LatencyTracker:
+    """Rolling window of recent request latencies"""
+    def __init__(self, window: int = 500):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._sorted: Optional[list] = None
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+        self._sorted = None
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> float:
+        if not self._samples:
+            return 0.0
+        if self._sorted is None:
+            self._sorted = sorted(self._samples)
+        idx = min(len(self._sorted) - 1, int(pct / 100 * len(self._sorted)))
+        return self._sorted[idx]
+
+class CircuitBreaker:
+    """Closed -> open after N consecutive failures -> half-open probe after a cool-off"""
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        """True while the upstream is considered unhealthy (open or half-open)"""
+        return self.state != self.CLOSED
+
+    def allow(self) -> bool:
+        """Whether a new request may go upstream"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if self.clock() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            logger.info("Circuit half-open; sending a probe request")
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def release(self):
+        """Give back a half-open probe slot without judging the upstream"""
+        self._probe_in_flight = False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("Circuit closed; upstream recovered")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit open after {self.failures} consecutive failures")
+            self.state = self.OPEN
+            self.opened_at = self.clock()
@@ -0,0 +1,209 @@
+"""Continuous polling mode for the weather pipeline.
+
+Each site is refreshed on its own interval (with jitter so refreshes
+spread out). WeatherAnalyzer rules are re-run only for sites whose reading
+changed, and only the resulting risk/cost/extreme deltas are emitted, so
+steady-state work tracks the rate of change rather than fleet size.
+
+    python scheduler.py --interval 600 --jitter 0.1
+"""
+import argparse
+import asyncio
+import heapq
+import logging
+import random
+import time
+import weakref
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cache import TTLCache
+from history import HistoryStore
+from weather import (API_KEY, BASE_URL, CACHE_PATH, DATA_CENTERS, HISTORY_PATH, METRICS, METRICS_PATH,
+                     STAGE_SECONDS, WeatherAnalyzer, WeatherClient, WeatherData)
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Site:
+    name: str
+    lat: float
+    lon: float
+    interval: float  # seconds between refreshes
+
+@dataclass
+class SiteDelta:
+    location: str
+    reading: WeatherData
+    # Each field is (old, new) when it changed, otherwise None
+    extreme_conditions: Optional[Tuple[Optional[List[str]], Optional[List[str]]]] = None
+    cost_impact: Optional[Tuple[Optional[float], float]] = None
+    risk_assessment: Optional[Tuple[Optional[str], str]] = None
+
+    def describe(self) -> str:
+        parts = []
+        if self.cost_impact:
+            old, new = self.cost_impact
+            parts.append(f"cost {'-' if old is None else f'${old:.2f}'} -> ${new:.2f}")
+        if self.risk_assessment:
+            parts.append(f"risk: {self.risk_assessment[1]}")
+        if self.extreme_conditions:
+            parts.append(f"extreme: {', '.join(self.extreme_conditions[1] or []) or 'none'}")
+        return f"{self.location}: " + " | ".join(parts)
+
+def _reading_key(weather: WeatherData) -> Tuple[Any, ...]:
+    # The fields the analyzer rules look at; a new dt alone isn't a change
+    return (weather.temperature, weather.humidity, weather.wind_speed, weather.conditions)
+
+SCHEDULER_STATS = ("refreshes", "unchanged", "reanalyzed", "deltas", "skipped_busy")
+
+class PollingScheduler:
+    """Refreshes sites on their own schedule and emits analysis deltas"""
+    def __init__(self, client: WeatherClient, sites: List[Site],
+                 on_delta: Callable[[SiteDelta], None] = lambda d: print(d.describe()),
+                 jitter: float = 0.1, max_concurrency: int = 100,
+                 analyzer: Optional[WeatherAnalyzer] = None,
+                 history: Optional[HistoryStore] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.client = client
+        self.sites = sites
+        self.on_delta = on_delta
+        self.jitter = jitter
+        self.analyzer = analyzer or WeatherAnalyzer()
+        self.history = history
+        self.clock = clock
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._due: List[Tuple[float, int, Site]] = []  # heap of (due_at, seq, site)
+        self._seq = 0
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._readings: Dict[str, Tuple[Any, ...]] = {}
+        self._results: Dict[str, Tuple[Optional[List[str]], float, str]] = {}
+        self.stats = dict.fromkeys(SCHEDULER_STATS, 0)
+        _LIVE_SCHEDULERS.add(self)
+        now = clock()
+        for site in sites:
+            # First pass is spread over the jitter window instead of firing all at once
+            self._schedule(site, now + random.uniform(0, site.interval * jitter))
+
+    def _schedule(self, site: Site, due_at: float):
+        self._seq += 1
+        heapq.heappush(self._due, (due_at, self._seq, site))
+
+    def _next_due(self, site: Site, now: float) -> float:
+        spread = site.interval * self.jitter
+        return now + site.interval + random.uniform(-spread, spread)
+
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        """Poll until stop is set"""
+        stop = stop or asyncio.Event()
+        try:
+            while not stop.is_set():
+                now = self.clock()
+                while self._due and self._due[0][0] <= now:
+                    _, _, site = heapq.heappop(self._due)
+                    # Rescheduled when popped, so only this loop ever touches the heap
+                    self._schedule(site, self._next_due(site, now))
+                    if site.name in self._inflight:
+                        self.stats["skipped_busy"] += 1
+                        continue
+                    self._inflight[site.name] = asyncio.ensure_future(self._refresh(site))
+                delay = self._due[0][0] - now if self._due else 1.0
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=max(0.0, delay))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for task in self._inflight.values():
+                task.cancel()
+            await asyncio.gather(*self._inflight.values(), return_exceptions=True)
+
+    async def _refresh(self, site: Site):
+        try:
+            async with self._semaphore:
+                weather = await self.client.get_weather(site.lat, site.lon, site.name)
+            self.stats["refreshes"] += 1
+            if weather is None:
+                return
+            if weather.location != site.name:
+                # Sites at the same coordinates share a cache entry, labelled with
+                # whichever site fetched it first
+                weather = replace(weather, location=site.name)
+            if self.history is not None:
+                # Repeated timestamps (cached readings) are skipped by the store
+                self.history.append([weather])
+            key = _reading_key(weather)
+            if self._readings.get(site.name) == key:
+                self.stats["unchanged"] += 1
+                return
+            self._readings[site.name] = key
+            delta = self._reanalyze(site.name, weather)
+            if delta is not None:
+                self.stats["deltas"] += 1
+                self.on_delta(delta)
+        except Exception as e:
+            logger.error(f"Refresh failed for {site.name}: {e}")
+        finally:
+            self._inflight.pop(site.name, None)
+
+    def _reanalyze(self, name: str, weather: WeatherData) -> Optional[SiteDelta]:
+        """Run the analyzer rules for one site and diff against its last results"""
+        self.stats["reanalyzed"] += 1
+        readings = [weather]
+        with STAGE_SECONDS.time("analyze"):
+            extreme = self.analyzer.identify_extreme_conditions(readings).get(name)
+            cost = self.analyzer.calculate_cost_impacts(readings)[name]
+            risk = self.analyzer.generate_risk_assessment(readings)[name]
+        old_extreme, old_cost, old_risk = self._results.get(name, (None, None, None))
+        self._results[name] = (extreme, cost, risk)
+
+        delta = SiteDelta(name, weather)
+        if extreme != old_extreme:
+            delta.extreme_conditions = (old_extreme, extreme)
+        if cost != old_cost:
+            delta.cost_impact = (old_cost, cost)
+        if risk != old_risk:
+            delta.risk_assessment = (old_risk, risk)
+        if delta.extreme_conditions or delta.cost_impact or delta.risk_assessment:
+            return delta
+        return None
+
+# Registered once and summed over live schedulers, as with WeatherClient's
+# gauges; the weak set keeps the metrics registry from holding schedulers alive.
+_LIVE_SCHEDULERS: "weakref.WeakSet[PollingScheduler]" = weakref.WeakSet()
+
+for _key in SCHEDULER_STATS:
+    METRICS.gauge(f"weather_scheduler_{_key}", f"Polling scheduler {_key.replace('_', ' ')} so far",
+                  lambda k=_key: sum(s.stats[k] for s in list(_LIVE_SCHEDULERS)))
+
+async def write_metrics_periodically(path: str, every: float):
+    while True:
+        await asyncio.sleep(every)
+        METRICS.write(path)
+
+async def watch(interval: float, jitter: float, metrics_every: float = 60):
+    """Poll DATA_CENTERS until interrupted, writing metrics to WEATHER_METRICS_PATH if set"""
+    sites = [Site(dc["name"], dc["lat"], dc["lon"], dc.get("interval", interval)) for dc in DATA_CENTERS]
+    # Readings must expire by the next refresh, or every poll is a cache hit
+    cache = TTLCache(max_entries=max(1000, 2 * len(sites)), ttl=min(site.interval for site in sites) * (1 - jitter))
+    async with WeatherClient(API_KEY, BASE_URL, cache=cache, disk_cache_path=CACHE_PATH) as client:
+        exporter = asyncio.ensure_future(write_metrics_periodically(METRICS_PATH, metrics_every)) if METRICS_PATH else None
+        try:
+            history = HistoryStore(HISTORY_PATH) if HISTORY_PATH else None
+            await PollingScheduler(client, sites, jitter=jitter, history=history).run()
+        finally:
+            if exporter is not None:
+                exporter.cancel()
+
+def main():
+    parser = argparse.ArgumentParser(description="Continuously poll data center weather and print changes")
+    parser.add_argument("--interval", type=float, default=600, help="seconds between refreshes per site")
+    parser.add_argument("--jitter", type=float, default=0.1, help="fraction of the interval to randomize by")
+    parser.add_argument("--metrics-every", type=float, default=60, help="seconds between metrics file writes")
+    args = parser.parse_args()
+    try:
+        asyncio.run(watch(args.interval, args.jitter, args.metrics_every))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
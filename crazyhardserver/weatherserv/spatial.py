@@ -0,0 +1,65 @@
+"""Geohash bucketing so co-located data centers share one weather fetch.
+
+Cell size by precision (approximate, at the equator):
+    5 -> 4.9 km x 4.9 km    6 -> 1.2 km x 0.6 km    7 -> 153 m x 153 m
+"""
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def geohash(lat: float, lon: float, precision: int = 6) -> str:
+    """Encode a coordinate as a geohash string of `precision` characters"""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits, value, even = 0, 0, True
+    while len(chars) < precision:
+        # Bits alternate longitude, latitude, starting with longitude
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                value = (value << 1) | 1
+                lon_lo = mid
+            else:
+                value <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                value = (value << 1) | 1
+                lat_lo = mid
+            else:
+                value <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+def cell_center(cell: str) -> Tuple[float, float]:
+    """Return the (lat, lon) center of a geohash cell"""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    even = True
+    for char in cell:
+        value = _BASE32.index(char)
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                lon_lo, lon_hi = (mid, lon_hi) if bit else (lon_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return round((lat_lo + lat_hi) / 2, 6), round((lon_lo + lon_hi) / 2, 6)
+
+def group_sites(sites: Iterable[Dict], precision: int = 6) -> "OrderedDict[str, List[Dict]]":
+    """Bucket site dicts (with "lat"/"lon") by geohash cell, keeping input order"""
+    groups: "OrderedDict[str, List[Dict]]" = OrderedDict()
+    for site in sites:
+        groups.setdefault(geohash(site["lat"], site["lon"], precision), []).append(site)
+    return groups
@@ -1,22 +1,55 @@
 import requests
+import aiohttp
 import time
 import json
 import asyncio
 import logging
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from typing import Dict, List, Any, Mapping, Optional
+from dataclasses import dataclass, asdict, replace
 import os
+import sys
+import weakref
 from dotenv import load_dotenv
 
+# Shared helpers live one directory up, next to cloudpricing/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ratelimit import AsyncRateLimiter as RateLimiter
+from cache import TTLCache
+from disk_store import SQLiteStore
+from resilience import CircuitBreaker, LatencyTracker, RetryPolicy
+from spatial import cell_center, group_sites
+from metrics import LogSampler, MetricsRegistry
+from history import HistoryStore
+
 load_dotenv()
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
+# Per-fetch lines are rate-limited so logging stays cheap when polling large fleets
+fetch_info_log = LogSampler(logger, "per-fetch info", per_second=5)
+fetch_error_log = LogSampler(logger, "per-fetch warning/error", per_second=20)
+
+# Pipeline metrics; export with METRICS.to_prometheus() or METRICS.snapshot()
+METRICS = MetricsRegistry()
+STAGE_SECONDS = METRICS.histogram("weather_stage_seconds", "Time spent per pipeline stage", label_name="stage")
+REQUESTS = METRICS.counter("weather_requests_total", "HTTP attempts sent to the weather API")
+RESPONSES = METRICS.counter("weather_responses_total", "Weather API responses by status code", label_name="code")
+RETRIES = METRICS.counter("weather_retries_total", "Attempts beyond the first for a reading")
+RATE_LIMITED = METRICS.counter("weather_rate_limited_total", "429 responses from the weather API")
+FETCH_FAILURES = METRICS.counter("weather_fetch_failures_total", "Fetches that gave up without a reading")
 
 # You would receive this in the interview or use your own
 API_KEY = os.getenv("WEATHER_API_KEY")  # In the interview, they'd likely provide this
 BASE_URL = "https://api.openweathermap.org/data/2.5/weather"
+# Optional sqlite file so readings survive restarts (e.g. cron runs)
+CACHE_PATH = os.getenv("WEATHER_CACHE_PATH")
+# Optional metrics output; .json for a snapshot, anything else for Prometheus text
+METRICS_PATH = os.getenv("WEATHER_METRICS_PATH")
+# Optional directory for the long-term reading history (see history.py)
+HISTORY_PATH = os.getenv("WEATHER_HISTORY_PATH")
+# Optional geohash precision (e.g. 6 ~ 1 km cells) for fetching nearby sites once
+DEDUPE_PRECISION = int(os.getenv("WEATHER_DEDUPE_PRECISION", "0")) or None
 
 # Data centers locations (example)
 DATA_CENTERS = [
@@ -27,7 +60,7 @@ DATA_CENTERS = [
     {"name": "South America-Sao Paulo", "lat": -23.5505, "lon": -46.6333},
 ]
 
-@dataclass
+@dataclass(slots=True)
 class WeatherData:
     location: str
     temperature: float
@@ -63,46 +96,181 @@ class WeatherData:
             # Extreme heat, very high cooling costs
             return 3.0
 
-class RateLimiter:
-    """Simple rate limiter to prevent API throttling"""
-    def __init__(self, calls_per_minute: int = 60):
-        self.calls_per_minute = calls_per_minute
-        self.call_timestamps = []
-    
-    async def wait_if_needed(self):
-        """Wait if we've exceeded our rate limit"""
-        curr_time = time.time()
-        # max 1 min old
-        self.call_timestamps = [ts for ts in self.call_timestamps if curr_time - ts < 60]
-        if len(self.call_timestamps)>=self.calls_per_minute:
-            oldest_timestamp = min(self.call_timestamps)
-            wait_time = 60 - (curr_time - oldest_timestamp)
-            if wait_time > 0:
-                logger.info(f"Rate limit reached. Waiting for {wait_time:.2f} seconds")
-                await asyncio.sleep(wait_time)
-        self.call_timestamps.append(time.time())
+class TransportError(Exception):
+    """Raised when a request fails before an HTTP response is received"""
+
+@dataclass
+class HTTPResponse:
+    status_code: int
+    headers: Mapping[str, str]  # case-insensitive, like requests' headers
+    body: bytes
+
+    def json(self) -> Any:
+        """Decode the response body as JSON"""
+        return json.loads(self.body)
+
+class AiohttpTransport:
+    """Native asyncio transport sharing one pooled keep-alive session"""
+    def __init__(self, limit: int = 0, limit_per_host: int = 100, keepalive_timeout: float = 30):
+        # limit=0 means no global cap; limit_per_host bounds open sockets per upstream
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily so the session binds to the running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def get(self, url: str, params: Optional[Dict[str, Any]] = None, timeout: float = 10) -> HTTPResponse:
+        """Send a GET request over a pooled connection"""
+        session = self._get_session()
+        try:
+            async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                body = await response.read()
+                return HTTPResponse(response.status, response.headers.copy(), body)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise TransportError(str(e) or type(e).__name__) from e
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+class ThreadedTransport:
+    """Blocking requests.get run on a worker thread, one connection per call"""
+    async def get(self, url: str, params: Optional[Dict[str, Any]] = None, timeout: float = 10) -> HTTPResponse:
+        """Send a GET request from the default thread pool"""
+        try:
+            response = await asyncio.to_thread(requests.get, url, params=params, timeout=timeout)
+        except requests.exceptions.RequestException as e:
+            raise TransportError(str(e)) from e
+        return HTTPResponse(response.status_code, response.headers, response.content)
+
+    async def close(self):
+        pass
 
 class WeatherClient:
     """Client for fetching weather data"""
-    def __init__(self, api_key: str, base_url: str):
+    def __init__(self, api_key: str, base_url: str,
+                 transport: Optional[Any] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 cache: Optional[TTLCache] = None,
+                 disk_cache_path: Optional[str] = None,
+                 retry_policy: Optional[RetryPolicy] = None):
         self.api_key = api_key
         self.base_url = base_url
-        self.rate_limiter = RateLimiter()
-        self.cache = {}  # Simple cache to store results
+        self.transport = transport or AiohttpTransport()
+        self.rate_limiter = rate_limiter or RateLimiter()
+        # Readings stay fresh for 10 minutes; see cache.stats for hit/miss counts
+        self.cache = cache if cache is not None else TTLCache(max_entries=10000, ttl=600)
+        self.disk_cache = None
+        if disk_cache_path:
+            self.disk_cache = SQLiteStore(
+                disk_cache_path,
+                encode=lambda weather: json.dumps(asdict(weather)),
+                decode=lambda payload: WeatherData(**json.loads(payload)),
+            )
+            self.cache.store = self.disk_cache
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker = CircuitBreaker(self.retry_policy.breaker_failure_threshold,
+                                      self.retry_policy.breaker_reset_timeout)
+        self.latency = LatencyTracker()
+        self.stats = {"requests": 0, "hedges": 0, "hedge_wins": 0, "circuit_rejections": 0,
+                      "stale_fallbacks": 0, "dedupe_calls_saved": 0}
+        _LIVE_CLIENTS.add(self)
+
+    async def close(self):
+        """Release pooled connections held by the transport"""
+        _LIVE_CLIENTS.discard(self)
+        await self.transport.close()
+        if self.disk_cache is not None:
+            self.disk_cache.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
         
     async def get_weather(self, lat: float, lon: float, location_name: str) -> Optional[WeatherData]:
-        """Fetch weather data for a location"""
-        # Check cache first for the location
+        """Fetch weather data for a location, served from the cache when fresh"""
         cache_key = f"{lat}_{lon}"
-        if cache_key in self.cache:
-            # Check if cache is still fresh (less than 10 minutes old)
-            if time.time() - self.cache[cache_key]["timestamp"] < 600:
-                logger.info(f"Using cached data for {location_name}")
-                return self.cache[cache_key]["data"]
-        
+        # Concurrent calls for the same location share one fetch
+        weather_data = await self.cache.get_or_fetch(
+            cache_key, lambda: self._fetch_weather(lat, lon, location_name)
+        )
+        if weather_data is None and self.breaker.is_open:
+            # Upstream is unhealthy; the last known reading beats nothing
+            last_known = self.cache.peek(cache_key)
+            if last_known is not None:
+                self.stats["stale_fallbacks"] += 1
+                if fetch_error_log.allow():
+                    logger.warning(f"Circuit open; using last known reading for {location_name} "
+                                   f"from {time.time() - last_known[1]:.0f}s ago")
+                return last_known[0]
+        return weather_data
+
+    async def get_fleet_weather(self, sites: List[Dict[str, Any]],
+                                dedupe_precision: Optional[int] = None) -> List[Optional[WeatherData]]:
+        """Fetch weather for every site dict ("name", "lat", "lon"), in input order.
+
+        With dedupe_precision, sites in the same geohash cell share one fetch
+        at the cell's center, fanned out to each member under its own name.
+        """
+        if not dedupe_precision:
+            return list(await asyncio.gather(
+                *(self.get_weather(site["lat"], site["lon"], site["name"]) for site in sites)
+            ))
+
+        groups = group_sites(sites, dedupe_precision)
+        cells = list(groups)
+        readings = await asyncio.gather(
+            *(self.get_weather(*cell_center(cell), groups[cell][0]["name"]) for cell in cells)
+        )
+        by_site = {}
+        for cell, weather_data in zip(cells, readings):
+            for site in groups[cell]:
+                by_site[id(site)] = None if weather_data is None else replace(weather_data, location=site["name"])
+
+        saved = len(sites) - len(cells)
+        self.stats["dedupe_calls_saved"] += saved
+        logger.info(f"Spatial dedupe: {len(cells)} fetches for {len(sites)} sites ({saved} calls saved)")
+        return [by_site[id(site)] for site in sites]
+
+    async def _fetch_weather(self, lat: float, lon: float, location_name: str) -> Optional[WeatherData]:
+        """Fetch weather data for a location from the API within the policy's deadline"""
+        policy = self.retry_policy
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + policy.deadline
+
+        def remaining() -> float:
+            return deadline - loop.time()
+
+        if not self.breaker.allow():
+            self.stats["circuit_rejections"] += 1
+            FETCH_FAILURES.inc()
+            return None
+
         # Apply rate limiting before making a request
-        await self.rate_limiter.wait_if_needed()
-        
+        try:
+            with STAGE_SECONDS.time("rate_limit_wait"):
+                await asyncio.wait_for(self.rate_limiter.wait_if_needed(), timeout=remaining())
+        except asyncio.TimeoutError:
+            if fetch_error_log.allow():
+                logger.error(f"Deadline reached waiting for rate limiter for {location_name}")
+            self.breaker.release()
+            FETCH_FAILURES.inc()
+            return None
+
         # Build the request URL with parameters
         params = {
             "lat": lat,
@@ -110,72 +278,175 @@ class WeatherClient:
             "appid": self.api_key,  # This is where the API key goes
             "units": "standard"  # Use Kelvin for temperature
         }
-        
+
         # Make the request with retries
-        max_retries = 3
-        retry_delay = 1
-        
-        for attempt in range(max_retries):
+        retry_delay = policy.backoff_initial
+
+        for attempt in range(policy.max_attempts):
+            budget = remaining()
+            if budget <= 0:
+                break
+            if attempt > 0:
+                if self.breaker.state == CircuitBreaker.OPEN:
+                    self.stats["circuit_rejections"] += 1
+                    FETCH_FAILURES.inc()
+                    return None
+                RETRIES.inc()
             try:
-                logger.info(f"Fetching weather data for {location_name} (Attempt {attempt+1}/{max_retries})")
-                # Since we're using asyncio, we need to use asyncio-compatible requests
-                # We use the synchronous requests library with asyncio.to_thread to make it work with asyncio
-                response = await asyncio.to_thread(
-                    requests.get, self.base_url, params=params, timeout=10
-                )
-                
+                if fetch_info_log.allow():
+                    logger.info(f"Fetching weather data for {location_name} (Attempt {attempt+1}/{policy.max_attempts})")
+                with STAGE_SECONDS.time("network"):
+                    response = await self._send(params, min(policy.attempt_timeout, budget))
+                RESPONSES.inc(label=str(response.status_code))
+
                 # Check for rate limiting
                 if response.status_code == 429:
-                    retry_after = int(response.headers.get("Retry-After", retry_delay))
-                    logger.warning(f"Rate limited. Waiting for {retry_after} seconds.")
-                    await asyncio.sleep(retry_after)
+                    RATE_LIMITED.inc()
+                    retry_after = _parse_retry_after(response.headers.get("Retry-After"), retry_delay)
+                    wait_time = min(retry_after, policy.max_retry_after)
+                    if wait_time >= remaining():
+                        if fetch_error_log.allow():
+                            logger.warning(f"Rate limited; Retry-After {retry_after}s exceeds the deadline for {location_name}")
+                        break
+                    if fetch_error_log.allow():
+                        logger.warning(f"Rate limited. Waiting for {wait_time} seconds.")
+                    await asyncio.sleep(wait_time)
                     continue
-                
+
                 # Check for other errors
                 if response.status_code != 200:
-                    logger.error(f"HTTP error: {response.status_code}")
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(retry_delay)
-                        retry_delay *= 2  # Exponential backoff
+                    if fetch_error_log.allow():
+                        logger.error(f"HTTP error: {response.status_code}")
+                    if response.status_code >= 500:
+                        self.breaker.record_failure()
+                    if attempt < policy.max_attempts - 1 and await self._backoff(retry_delay, remaining()):
+                        retry_delay = min(retry_delay * policy.backoff_multiplier, policy.backoff_max)
                         continue
-                    return None
-                
-                # Parse the response
-                data = response.json()
-                
-                # Create WeatherData object
-                weather_data = WeatherData(
-                    location=location_name,
-                    temperature=data["main"]["temp"],
-                    humidity=data["main"]["humidity"],
-                    wind_speed=data["wind"]["speed"],
-                    conditions=data["weather"][0]["description"],
-                    timestamp=data["dt"]
-                )
-                
-                # Cache the result
-                self.cache[cache_key] = {
-                    "data": weather_data,
-                    "timestamp": time.time()
-                }
-                
-                logger.info(f"Successfully retrieved weather data for {location_name}")
+                    break
+
+                self.breaker.record_success()
+
+                with STAGE_SECONDS.time("parse"):
+                    # Parse the response
+                    data = response.json()
+
+                    # Create WeatherData object
+                    weather_data = WeatherData(
+                        location=location_name,
+                        temperature=_number(data["main"]["temp"]),
+                        humidity=_number(data["main"]["humidity"]),
+                        wind_speed=_number(data["wind"]["speed"]),
+                        conditions=str(data["weather"][0]["description"]),
+                        timestamp=int(_number(data["dt"]))
+                    )
+
+                if fetch_info_log.allow():
+                    logger.info(f"Successfully retrieved weather data for {location_name}")
                 return weather_data
-                
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Request error for {location_name}: {e}")
-                if attempt < max_retries - 1:
-                    logger.info(f"Retrying in {retry_delay} seconds...")
-                    await asyncio.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                else:
-                    logger.error(f"Failed to fetch weather data for {location_name} after {max_retries} attempts")
-                    return None
-                    
-            except (KeyError, ValueError) as e:
-                logger.error(f"Data parsing error for {location_name}: {e}")
+
+            except TransportError as e:
+                if fetch_error_log.allow():
+                    logger.error(f"Request error for {location_name}: {e}")
+                self.breaker.record_failure()
+                if attempt < policy.max_attempts - 1 and await self._backoff(retry_delay, remaining()):
+                    retry_delay = min(retry_delay * policy.backoff_multiplier, policy.backoff_max)
+                    continue
+                break
+
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                if fetch_error_log.allow():
+                    logger.error(f"Data parsing error for {location_name}: {e}")
+                FETCH_FAILURES.inc()
                 return None
 
+        if fetch_error_log.allow():
+            logger.error(f"Failed to fetch weather data for {location_name} within {policy.deadline}s")
+        self.breaker.release()
+        FETCH_FAILURES.inc()
+        return None
+
+    async def _backoff(self, delay: float, budget: float) -> bool:
+        """Sleep before a retry; False if the deadline would pass first"""
+        if delay >= budget:
+            return False
+        if fetch_info_log.allow():
+            logger.info(f"Retrying in {delay} seconds...")
+        await asyncio.sleep(delay)
+        return True
+
+    async def _send(self, params: Dict[str, Any], timeout: float) -> HTTPResponse:
+        """Send one attempt, hedging with a second request if the first is slow"""
+        policy = self.retry_policy
+        loop = asyncio.get_running_loop()
+        hedge_delay = None
+        if policy.hedge and len(self.latency) >= policy.hedge_min_samples:
+            hedge_delay = max(policy.hedge_min_delay, self.latency.percentile(policy.hedge_percentile))
+
+        started = loop.time()
+        self.stats["requests"] += 1
+        REQUESTS.inc()
+        primary = asyncio.ensure_future(self.transport.get(self.base_url, params=params, timeout=timeout))
+        pending = {primary}
+        try:
+            if hedge_delay is not None and hedge_delay < timeout:
+                done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+                # Hedges are capped at a fraction of traffic and only use spare
+                # rate-limit budget, never queue for it
+                within_budget = self.stats["hedges"] < policy.hedge_budget * self.stats["requests"]
+                if not done and within_budget and self.rate_limiter.try_acquire():
+                    self.stats["hedges"] += 1
+                    REQUESTS.inc()
+                    pending.add(asyncio.ensure_future(
+                        self.transport.get(self.base_url, params=params, timeout=timeout - hedge_delay)
+                    ))
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.stats["hedge_wins"] += 1
+                        self.latency.record(loop.time() - started)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+# Client gauges are registered once and summed over the clients still open.
+# The set is weak, so the metrics registry never keeps a client alive.
+_LIVE_CLIENTS: "weakref.WeakSet[WeatherClient]" = weakref.WeakSet()
+
+def _client_total(read) -> float:
+    return sum(read(client) for client in list(_LIVE_CLIENTS))
+
+def _cache_hit_ratio() -> float:
+    hits = _client_total(lambda c: c.cache.stats.hits + c.cache.stats.stale_hits)
+    lookups = hits + _client_total(lambda c: c.cache.stats.misses + c.cache.stats.coalesced)
+    return round(hits / lookups, 4) if lookups else 0.0
+
+METRICS.gauge("weather_cache_hit_ratio", "Share of lookups served from cache", _cache_hit_ratio)
+for _field in ("hits", "stale_hits", "misses", "coalesced", "evictions"):
+    METRICS.gauge(f"weather_cache_{_field}", f"Cache {_field.replace('_', ' ')} so far",
+                  lambda f=_field: _client_total(lambda c: getattr(c.cache.stats, f)))
+for _key in ("hedges", "hedge_wins", "circuit_rejections", "stale_fallbacks", "dedupe_calls_saved"):
+    METRICS.gauge(f"weather_{_key}", f"WeatherClient {_key.replace('_', ' ')} so far",
+                  lambda k=_key: _client_total(lambda c: c.stats[k]))
+
+def _number(value: Any) -> float:
+    """Validate a numeric payload field, keeping its int/float type"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"expected a number, got {value!r}")
+    return value
+
+def _parse_retry_after(value: Optional[str], default: float) -> float:
+    """Retry-After in seconds; HTTP-date and garbage values fall back to default"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return default
+
 class WeatherAnalyzer:
     """Analyzes weather data to generate insights"""
     def __init__(self):
@@ -297,33 +568,35 @@ class WeatherAnalyzer:
 
 async def main():
     """Main function to orchestrate the data pipeline"""
-    # Initialize the weather client
-    weather_client = WeatherClient(API_KEY, BASE_URL)
-    
-    # Fetch weather data for all data centers concurrently
-    tasks = []
-    for dc in DATA_CENTERS:
-        task = weather_client.get_weather(dc["lat"], dc["lon"], dc["name"])
-        tasks.append(task)
-    
-    # Wait for all tasks to complete
-    weather_data_list = await asyncio.gather(*tasks)
+    # Initialize the weather client; the session is closed when the block exits
+    async with WeatherClient(API_KEY, BASE_URL, disk_cache_path=CACHE_PATH) as weather_client:
+        # Fetch weather data for all data centers concurrently
+        weather_data_list = await weather_client.get_fleet_weather(DATA_CENTERS, DEDUPE_PRECISION)
     
-    # Filter out any failed requests
-    weather_data_list = [data for data in weather_data_list if data is not None]
-    
-    if not weather_data_list:
-        logger.error("Failed to fetch weather data for all locations")
-        return
-    
-    # Analyze the data
-    analyzer = WeatherAnalyzer()
-    extreme_conditions = analyzer.identify_extreme_conditions(weather_data_list)
-    cost_impacts = analyzer.calculate_cost_impacts(weather_data_list)
-    risk_assessment = analyzer.generate_risk_assessment(weather_data_list)
-    
-    # Generate report
-    generate_report(weather_data_list, extreme_conditions, cost_impacts, risk_assessment)
+    try:
+        # Filter out any failed requests
+        weather_data_list = [data for data in weather_data_list if data is not None]
+
+        if not weather_data_list:
+            logger.error("Failed to fetch weather data for all locations")
+            return
+
+        if HISTORY_PATH:
+            HistoryStore(HISTORY_PATH).append(weather_data_list)
+
+        # Analyze the data
+        with STAGE_SECONDS.time("analyze"):
+            analyzer = WeatherAnalyzer()
+            extreme_conditions = analyzer.identify_extreme_conditions(weather_data_list)
+            cost_impacts = analyzer.calculate_cost_impacts(weather_data_list)
+            risk_assessment = analyzer.generate_risk_assessment(weather_data_list)
+
+        # Generate report
+        with STAGE_SECONDS.time("report"):
+            generate_report(weather_data_list, extreme_conditions, cost_impacts, risk_assessment)
+    finally:
+        if METRICS_PATH:
+            METRICS.write(METRICS_PATH)
 
 def generate_report(
     weather_data_list: List[WeatherData],
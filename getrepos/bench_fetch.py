@@ -0,0 +1,191 @@
+"""Benchmark getgitrepo.py on a large input against a local GitHub stand-in.
+
+The stand-in serves /repos/{owner}/{name}. Some names are missing (404),
+some fail transiently (500), some come back with malformed counts, and
+some with a body that is not JSON at all.
+The benchmark runs the script as a subprocess over an input file:
+
+  - one request at a time, on a sample, extrapolated to the whole file
+  - with --concurrency in flight
+  - killed with SIGKILL partway through, then resumed
+
+It checks that the resumed outputs hold every good repo exactly once, in
+both the CSV and the JSONL, and that the resumed run's top repos by stars
+cover the whole input, not just what it fetched itself. It also reports the script's peak RSS at two
+input sizes to show memory does not grow with the input.
+
+    python bench_fetch.py --repos 20000 --latency-ms 20 --concurrency 32
+"""
+import argparse
+import csv
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "getgitrepo.py")
+
+def kind(name):
+    """Deterministic fate of each repo name"""
+    h = zlib.crc32(name.encode()) % 100
+    return ("missing" if h < 2 else "flaky" if h < 3 else "malformed" if h < 4
+            else "garbled" if h < 5 else "ok")
+
+class QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # the kill-and-resume run drops connections on purpose
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+class StandIn:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.hits = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server.lock:
+                    server.hits += 1
+                time.sleep(server.latency)
+                name = self.path[len("/repos/"):]
+                fate = kind(name)
+                status, payload = 200, {"full_name": name, "stargazers_count": stars(name),
+                                        "forks_count": len(name) * 7, "open_issues_count": len(name),
+                                        "owner": {"login": name.split("/")[0]}, "description": "z" * 500}
+                if fate == "missing":
+                    status, payload = 404, {"message": "Not Found"}
+                elif fate == "flaky":
+                    status, payload = 500, {"message": "Server Error"}
+                elif fate == "malformed":
+                    payload["stargazers_count"] = None
+                body = json.dumps(payload).encode()
+                if fate == "garbled":
+                    body = body[:len(body) // 2]
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = QuietServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.httpd.server_port}/repos/"
+
+def write_input(path, n):
+    with open(path, "w") as f:
+        f.write("# generated input\n")
+        for i in range(n):
+            f.write(f"owner{i % 997}/project-{i}\n")
+    return [f"owner{i % 997}/project-{i}" for i in range(n)]
+
+def stars(name):
+    return zlib.crc32(name.encode()) % 90000
+
+def launch(server, root, input_path, concurrency, fresh=True, stdout=subprocess.DEVNULL):
+    cmd = [sys.executable, SCRIPT, "--input", input_path, "--no-cache", "--base-url", server.base,
+           "--concurrency", str(concurrency), "--csv", os.path.join(root, "repos.csv"),
+           "--jsonl", os.path.join(root, "repos.jsonl"), "--failed", os.path.join(root, "failed.txt")]
+    if fresh:
+        cmd.append("--fresh")
+    return subprocess.Popen(cmd, stdout=stdout, text=True)
+
+def finish(proc):
+    """Wait for the child; returns (exit status, peak RSS in MiB)"""
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = status
+    return status, usage.ru_maxrss / 1024
+
+def timed_run(server, root, input_path, concurrency):
+    start = time.perf_counter()
+    status, rss = finish(launch(server, root, input_path, concurrency))
+    if status:
+        raise SystemExit(f"getgitrepo.py exited with {status}")
+    return time.perf_counter() - start, rss
+
+def check_outputs(root, names):
+    expected = sorted(n for n in names if kind(n) == "ok")
+    with open(os.path.join(root, "repos.jsonl")) as f:
+        from_jsonl = sorted(json.loads(line)["full_name"] for line in f)
+    with open(os.path.join(root, "repos.csv"), newline="") as f:
+        from_csv = sorted(row["full_name"] for row in csv.DictReader(f))
+    with open(os.path.join(root, "failed.txt")) as f:
+        failed = sorted(line.split()[0] for line in f)
+    retry = sorted(n for n in names if kind(n) in ("flaky", "garbled"))
+    return from_jsonl == expected and from_csv == expected and failed == retry
+
+def check_top(output, names, top=10):
+    """The printed top repos match the best `top` of the whole input"""
+    best = sorted((n for n in names if kind(n) == "ok"), key=lambda n: (stars(n), n), reverse=True)[:top]
+    printed = [line.split(":", 1)[0] for line in output.splitlines() if "⭐" in line]
+    return printed == [n.split("/", 1)[1] for n in best]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repos", type=int, default=20000)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--sequential-sample", type=int, default=300)
+    parser.add_argument("--kill-at", type=float, default=0.4, help="fraction of requests before SIGKILL")
+    args = parser.parse_args()
+
+    server = StandIn(args.latency_ms / 1000)
+    root = tempfile.mkdtemp(prefix="getgitrepo-")
+    rows = []
+
+    sample_path = os.path.join(root, "sample.txt")
+    write_input(sample_path, args.sequential_sample)
+    elapsed, _ = timed_run(server, root, sample_path, 1)
+    rows.append(("one at a time (est.)", elapsed / args.sequential_sample * args.repos, "", ""))
+
+    small_path = os.path.join(root, "small.txt")
+    write_input(small_path, args.repos // 4)
+    _, small_rss = timed_run(server, root, small_path, args.concurrency)
+
+    input_path = os.path.join(root, "input.txt")
+    names = write_input(input_path, args.repos)
+    elapsed, rss = timed_run(server, root, input_path, args.concurrency)
+    ok = check_outputs(root, names)
+    rows.append((f"{args.concurrency} in flight", elapsed, f"{rss:.0f}", f"{small_rss:.0f} at {args.repos // 4}"))
+
+    hits = server.hits
+    start = time.perf_counter()
+    proc = launch(server, root, input_path, args.concurrency)
+    while server.hits - hits < args.repos * args.kill_at:
+        time.sleep(0.01)
+    proc.send_signal(signal.SIGKILL)
+    finish(proc)
+    killed_after = server.hits - hits
+    resumed = launch(server, root, input_path, args.concurrency, fresh=False, stdout=subprocess.PIPE)
+    output = resumed.stdout.read()
+    status, _ = finish(resumed)
+    elapsed = time.perf_counter() - start
+    resumed_ok = status == 0 and check_outputs(root, names) and check_top(output, names)
+    refetched = server.hits - hits - args.repos
+    rows.append(("killed + resumed", elapsed, "", f"killed after {killed_after}, {refetched} refetched"))
+    server.httpd.shutdown()
+
+    print(f"{args.repos} repos, {args.latency_ms:g} ms latency")
+    print(f"{'run':22s} {'seconds':>8s} {'peak MiB':>9s}")
+    for name, elapsed, rss, note in rows:
+        print(f"{name:22s} {elapsed:8.1f} {rss:>9s}  {note}")
+    print(f"outputs complete and unique: {ok}; after kill and resume: {resumed_ok}")
+    if not (ok and resumed_ok):
+        raise SystemExit("outputs are missing or duplicating repos")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,19 @@
-import requests
-import json
+import argparse
 import csv
+import heapq
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+# Shared helpers live one directory up, next to gettrendingrepos/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ghclient import GitHubClient
+from httpcache import DEFAULT_PATH as CACHE_PATH, ResponseCache
+
 # "https://api.github.com/repos/{owner}/{repo}"
 url = "https://api.github.com/repos/"
 repos = [
@@ -11,51 +24,248 @@ repos = [
     "psf/requests"
 ]
 
+# Extracts the following from each repo
+FIELDS = ['full_name', 'stargazers_count', 'forks_count', 'open_issues_count']
+
+def read_repos(path=None):
+    """(line number, owner/name) from a file with one repo per line, or the list above"""
+    if path is None:
+        yield from enumerate(repos)
+        return
+    with open(path) as f:
+        for line_no, line in enumerate(f):
+            name = line.split('#', 1)[0].strip()
+            if name:
+                yield line_no, name
+
+def project(i):
+    # each item is just one repo; skip it if the counts are missing or malformed
+    if not all(isinstance(i.get(k), int) for k in FIELDS[1:]):
+        return None
+    return {k: i.get(k) for k in FIELDS}
+
+class Checkpoint:
+    """Progress of a run, saved next to the outputs so a crashed run can resume.
+
+    Inputs are submitted in file order, so everything below `next_line` is
+    finished and only the few lines done above it (at most the in-flight
+    window) need listing. The byte size of each output at the time of the
+    checkpoint is kept too: on resume the files are cut back to it, which
+    drops a torn last line and anything written after the checkpoint, and
+    those repos are fetched again. Written to a temp file, then os.replace.
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, state):
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
 
-data = []
-for i in repos:
-    url2 = url + i
-    response = requests.get(url2)
+class StreamWriter:
+    """Appends each record to the CSV and JSON Lines outputs (and misses to a failed list) as it arrives"""
+    def __init__(self, csv_path, jsonl_path, failed_path, sizes=None):
+        self.paths = {'csv': csv_path, 'jsonl': jsonl_path, 'failed': failed_path}
+        self.files = {}
+        for kind, path in self.paths.items():
+            if not path:
+                continue
+            if sizes is None:
+                f = open(path, 'w', newline='')
+            else:
+                f = open(path, 'a', newline='')
+                f.truncate(sizes.get(kind, 0))
+                f.seek(0, os.SEEK_END)
+            self.files[kind] = f
+        self.csv = None
+        if 'csv' in self.files:
+            self.csv = csv.DictWriter(self.files['csv'], fieldnames=FIELDS)
+            if self.files['csv'].tell() == 0:
+                self.csv.writeheader()
+
+    def write(self, record):
+        if self.csv is not None:
+            self.csv.writerow(record)
+        if 'jsonl' in self.files:
+            self.files['jsonl'].write(json.dumps(record) + '\n')
+
+    def fail(self, name, reason):
+        if 'failed' in self.files:
+            # the failed list can be fed back in as --input; '#' starts a comment there
+            self.files['failed'].write(f"{name}  # {' '.join(str(reason).split())}\n")
+
+    def flush(self):
+        """Flush and fsync every output; returns their sizes for the checkpoint"""
+        sizes = {}
+        for kind, f in self.files.items():
+            f.flush()
+            os.fsync(f.fileno())
+            sizes[kind] = f.tell()
+        return sizes
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+def fetch_repo(client, base_url, name):
+    try:
+        response = client.get(base_url + name)
+    except requests.exceptions.RequestException as e:  # retry on a later run
+        return name, None, str(e)
     if response.status_code == 200:  # make sure to check this!
-        data.append(response.json())
-    else:
-        print(f"Failed to access {url2} with status code {response.status_code}")
-# each item is just one repo
-#print(data[0].keys())
-
-# Extracts and prints the following:
-# full_name
-# stargazers_count
-# forks_count
-# open_issues_count
-data2 = []
-for i in data:
-    if isinstance(i['stargazers_count'], int):
-        j = {
-            'full_name': i.get('full_name'),
-            'stargazers_count': i.get('stargazers_count'),
-            'forks_count': i.get('forks_count'),
-            'open_issues_count': i.get('open_issues_count')
-        }
-        data2.append(j)
-
-# create or overwrite repos.json, f is the opened file object
-with open("repos.json", "w") as f:
-    json.dump(data2, f, indent=2)
-
-# create or overwrite repos.csv, 
-with open("repos.csv", "w", newline="") as f:
-    writer = csv.DictWriter(f, fieldnames = data2[0].keys())
-    writer.writeheader()
-    writer.writerows(data2)
-
-# reverse = True for descend?
-sorted_stars = sorted(data2, key = lambda x : x['stargazers_count'], reverse = True)
-for i in sorted_stars:
-    slashidx = i['full_name'].index("/") + 1
-    name = i['full_name'][slashidx:]
-    issues = 'issues' if i['open_issues_count']>1 else 'issue'
-    print(f"{name}: ⭐{i['stargazers_count']} | 🍴 {i['forks_count']} | 🐛 {i['open_issues_count']} {issues}")
+        try:
+            return name, response.json(), None
+        except ValueError as e:  # a truncated or non-JSON body; retry on a later run
+            return name, None, f"invalid JSON: {e}"
+    return name, None, response.status_code
+
+def read_written(jsonl_path, csv_path):
+    """Records already in the outputs, from the JSON Lines file or else the CSV"""
+    if jsonl_path and os.path.exists(jsonl_path):
+        with open(jsonl_path) as f:
+            for line in f:
+                yield json.loads(line)
+    elif csv_path and os.path.exists(csv_path):
+        with open(csv_path, newline='') as f:
+            for row in csv.DictReader(f):
+                yield {k: row[k] if k == 'full_name' else int(row[k]) for k in FIELDS}
+
+def fetch_all(client, entries, writer, checkpoint, concurrency=16, top=10, skip=None,
+              base_url=url, checkpoint_every=1.0, written=()):
+    """Fetch repos with at most `concurrency` in flight and stream each result to `writer`.
+
+    Memory stays flat: only the in-flight window, the lines finished above
+    the checkpoint mark, and a `top`-sized heap by stars are kept. On a
+    resume, `written` holds the records already in the outputs, so the
+    heap covers them as well as this run's.
+    """
+    skip = skip or {'next_line': 0, 'done': []}
+    skipped_done = set(skip['done'])
+    counts = {'fetched': 0, 'not_found': 0, 'malformed': 0, 'failed': 0, 'skipped': 0}
+    best = []
+    pending = {}          # future -> line number
+    done_above = set()    # finished lines at or above the lowest one still in flight
+    next_line = skip['next_line']
+    last_saved = time.monotonic()
+    entries = iter(entries)
+
+    def offer(entry):
+        if len(best) < top:
+            heapq.heappush(best, entry)
+        elif entry[:3] > best[0][:3]:
+            heapq.heapreplace(best, entry)
+
+    for record in written:
+        # their line numbers aren't kept; -1 only breaks ties between repeats of one name
+        offer((record['stargazers_count'], record['full_name'], -1, record))
+
+    def save():
+        low = min(pending.values(), default=next_line)
+        done_above.intersection_update(range(low, next_line))
+        checkpoint.save({'next_line': low, 'done': sorted(done_above), 'sizes': writer.flush()})
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < concurrency * 2:
+                entry = next(entries, None)
+                if entry is None:
+                    exhausted = True
+                    break
+                line_no, name = entry
+                next_line = line_no + 1
+                if line_no < skip['next_line'] or line_no in skipped_done:
+                    if line_no in skipped_done:
+                        done_above.add(line_no)
+                    counts['skipped'] += 1
+                    continue
+                pending[pool.submit(fetch_repo, client, base_url, name)] = line_no
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                line_no = pending.pop(future)
+                name, repo, error = future.result()
+                record = project(repo) if repo is not None else None
+                if record is not None:
+                    writer.write(record)
+                    counts['fetched'] += 1
+                    offer((record['stargazers_count'], record['full_name'], line_no, record))
+                elif repo is not None:
+                    counts['malformed'] += 1
+                elif error == 404:
+                    print(f"Failed to access {base_url + name} with status code {error}")
+                    counts['not_found'] += 1
+                else:
+                    print(f"Failed to access {base_url + name}: {error}")
+                    writer.fail(name, error)
+                    counts['failed'] += 1
+                done_above.add(line_no)
+            if time.monotonic() - last_saved >= checkpoint_every:
+                save()
+                last_saved = time.monotonic()
+    save()
+    return counts, [record for *_, record in sorted(best, key=lambda e: e[:3], reverse=True)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch GitHub repo metadata")
+    parser.add_argument('--input', help="file of owner/name lines (default: the built-in list)")
+    parser.add_argument('--csv', default='repos.csv')
+    parser.add_argument('--jsonl', default='repos.jsonl')
+    parser.add_argument('--failed', default='repos.failed.txt', help="repos to retry (errors other than 404)")
+    parser.add_argument('--concurrency', type=int, default=16, help="connections / requests in flight")
+    parser.add_argument('--timeout', type=float, default=30, help="seconds before a stalled request is retried")
+    parser.add_argument('--top', type=int, default=10, help="repos to print, by stars")
+    parser.add_argument('--fresh', action='store_true', help="ignore any checkpoint and start over")
+    parser.add_argument('--cache-path', default=CACHE_PATH, help="conditional-request cache (sqlite)")
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--base-url', default=url)
+    args = parser.parse_args()
 
+    checkpoint = Checkpoint(f'{args.jsonl or args.csv}.checkpoint')
+    state = None if args.fresh else checkpoint.load()
+    if state is not None:
+        print(f"Resuming from line {state['next_line']}")
+    writer = StreamWriter(args.csv, args.jsonl, args.failed, state and state['sizes'])
+    # read back after the writer has cut the outputs to the checkpoint
+    written = read_written(args.jsonl, args.csv) if state is not None else ()
+    cache = None if args.no_cache else ResponseCache(args.cache_path)
+    client = GitHubClient(concurrency=args.concurrency, cache=cache, timeout=args.timeout)
+    start = time.monotonic()
+    try:
+        counts, top = fetch_all(client, read_repos(args.input), writer, checkpoint,
+                                args.concurrency, args.top, state, args.base_url, written=written)
+    finally:
+        writer.close()
+        client.close()
+    checkpoint.clear()
 
+    # highest stars first
+    for i in top:
+        slashidx = i['full_name'].index("/") + 1
+        name = i['full_name'][slashidx:]
+        issues = 'issues' if i['open_issues_count']>1 else 'issue'
+        print(f"{name}: ⭐{i['stargazers_count']} | 🍴 {i['forks_count']} | 🐛 {i['open_issues_count']} {issues}")
+    print(f"{counts['fetched']} fetched, {counts['not_found']} not found, {counts['failed']} failed, "
+          f"{counts['malformed']} malformed, {counts['skipped']} already done "
+          f"in {time.monotonic() - start:.1f}s")
+    if cache is not None:
+        print(cache.summary())
+        cache.close()
 
+if __name__ == "__main__":
+    main()
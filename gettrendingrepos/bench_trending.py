@@ -0,0 +1,186 @@
+"""Benchmark the streaming trending aggregator against a page-at-a-time loop.
+
+A local stand-in plays the GitHub Search API. It has per-language result
+sets, Link headers (next/last) and a rate-limit quota that answers 403 with
+X-RateLimit-Remaining: 0 until the window resets. The baseline follows
+'next' links one page at a time, keeps every item, and sorts at the end,
+which is what top50lang would have had to do across pages. The engine is
+timed at several concurrency levels. Both must agree on the aggregates and
+the top-N, and peak traced memory is reported for each.
+
+    python bench_trending.py --languages 8 --pages 10 --latency-ms 100 --quota 60
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import requests
+
+from repos import LanguageStats, TrendingClient, normalize_repo, trending
+
+LANGUAGES = ["python", "go", "rust", "java", "typescript", "ruby", "kotlin", "swift", "c", "haskell"]
+
+class StandIn:
+    """/search/repositories?q=language:X with Link paging and a fixed-window quota"""
+    def __init__(self, per_language: int, latency: float, quota: int, window: float, seed: int = 1):
+        rng = random.Random(seed)
+        self.results = {}
+        for lang in LANGUAGES:
+            items = [{"full_name": f"{lang}-org/repo{i}", "stargazers_count": rng.randint(100, 200000),
+                      "forks_count": rng.randint(0, 50000), "open_issues_count": rng.randint(0, 400),
+                      "created_at": "2015-01-01T00:00:00Z", "owner": {"login": f"{lang}-org"},
+                      "description": "x" * rng.randint(50, 300)}
+                     for i in range(per_language)]
+            if items:
+                items[rng.randrange(len(items))]["forks_count"] = None  # malformed, should be skipped
+            self.results[lang] = sorted(items, key=lambda r: r["stargazers_count"], reverse=True)
+        self.latency = latency
+        self.quota = quota
+        self.window = window
+        self.window_start = time.time()
+        self.used = 0
+        self.hits = 0
+        self.limited = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status, payload, headers):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                time.sleep(server.latency)
+                with server.lock:
+                    server.hits += 1
+                    now = time.time()
+                    if now - server.window_start >= server.window:
+                        server.window_start, server.used = now, 0
+                    reset = server.window_start + server.window
+                    server.used += 1
+                    remaining = server.quota - server.used
+                headers = {"X-RateLimit-Limit": str(server.quota), "X-RateLimit-Remaining": str(max(0, remaining)),
+                           "X-RateLimit-Reset": f"{reset:.3f}"}
+                if remaining < 0:
+                    server.limited += 1
+                    self.reply(403, {"message": "API rate limit exceeded"}, headers)
+                    return
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                language = query.get("q", "").partition("language:")[2]
+                if language not in server.results:
+                    self.reply(422, {"message": "Validation Failed"}, headers)
+                    return
+                items = server.results[language]
+                per_page, page = int(query.get("per_page", 30)), int(query.get("page", 1))
+                pages = max(1, -(-min(len(items), 1000) // per_page))
+                base = f"http://{self.headers['Host']}{url.path}"
+                link = lambda p, rel: f'<{base}?{urlencode({**query, "page": p})}>; rel="{rel}"'
+                links = [link(page + 1, "next"), link(pages, "last")] if page < pages else []
+                if page > 1:
+                    links += [link(page - 1, "prev"), link(1, "first")]
+                if links:
+                    headers["Link"] = ", ".join(links)
+                payload = {"total_count": len(items) * 343, "incomplete_results": False,
+                           "items": items[(page - 1) * per_page:page * per_page]}
+                self.reply(200, payload, headers)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.search_url = f"http://127.0.0.1:{self.httpd.server_port}/search/repositories"
+
+def page_at_a_time(search_url, languages, top_n, per_page, max_pages):
+    """Follow 'next' sequentially, keep every repo, sort at the end"""
+    client = TrendingClient(search_url, concurrency=1)
+    stats = {}
+    for language in languages:
+        repos, pages = [], 0
+        response = client.first_page(language, per_page)
+        while response.status_code == 200:
+            pages += 1
+            repos.extend(r for r in map(normalize_repo, response.json()["items"]) if r)
+            nxt = response.links.get("next")
+            if not nxt or pages >= max_pages:
+                break
+            response = client.get(nxt["url"])
+        lang_stats = LanguageStats(language, top_n)
+        lang_stats.pages = pages
+        for repo in sorted(repos, key=lambda r: (-r["forks_count"], r["full_name"])):
+            lang_stats.add(repo)
+        stats[language] = lang_stats
+    client.close()
+    return stats, client.requests_made
+
+def summary(stats):
+    return {lang: (s.repos, s.total_stars, s.total_forks, s.over_100_issues, s.pages,
+                   [r["full_name"] for r in s.top()]) for lang, s in stats.items()}
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--languages", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=10, help="pages of --per-page per language")
+    parser.add_argument("--per-page", type=int, default=100)
+    parser.add_argument("--top", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--quota", type=int, default=60, help="requests per window before 403")
+    parser.add_argument("--window", type=float, default=2.0, help="rate-limit window in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 16])
+    args = parser.parse_args()
+
+    server = StandIn(args.pages * args.per_page, args.latency_ms / 1000, args.quota, args.window)
+    languages = LANGUAGES[:args.languages]
+    (expected, requests_made), elapsed, peak = measure(
+        lambda: page_at_a_time(server.search_url, languages, args.top, args.per_page, args.pages))
+    rows = [("page at a time, keep all", elapsed, requests_made, peak)]
+    agree = True
+    for concurrency in args.concurrency:
+        client = TrendingClient(server.search_url, concurrency=concurrency)
+        (stats, errors), elapsed, peak = measure(
+            lambda: trending(languages, args.top, args.per_page, args.pages, concurrency, client))
+        client.close()
+        rows.append((f"streaming, {concurrency} in flight", elapsed, client.requests_made, peak))
+        agree = agree and not errors and summary(stats) == summary(expected)
+
+    _, errors = trending(["not-a-language"], client=TrendingClient(server.search_url))
+    agree = agree and "not-a-language" in errors
+    server.httpd.shutdown()
+
+    print(f"{len(languages)} languages x {args.pages} pages of {args.per_page}, top {args.top}, "
+          f"{args.latency_ms:g} ms latency, {args.quota} requests per {args.window:g}s")
+    print(f"{'mode':28s} {'seconds':>8s} {'requests':>9s} {'peak KiB':>9s}")
+    for name, elapsed, requests_made, peak in rows:
+        print(f"{name:28s} {elapsed:8.2f} {requests_made:9d} {peak / 1024:9.0f}")
+    print(f"403s from the quota: {server.limited}")
+    print(f"results agree: {agree}")
+    if not agree:
+        raise SystemExit("streaming results differ from the page-at-a-time baseline")
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,252 @@
-import requests
-import time
+import argparse
+import heapq
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 
+# Shared helpers live one directory up, next to getrepos/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ghclient import GitHubClient
+from httpcache import DEFAULT_PATH as CACHE_PATH, ResponseCache
 
-# unifinised bc this bitch thing wants me to parse thro like 343379.04 pages of data 
+SEARCH_URL = "https://api.github.com/search/repositories"
+MAX_SEARCH_RESULTS = 1000  # the Search API stops paging after this many items
+
+def normalize_repo(item):
+    """The fields the dashboard uses, or None if the item is missing or has malformed counts"""
+    if not isinstance(item, dict):
+        return None
+    counts = [item.get(k) for k in ('stargazers_count', 'forks_count', 'open_issues_count')]
+    if not item.get('full_name') or not all(isinstance(c, int) for c in counts):
+        return None
+    return {
+        'full_name': item['full_name'],
+        'stargazers_count': counts[0],
+        'forks_count': counts[1],
+        'open_issues_count': counts[2],
+        'created_at': item.get('created_at'),
+        'owner.login': (item.get('owner') or {}).get('login'),
+    }
+
+@dataclass
+class LanguageStats:
+    """Running aggregates for one language, plus a bounded min-heap of the top repos by forks.
+
+    Search results can shift between pages while we read them, so a repo
+    may turn up twice; only its first appearance is counted.
+    """
+    language: str
+    top_n: int = 5
+    repos: int = 0
+    skipped: int = 0
+    total_stars: int = 0
+    total_forks: int = 0
+    over_100_issues: int = 0
+    total_count: int = 0       # what the search says exists, not what was read
+    pages: int = 0
+    failed_pages: int = 0
+    duplicates: int = 0
+    _top: list = field(default_factory=list, repr=False)
+    _seen: set = field(default_factory=set, repr=False)
+
+    def add(self, item):
+        repo = normalize_repo(item)
+        if repo is None:
+            self.skipped += 1
+            return
+        key = item.get('id', repo['full_name'])
+        if key in self._seen:
+            self.duplicates += 1
+            return
+        self._seen.add(key)
+        self.repos += 1
+        self.total_stars += repo['stargazers_count']
+        self.total_forks += repo['forks_count']
+        self.over_100_issues += repo['open_issues_count'] > 100
+        # ties on forks go to the name that sorts first
+        entry = (repo['forks_count'], _Desc(repo['full_name']), repo)
+        if len(self._top) < self.top_n:
+            heapq.heappush(self._top, entry)
+        elif entry[:2] > self._top[0][:2]:
+            heapq.heapreplace(self._top, entry)
+
+    def add_page(self, items):
+        self.pages += 1
+        for item in items:
+            self.add(item)
+
+    @property
+    def avg_stars(self):
+        return self.total_stars / self.repos if self.repos else 0.0
+
+    @property
+    def pct_over_100_issues(self):
+        return 100 * self.over_100_issues / self.repos if self.repos else 0.0
+
+    def top(self):
+        return [repo for _, _, repo in sorted(self._top, key=lambda e: e[:2], reverse=True)]
+
+class _Desc(str):
+    """Reverses string order inside the heap, so equal fork counts keep the alphabetically first name"""
+    def __lt__(self, other):
+        return str.__gt__(self, other)
+
+    def __gt__(self, other):
+        return str.__lt__(self, other)
+
+class TrendingClient(GitHubClient):
+    def __init__(self, search_url=SEARCH_URL, token=None, concurrency=4, max_retries=5, cache=None):
+        super().__init__(token, concurrency, max_retries, cache)
+        self.search_url = search_url
+
+    def first_page(self, language, per_page):
+        params = {'q': f'language:{language}', 'sort': 'stars', 'order': 'desc', 'per_page': per_page}
+        return self.get(self.search_url, params)
+
+def page_url(url, page):
+    parts = urlparse(url)
+    query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+    query['page'] = page
+    return urlunparse(parts._replace(query=urlencode(query)))
+
+def last_page(response):
+    last = response.links.get('last')
+    if not last:
+        return None
+    return int(parse_qs(urlparse(last['url']).query).get('page', ['1'])[0])
+
+def describe_error(response, language):
+    if response.status_code == 403:
+        return f"Access denied for {language} ({response.status_code})"
+    if response.status_code == 404:
+        return f"Not found for {language} ({response.status_code})"
+    if response.status_code == 422:
+        return f"Invalid language {language!r} ({response.status_code})"
+    return f"Error for {language}: status code ({response.status_code})"
+
+def trending(languages, top_n=5, per_page=100, max_pages=10, concurrency=4, client=None):
+    """Stream search results for several languages into per-language LanguageStats.
+
+    The first page of each language tells us (from its Link header) how many
+    pages there are; the rest are fetched concurrently and folded in as they
+    arrive. Without a 'last' link we follow 'next' one page at a time.
+    Only the top_n heap is kept per language, never the pages themselves.
+    """
+    own_client = client is None
+    client = client or TrendingClient(concurrency=concurrency)
+    stats = {lang: LanguageStats(lang, top_n) for lang in languages}
+    errors = {}
+    page_cap = min(max_pages, MAX_SEARCH_RESULTS // per_page)
+
+    def first(language):
+        return language, None, client.first_page(language, per_page)
+
+    def fetch(language, url):
+        return language, url, client.get(url)
+
+    def fold(language, url, response):
+        """Fold one page into its language's stats; returns the page URLs to queue next"""
+        lang_stats = stats[language]
+        data = None
+        if response.status_code == 200:
+            try:
+                data = response.json()
+            except ValueError:
+                pass
+        if not isinstance(data, dict) or not isinstance(data.get('items') or [], list):
+            if url is None:
+                errors[language] = (describe_error(response, language) if response.status_code != 200
+                                    else f"Malformed response for {language}")
+            else:
+                lang_stats.failed_pages += 1
+            return []
+        lang_stats.total_count = data.get('total_count', 0)
+        lang_stats.add_page(data.get('items') or [])
+        last = last_page(response)
+        if url is None and last is not None:
+            return [page_url(response.links['last']['url'], page) for page in range(2, min(last, page_cap) + 1)]
+        nxt = response.links.get('next')
+        if nxt and last is None and lang_stats.pages < page_cap:
+            return [nxt['url']]
+        return []
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            pending = {pool.submit(first, language) for language in languages}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    language, url, response = future.result()
+                    pending.update(pool.submit(fetch, language, next_url)
+                                   for next_url in fold(language, url, response))
+    finally:
+        if own_client:
+            client.close()
+    return stats, errors
+
+def print_report(lang_stats):
+    print(f"Language: {lang_stats.language}")
+    if not lang_stats.repos:
+        print("No repositories found; is that a real language?")
+        print()
+        return
+    print(f"Top {lang_stats.top_n} Repositories by Forks:")
+    for rank, repo in enumerate(lang_stats.top(), 1):
+        created = (repo['created_at'] or '')[:10]
+        print(f"{rank}. {repo['full_name']}: ⭐ {repo['stargazers_count']} | 🍴 {repo['forks_count']} | "
+              f"🐛 {repo['open_issues_count']} issues | Created: {created} | Owner: {repo['owner.login']}")
+    print()
+    print(f"Aggregate Stats ({lang_stats.repos} repos read from {lang_stats.pages} pages, "
+          f"{lang_stats.total_count:,} matching):")
+    print(f"⭐ Average stars: {lang_stats.avg_stars:,.0f}")
+    print(f"🍴 Total forks: {lang_stats.total_forks:,}")
+    print(f"🐛 Repos with >100 issues: {lang_stats.over_100_issues}/{lang_stats.repos} "
+          f"({lang_stats.pct_over_100_issues:.0f}%)")
+    if lang_stats.skipped:
+        print(f"Skipped {lang_stats.skipped} malformed repos")
+    if lang_stats.duplicates:
+        print(f"Ignored {lang_stats.duplicates} repos seen on an earlier page")
+    if lang_stats.failed_pages:
+        print(f"{lang_stats.failed_pages} pages failed; aggregates cover the pages that came back")
+    print()
 
 def top50lang(LANGUAGE):
-    url = f"https://api.github.com/search/repositories?q=language:{LANGUAGE}&sort=stars&order=desc&per_page=50"
-    response = requests.get(url)
-    if response.status_code == 200:
-        data = response.json()
-        # print(data.keys()) 
-        # dict_keys(['total_count', 'incomplete_results', 'items'])
-        repodata = data['items']
-        repos = []
-        total_stars = 0
-        total_forks = 0
-        total_repos = data['total_count']
-        num_over_100_issues = 0
-        for i in repodata:
-            j = {
-                'full_name': i.get('full_name'),
-                'stargazers_count': i.get('stargazers_count'),
-                'forks_count': i.get('forks_count'),
-                'open_issues_count': i.get('open_issues_count'),
-                'created_at': i.get('created_at'),
-                'owner.login': i.get('owner.login')
-            }
-            total_forks += i.get('forks_count')
-            total_stars += i.get('stargazers_count')
-            num_over_100_issues += 1 if i.get('open_issues_count')>100 else 0
-            time.sleep(0.07)
-            print("Item added to repos")
-            print(j)
-            repos.append(j)
-        print(len(repos))
-        print(total_repos)
-        avg_stars = total_stars / total_repos
-        percent_over_100_issues = num_over_100_issues / total_repos
-
-
-    elif response.status_code == 403:
-        print(f"Access denied ({response.status_code})")
-    elif response.status_code == 404:
-        print(f"Not found ({response.status_code})")
-    else: 
-        print(f"Error: Access code ({response.status_code})")
-
-    
-    
-top50lang('python')
\ No newline at end of file
+    stats, errors = trending([LANGUAGE], per_page=50, max_pages=1)
+    if LANGUAGE in errors:
+        print(errors[LANGUAGE])
+        return None
+    print_report(stats[LANGUAGE])
+    return stats[LANGUAGE]
+
+def main():
+    parser = argparse.ArgumentParser(description="Trending GitHub repos by language")
+    parser.add_argument('languages', nargs='*', default=['python'])
+    parser.add_argument('--top', type=int, default=5, help="repos to list per language, by forks")
+    parser.add_argument('--per-page', type=int, default=100)
+    parser.add_argument('--max-pages', type=int, default=10, help="per language; search stops at 1000 results")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--search-url', default=SEARCH_URL)
+    parser.add_argument('--cache-path', default=CACHE_PATH, help="conditional-request cache (sqlite)")
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else ResponseCache(args.cache_path)
+    client = TrendingClient(args.search_url, concurrency=args.concurrency, cache=cache)
+    try:
+        stats, errors = trending(args.languages, args.top, args.per_page, args.max_pages,
+                                 args.concurrency, client)
+    finally:
+        client.close()
+    for language in args.languages:
+        if language in errors:
+            print(errors[language])
+        else:
+            print_report(stats[language])
+    if cache is not None:
+        print(cache.summary())
+        cache.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""GitHub API client shared by getrepos/ and gettrendingrepos/.
+
+GitHubClient wraps a pooled session (with the conditional-request cache
+from httpcache.py when one is given), sends the token from GITHUB_TOKEN
+if set, and keeps every worker thread inside the quota GitHub reports:
+RateLimitGate budgets X-RateLimit-Remaining across threads and holds them
+all until X-RateLimit-Reset, and Retry-After is honoured for secondary
+limits. Only requests that reach the server take from the budget; fresh
+cache hits cost nothing, and a 304's headers restore whatever the local
+count over-spent.
+"""
+import math
+import os
+import threading
+import time
+
+import requests
+
+from httpcache import cached_session
+
+def _header_number(headers, name):
+    """A numeric header as a float, or None if it is missing or malformed"""
+    try:
+        value = float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+class RateLimitGate:
+    """Shared by all workers: budgets the quota GitHub reports and holds requests once it is spent"""
+    def __init__(self):
+        self.remaining = None   # requests left in the current window, as far as we know
+        self.reset_at = 0.0
+        self.hold_until = 0.0   # Retry-After from a secondary limit
+        self.in_flight = 0      # acquired, no response folded in yet
+        self.waits = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one request from the budget, waiting for the reset (or Retry-After) if it is spent"""
+        while True:
+            with self._lock:
+                now = time.time()
+                if now >= self.reset_at and self.remaining == 0:
+                    self.remaining = None  # new window; the next response says how big it is
+                if now >= self.hold_until and (self.remaining is None or self.remaining > 0):
+                    if self.remaining is not None:
+                        self.remaining -= 1
+                    self.in_flight += 1
+                    return
+                delay = max(self.hold_until, self.reset_at if self.remaining == 0 else 0) - now
+                self.waits += 1
+            time.sleep(max(delay, 0))
+
+    def update(self, remaining, reset_at):
+        """Fold in an acquired request's X-RateLimit-Remaining / -Reset.
+
+        The server's count is taken as it is, less the requests still in
+        flight; a response from an earlier window only ends its request.
+        """
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            if reset_at >= self.reset_at or self.remaining is None:
+                self.reset_at, self.remaining = reset_at, max(0, remaining - self.in_flight)
+
+    def release(self):
+        """An acquired request ended without quota headers; its share of the budget stays spent"""
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+
+    def pause_until(self, timestamp):
+        with self._lock:
+            self.hold_until = max(timestamp, self.hold_until)
+
+class GitHubClient:
+    """Pooled (optionally cached) session for the GitHub API that stays inside its rate limits"""
+    def __init__(self, token=None, concurrency=4, max_retries=5, cache=None, timeout=30):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout  # seconds to connect and per read; a stalled request is retried
+        self.gate = RateLimitGate()
+        self.requests_made = 0  # ones that reached the server, 304s included
+        self.cache = cache
+        self._upstream = threading.local()
+        self._count_lock = threading.Lock()
+        self.session = cached_session(cache, concurrency, on_upstream=self._going_upstream)
+        self.session.headers['Accept'] = 'application/vnd.github+json'
+        token = token or os.environ.get('GITHUB_TOKEN')
+        if token:
+            self.session.headers['Authorization'] = f'Bearer {token}'
+
+    def _going_upstream(self):
+        """Called by the caching adapter (or by get() without a cache) once a request will hit the server"""
+        self.gate.acquire()
+        self._upstream.sent = True
+        with self._count_lock:
+            self.requests_made += 1
+
+    def get(self, url, params=None):
+        """GET that stays inside the primary quota (X-RateLimit-*) and waits out Retry-After.
+
+        Timeouts and connection errors are retried with backoff; the last
+        one is raised once max_retries is spent.
+        """
+        delay = 1
+        for attempt in range(self.max_retries + 1):
+            self._upstream.sent = False
+            if self.cache is None:
+                self._going_upstream()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except Exception as e:
+                if self._upstream.sent:
+                    self.gate.release()
+                retryable = isinstance(e, (requests.exceptions.Timeout, requests.exceptions.ConnectionError))
+                if not retryable or attempt == self.max_retries:
+                    raise
+                print(f"{type(e).__name__} on {url}; retrying in {delay}s")
+                time.sleep(delay)
+                delay *= 2
+                continue
+            if not self._upstream.sent:
+                return response  # fresh from the cache: no request, no quota
+            headers = response.headers
+            remaining = _header_number(headers, 'X-RateLimit-Remaining')
+            reset_at = _header_number(headers, 'X-RateLimit-Reset')
+            if remaining is not None and reset_at is not None:
+                self.gate.update(int(remaining), reset_at)
+            else:
+                self.gate.release()
+            if response.status_code not in (403, 429) or attempt == self.max_retries:
+                return response
+            retry_after = _header_number(headers, 'Retry-After')
+            if retry_after is not None:
+                wait_until = time.time() + max(0.0, retry_after)
+                self.gate.pause_until(wait_until)
+            elif remaining != 0:
+                return response  # a plain 403: no access, not a rate limit
+            else:
+                wait_until = self.gate.reset_at
+            print(f"Rate limited; waiting {max(0, wait_until - time.time()):.0f}s")
+        return response
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,226 @@
+"""Disk-backed conditional-request cache for the GitHub API scripts.
+
+CachingAdapter is a requests transport adapter, so a script only has to
+mount it on its session. GET responses that carry an ETag or Last-Modified
+are stored in a sqlite file. The next request for the same URL goes out
+with If-None-Match / If-Modified-Since, and a 304 (which GitHub does not
+charge against the rate limit) is answered with the stored body. Within a
+response's Cache-Control max-age no request is made at all.
+
+The cache is bounded by entry count and by stored bytes; the least
+recently used entries are evicted first. Bodies are zlib-compressed.
+`cache.stats` counts hits (no request), revalidations (304), misses and
+evictions.
+
+    session = cached_session(ResponseCache())
+    session.get("https://api.github.com/repos/psf/requests")
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger(__name__)
+
+# Kept out of the source tree; GITHUB_CACHE_PATH overrides
+DEFAULT_PATH = os.environ.get("GITHUB_CACHE_PATH", os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "github-scripts", "github_cache.db"))
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Not meaningful once the body has been decoded and stored
+_BODY_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+# Describe the quota at the time of the original request, not now
+_QUOTA_PREFIX = "x-ratelimit-"
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+def freshness(headers) -> float:
+    """Seconds a response may be reused without asking (Cache-Control max-age), 0 for no-cache"""
+    cache_control = headers.get("Cache-Control", "").lower()
+    if "no-cache" in cache_control or "no-store" in cache_control:
+        return 0.0
+    match = _MAX_AGE_RE.search(cache_control)
+    return float(match.group(1)) if match else 0.0
+
+class ResponseCache:
+    """sqlite table of responses keyed by URL (plus the credentials they were fetched with)"""
+    def __init__(self, path: str = DEFAULT_PATH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats: Counter = Counter()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " url TEXT NOT NULL,"
+            " headers TEXT NOT NULL,"
+            " body BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " last_used REAL NOT NULL"
+            ")"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+        self.entries, self.bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+
+    @staticmethod
+    def key(request: requests.PreparedRequest) -> str:
+        # responses vary by credentials and media type; never share one token's data with another
+        vary = "\n".join([request.headers.get("Accept", ""), request.headers.get("Authorization", "")])
+        return f"{request.url}#{hashlib.blake2b(vary.encode(), digest_size=8).hexdigest()}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT headers, body, stored_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        headers, body, stored_at = row
+        return {"headers": json.loads(headers), "body": zlib.decompress(body), "stored_at": stored_at}
+
+    def put(self, key: str, url: str, headers: Dict[str, str], body: bytes) -> None:
+        packed = zlib.compress(body)
+        size = len(packed)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, url, headers, body, size, stored_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)", (key, url, json.dumps(headers), packed, size, now, now))
+            if old is None:
+                self.entries += 1
+            self.bytes += size - (old[0] if old else 0)
+            self._evict()
+            self.stats["stores"] += 1
+
+    def refresh(self, key: str, headers: Dict[str, str]) -> None:
+        """A 304 came back: keep the body, take the new validators and restart its max-age"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE responses SET headers = ?, stored_at = ? WHERE key = ?",
+                               (json.dumps(headers), time.time(), key))
+
+    def _evict(self) -> None:
+        while self.entries > self.max_entries or self.bytes > self.max_bytes:
+            excess = max(self.entries - self.max_entries, 1)
+            victims = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_used LIMIT ?", (excess,)).fetchall()
+            if not victims:
+                break
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", [(k,) for k, _ in victims])
+            self.entries -= len(victims)
+            self.bytes -= sum(size for _, size in victims)
+            self.stats["evictions"] += len(victims)
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+            self.entries = self.bytes = 0
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"cache: {s['hits']} hits, {s['revalidated']} revalidated (304), {s['misses']} misses, "
+                f"{s['evictions']} evicted; {self.entries} entries, {self.bytes / 1024:.0f} KiB on disk")
+
+    def close(self) -> None:
+        self._conn.close()
+
+class CachingAdapter(HTTPAdapter):
+    """HTTPAdapter that answers GETs from a ResponseCache, revalidating with the stored validators.
+
+    `on_upstream`, if given, is called just before a request actually goes
+    to the server (a miss or a revalidation), never for a fresh hit.
+    """
+    def __init__(self, cache: ResponseCache, on_upstream: Optional[Callable[[], None]] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.on_upstream = on_upstream
+
+    def _upstream(self, request, **kwargs):
+        if self.on_upstream is not None:
+            self.on_upstream()
+        return super().send(request, **kwargs)
+
+    def send(self, request, stream=False, **kwargs):
+        if request.method != "GET" or stream:
+            return self._upstream(request, stream=stream, **kwargs)
+        cache = self.cache
+        key = cache.key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            headers = entry["headers"]
+            if time.time() - entry["stored_at"] < freshness(headers):
+                cache.count("hits")
+                served = {k: v for k, v in headers.items() if not k.lower().startswith(_QUOTA_PREFIX)}
+                return self._from_cache(request, served, entry["body"])
+            request = request.copy()
+            if "ETag" in headers:
+                request.headers["If-None-Match"] = headers["ETag"]
+            if "Last-Modified" in headers:
+                request.headers["If-Modified-Since"] = headers["Last-Modified"]
+
+        response = self._upstream(request, stream=stream, **kwargs)
+        if entry is not None and response.status_code == 304:
+            cache.count("revalidated")
+            headers = CaseInsensitiveDict(entry["headers"])
+            headers.update({k: v for k, v in response.headers.items() if k.lower() not in _BODY_HEADERS})
+            headers = dict(headers)
+            cache.refresh(key, headers)
+            return self._from_cache(request, headers, entry["body"])
+        cache.count("misses")
+        if response.status_code == 200 and ("ETag" in response.headers or "Last-Modified" in response.headers
+                                            or freshness(response.headers)):
+            stored = {k: v for k, v in response.headers.items() if k.lower() not in _BODY_HEADERS}
+            cache.put(key, request.url, stored, response.content)
+        return response
+
+    def _from_cache(self, request, headers, body) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+def cached_session(cache: Optional[ResponseCache] = None, pool_maxsize: int = 10,
+                   on_upstream: Optional[Callable[[], None]] = None) -> requests.Session:
+    """Session with a CachingAdapter on http:// and https:// (plain pooling if cache is None)"""
+    session = requests.Session()
+    if cache is None:
+        adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+    else:
+        adapter = CachingAdapter(cache, on_upstream, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -0,0 +1,117 @@
+"""Benchmark batch issue operations against a local stand-in issues API.
+
+Runs a triage batch (creates, title updates, deletes) one request at a
+time and then with bounded concurrency. The stand-in adds latency and
+answers 429 with Retry-After above a request rate, so backoff is
+exercised. Reports time, throughput and per-item outcomes.
+
+    python bench_issues.py --issues 5000 --latency-ms 5 --concurrency 32 --max-rps 2000
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from issuetracker import triage
+
+class StandIn:
+    """/posts endpoints shaped like jsonplaceholder, with latency and a request-rate cap"""
+    def __init__(self, latency: float, max_rps: float):
+        self.latency = latency
+        self.max_rps = max_rps
+        self.window = 0
+        self.count = 0
+        self.throttled = 0
+        self.next_id = 101
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status, payload=None, headers=None):
+                body = json.dumps(payload).encode() if payload is not None else b""
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def read_json(self):
+                length = int(self.headers.get("Content-Length", 0))
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def admit(self):
+                time.sleep(server.latency)
+                with server.lock:
+                    window = int(time.monotonic())
+                    if window != server.window:
+                        server.window, server.count = window, 0
+                    server.count += 1
+                    if server.max_rps and server.count > server.max_rps:
+                        server.throttled += 1
+                        self.reply(429, {"error": "rate limited"}, {"Retry-After": "1"})
+                        return False
+                return True
+
+            def do_POST(self):
+                body = self.read_json()
+                if self.admit():
+                    with server.lock:
+                        issue_id = server.next_id
+                        server.next_id += 1
+                    self.reply(201, {**body, "id": issue_id})
+
+            def do_PATCH(self):
+                body = self.read_json()
+                if self.admit():
+                    self.reply(200, {"id": int(self.path.rsplit("/", 1)[-1]), **body})
+
+            def do_DELETE(self):
+                if self.admit():
+                    self.reply(200, {})
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.httpd.server_port}/posts"
+
+def batch(n: int):
+    creates = [(i % 10 + 1, f"issue {i}", "found during triage") for i in range(n * 2 // 5)]
+    updates = [(i, f"[triaged] issue {i}") for i in range(1, n * 2 // 5 + 1)]
+    deletes = list(range(1, n - len(creates) - len(updates) + 1))
+    return creates, updates, deletes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--issues", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=5)
+    parser.add_argument("--max-rps", type=float, default=0, help="stand-in rate cap (0 = none)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    server = StandIn(args.latency_ms / 1000, args.max_rps)
+    creates, updates, deletes = batch(args.issues)
+    for concurrency in args.concurrency:
+        throttled = server.throttled
+        start = time.perf_counter()
+        results = triage(creates, updates, deletes, concurrency=concurrency, base_url=server.base)
+        elapsed = time.perf_counter() - start
+        items = [r for op in results.values() for r in op]
+        ok = sum(r.ok for r in items)
+        print(f"concurrency {concurrency:3d}: {len(items)} issues in {elapsed:6.2f}s "
+              f"({len(items) / elapsed:7.1f}/s), ok {ok}, failed {len(items) - ok}, "
+              f"429s {server.throttled - throttled}")
+        if any(r.key != i for i, r in enumerate(results["create"])):
+            raise SystemExit("create results out of input order")
+    server.httpd.shutdown()
+
+if __name__ == "__main__":
+    main()
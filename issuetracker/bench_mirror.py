@@ -0,0 +1,174 @@
+"""Benchmark the local issue mirror against asking the API every time.
+
+A local stand-in serves a synthetic /posts collection (with userId
+filtering and ETags). The benchmark compares per-user listing over HTTP
+with the mirror, and keyword search by linear scan with the inverted
+index. It also times a cold start (full download) against loading from
+disk plus a 304 refresh, and an incremental refresh after some churn,
+checking along the way that the mirror agrees with the server.
+
+    python bench_mirror.py --issues 50000 --users 500 --latency-ms 5
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from mirror import IssueMirror, tokenize
+
+SYLLABLES = "ba ce di fo gu ka le mi no pu ra se ti vo zu".split()
+WORDS = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES][:3000]
+
+class StandIn:
+    """jsonplaceholder-shaped /posts with ETag / If-None-Match"""
+    def __init__(self, issues: int, users: int, latency: float, seed: int = 1):
+        self.rng = random.Random(seed)
+        self.users = users
+        self.posts = {i: self.make(i) for i in range(1, issues + 1)}
+        self.latency = latency
+        self.hits = 0
+        self._body = None
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.hits += 1
+                time.sleep(server.latency)
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                if url.path != "/posts":
+                    self.send_error(404)
+                    return
+                if "userId" in query:
+                    user_id = int(query["userId"])
+                    body, etag = json.dumps([p for p in server.posts.values() if p["userId"] == user_id]).encode(), None
+                else:
+                    body, etag = server.collection()
+                    if self.headers.get("If-None-Match") == etag:
+                        self.send_response(304)
+                        self.send_header("ETag", etag)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if etag:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.httpd.server_port}/posts"
+
+    def make(self, issue_id):
+        words = lambda n: " ".join(self.rng.choice(WORDS) for _ in range(n))
+        return {"userId": self.rng.randint(1, self.users), "id": issue_id, "title": words(5), "body": words(25)}
+
+    def collection(self):
+        if self._body is None:
+            body = json.dumps(list(self.posts.values())).encode()
+            self._body = body, f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        return self._body
+
+    def churn(self, n):
+        ids = self.rng.sample(sorted(self.posts), n * 3)
+        for issue_id in ids[:n]:
+            self.posts[issue_id]["title"] = " ".join(self.rng.choice(WORDS) for _ in range(5))
+        for issue_id in ids[n:2 * n]:
+            del self.posts[issue_id]
+        next_id = max(self.posts) + 1
+        for issue_id in range(next_id, next_id + n):
+            self.posts[issue_id] = self.make(issue_id)
+        self._body = None
+
+def linear_search(posts, query, user_id=None):
+    tokens = tokenize(query)
+    return [p for p in posts if (user_id is None or p["userId"] == user_id)
+            and tokens <= tokenize(p["title"]) | tokenize(p["body"])]
+
+def timed(fn, *args, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(*args)
+    return result, (time.perf_counter() - start) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--issues", type=int, default=50000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=5)
+    parser.add_argument("--churn", type=int, default=500, help="issues edited, deleted and added before refresh")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    server = StandIn(args.issues, args.users, args.latency_ms / 1000)
+    path = os.path.join(tempfile.mkdtemp(prefix="issue-mirror-"), "mirror.json")
+    rng = random.Random(2)
+    queries = [(" ".join(rng.sample(WORDS, 2)), rng.choice([None, rng.randint(1, args.users)]))
+               for _ in range(args.queries)]
+    rows = []
+    ok = True
+
+    mirror = IssueMirror(path, server.base)
+    counts, cold = timed(mirror.refresh)
+    rows.append(("cold start: full download", cold, f"{counts['added']} issues"))
+    mirror.close()
+
+    mirror, load = timed(IssueMirror, path, server.base)
+    hits = server.hits
+    counts, revalidate = timed(mirror.refresh)
+    ok = ok and counts is None and server.hits == hits + 1
+    rows.append(("warm start: load + 304", load + revalidate, f"load {load * 1000:.0f} ms"))
+
+    session = requests.Session()
+    sample = [rng.randint(1, args.users) for _ in range(50)]
+    over_http, http_time = timed(lambda: [session.get(server.base, params={"userId": u}).json() for u in sample])
+    local, local_time = timed(lambda: [mirror.list_issues(u) for u in sample], repeat=20)
+    ok = ok and over_http == local
+    rows.append(("list_issues over HTTP", http_time / len(sample), "per call"))
+    rows.append(("list_issues from mirror", local_time / len(sample), "per call"))
+
+    posts = list(mirror.issues.values())
+    scanned, scan_time = timed(lambda: [linear_search(posts, q, u) for q, u in queries[:20]])
+    indexed, index_time = timed(lambda: [mirror.search(q, u) for q, u in queries], repeat=5)
+    ok = ok and scanned == indexed[:20]
+    rows.append(("search by linear scan", scan_time / 20, "per query"))
+    rows.append(("search from inverted index", index_time / len(queries), "per query"))
+
+    server.churn(args.churn)
+    counts, incremental = timed(mirror.refresh)
+    rows.append(("refresh after churn", incremental, ", ".join(f"{k} {v}" for k, v in counts.items())))
+    fresh = IssueMirror(None, server.base)
+    fresh.refresh()
+    ok = ok and mirror.issues == fresh.issues and \
+        all(mirror.search(q, u) == fresh.search(q, u) for q, u in queries)
+    mirror.close()
+    server.httpd.shutdown()
+
+    print(f"{args.issues} issues, {args.users} users, {args.latency_ms:g} ms latency")
+    print(f"{'operation':30s} {'ms':>10s}")
+    for name, elapsed, note in rows:
+        print(f"{name:30s} {elapsed * 1000:10.3f}  {note}")
+    print(f"mirror agrees with server: {ok}")
+    if not ok:
+        raise SystemExit("mirror disagrees with the server")
+
+if __name__ == "__main__":
+    main()
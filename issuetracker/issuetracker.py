@@ -1,7 +1,20 @@
 import requests
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Optional
+from requests.adapters import HTTPAdapter
 
-def list_issues(user_id):
+ISSUES_URL = 'https://jsonplaceholder.typicode.com/posts'
+# Seconds per batch request (connect and each read); one stalled request must not hang a batch
+BATCH_TIMEOUT = 10
+
+def list_issues(user_id, mirror=None):
+    if mirror is not None:  # answered from a local IssueMirror (mirror.py), no request
+        for i in mirror.list_issues(user_id):
+            print(f"Issue ID: {i['id']} | Title: {i['title']}")
+        return
     url = 'https://jsonplaceholder.typicode.com/posts'
     params = {'userId': user_id}
     response = requests.get(url, params = params)
@@ -46,10 +59,124 @@ def delete_issue(issue_id):
     if response.status_code == 200:
         print(f"Deleted issue {issue_id} successfully")
 
-def rate_limit(url):
-    response = requests.get(url)
-    if response.status_code == 429:
-        retry_after = int(response.headers.get("Retry-After", 5))  # default 5 seconds
+class ThrottleGate:
+    """Shared pause for a batch: one 429 holds every worker until Retry-After passes"""
+    def __init__(self):
+        self.resume_at = 0.0
+        self.hits = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        delay = self.resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def pause(self, seconds):
+        with self._lock:
+            self.hits += 1
+            self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+def retry_after_seconds(response, default=5):
+    try:
+        return max(0, int(response.headers.get("Retry-After", default)))
+    except ValueError:  # HTTP-date form
+        return default
+
+def rate_limit(url, method='GET', session=None, gate=None, max_retries=5, **kwargs):
+    """Send a request, waiting out 429s (Retry-After) up to max_retries times"""
+    http = session or requests
+    for attempt in range(max_retries + 1):
+        if gate is not None:
+            gate.wait()
+        response = http.request(method, url, **kwargs)
+        if response.status_code != 429 or attempt == max_retries:
+            return response
+        retry_after = retry_after_seconds(response)  # default 5 seconds
         print(f"Rate limit hit. Retrying in {retry_after} seconds...")
-        time.sleep(retry_after)
-        #continue
\ No newline at end of file
+        if gate is not None:
+            gate.pause(retry_after)
+        else:
+            time.sleep(retry_after)
+
+# Batch operations: many issues over one pooled session
+@dataclass
+class IssueResult:
+    op: str                      # 'create', 'update' or 'delete'
+    key: Any                     # issue id, or the index of the create in its batch
+    ok: bool
+    status_code: Optional[int] = None
+    data: Optional[dict] = None  # response body when there is one
+    error: Optional[str] = None
+
+def make_session(pool_size):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def _run_batch(op, items, send, concurrency, session, timeout=BATCH_TIMEOUT, key_of=lambda item: item):
+    own_session = session is None
+    session = session or make_session(concurrency)
+    gate = ThrottleGate()
+
+    def run(item):
+        try:
+            key, method, url, kwargs, expected = send(item)
+        except (TypeError, ValueError, KeyError, IndexError) as e:  # a malformed item fails alone
+            return IssueResult(op, key_of(item), False, error=f"Malformed {op} item {item!r}: {e!r}")
+        try:
+            response = rate_limit(url, method, session=session, gate=gate, timeout=timeout, **kwargs)
+        except requests.exceptions.RequestException as e:
+            return IssueResult(op, key, False, error=str(e))
+        except (TypeError, ValueError) as e:  # payload that can't be encoded
+            return IssueResult(op, key, False, error=f"Malformed {op} item {item!r}: {e}")
+        ok = response.status_code in expected
+        try:
+            data = response.json() if response.content else None
+        except ValueError:
+            data = None
+        return IssueResult(op, key, ok, response.status_code, data,
+                           None if ok else f"HTTP {response.status_code}: {response.text[:200]}")
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return list(pool.map(run, items))
+    finally:
+        if own_session:
+            session.close()
+
+def create_issues(issues, concurrency=16, session=None, base_url=ISSUES_URL, timeout=BATCH_TIMEOUT):
+    """issues: iterable of (user_id, title, body); results keep input order"""
+    def send(item):
+        index, (user_id, title, body) = item
+        return index, 'POST', base_url, {'json': {"userId": user_id, "title": title, "body": body}}, (201,)
+    return _run_batch('create', enumerate(issues), send, concurrency, session, timeout,
+                      key_of=lambda item: item[0])
+
+def update_issue_titles(updates, concurrency=16, session=None, base_url=ISSUES_URL, timeout=BATCH_TIMEOUT):
+    """updates: iterable of (issue_id, new_title)"""
+    def send(item):
+        issue_id, new_title = item
+        return issue_id, 'PATCH', f'{base_url}/{issue_id}', {'json': {'title': new_title}}, (200,)
+    return _run_batch('update', updates, send, concurrency, session, timeout)
+
+def delete_issues(issue_ids, concurrency=16, session=None, base_url=ISSUES_URL, timeout=BATCH_TIMEOUT):
+    """issue_ids: iterable of ids to delete"""
+    def send(issue_id):
+        if not isinstance(issue_id, (int, str)):
+            raise TypeError(f"issue id must be an int or str, not {type(issue_id).__name__}")
+        return issue_id, 'DELETE', f'{base_url}/{issue_id}', {}, (200, 204)
+    return _run_batch('delete', issue_ids, send, concurrency, session, timeout)
+
+def triage(creates=(), updates=(), deletes=(), concurrency=16, base_url=ISSUES_URL, timeout=BATCH_TIMEOUT):
+    """Run a whole triage batch over one session; {'create': [...], 'update': [...], 'delete': [...]}"""
+    session = make_session(concurrency)
+    try:
+        return {
+            'create': create_issues(creates, concurrency, session, base_url, timeout),
+            'update': update_issue_titles(updates, concurrency, session, base_url, timeout),
+            'delete': delete_issues(deletes, concurrency, session, base_url, timeout),
+        }
+    finally:
+        session.close()
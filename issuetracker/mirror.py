@@ -0,0 +1,208 @@
+"""Opt-in local mirror of the issues (posts) collection.
+
+The mirror keeps every issue in memory with two indexes on top: userId ->
+issue ids, and an inverted index of lower-cased title/body tokens -> issue
+ids. Listing a user's issues or searching by keyword is then a few set
+operations instead of an API round trip.
+
+refresh() is conditional (If-None-Match / If-Modified-Since), so an
+unchanged collection costs one 304. When the collection did change, only
+the issues that were added, edited or removed are re-indexed. A failed
+refresh raises RefreshError and leaves the mirror as it was. State
+(validators, issues and the token index) is saved as JSON under the user
+cache dir, written to a temp file and swapped in with os.replace, so the
+next start loads it instead of downloading everything again.
+
+    mirror = IssueMirror()
+    mirror.refresh()
+    mirror.search('qui est', user_id=3)
+"""
+import json
+import os
+import re
+import time
+from collections import defaultdict
+
+import requests
+
+from issuetracker import ISSUES_URL, make_session, rate_limit
+
+# Kept out of the source tree; ISSUES_MIRROR_PATH overrides
+MIRROR_PATH = os.environ.get('ISSUES_MIRROR_PATH', os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'issuetracker', 'issues_mirror.json'))
+FORMAT_VERSION = 2
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def tokenize(text):
+    return set(TOKEN_RE.findall((text or '').lower()))
+
+def issue_tokens(issue):
+    return tokenize(issue.get('title')) | tokenize(issue.get('body'))
+
+class RefreshError(Exception):
+    """The collection could not be fetched; the mirror is unchanged and may be stale"""
+
+class IssueMirror:
+    def __init__(self, path=MIRROR_PATH, base_url=ISSUES_URL, session=None, timeout=30):
+        self.path = path
+        self.base_url = base_url
+        self.timeout = timeout
+        self.session = session or make_session(1)
+        self.issues = {}                   # id -> issue
+        self.by_user = defaultdict(set)    # userId -> ids
+        self.postings = defaultdict(set)   # token -> ids
+        self.etag = None
+        self.last_modified = None
+        self.refreshed_at = None
+        self.dirty = False
+        if path:
+            self.load()
+
+    # index maintenance
+    def _add(self, issue):
+        issue_id = issue['id']
+        self.issues[issue_id] = issue
+        self.by_user[issue.get('userId')].add(issue_id)
+        for token in issue_tokens(issue):
+            self.postings[token].add(issue_id)
+
+    def _remove(self, issue_id):
+        issue = self.issues.pop(issue_id, None)
+        if issue is None:
+            return
+        _discard(self.by_user, issue.get('userId'), issue_id)
+        for token in issue_tokens(issue):
+            _discard(self.postings, token, issue_id)
+
+    def _put(self, issue):
+        if issue['id'] in self.issues:
+            self._remove(issue['id'])
+        self._add(issue)
+
+    # syncing with the API
+    def refresh(self):
+        """Conditional GET of the collection.
+
+        Returns {'added', 'changed', 'removed'} counts, or None on 304 (the
+        mirror is already current). Raises RefreshError if the request
+        fails or the body is not a list of issues.
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        try:
+            response = rate_limit(self.base_url, session=self.session, headers=headers, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            raise RefreshError(f"Mirror refresh failed: {e}") from e
+        if response.status_code == 304:
+            self.refreshed_at = time.time()
+            return None
+        if response.status_code != 200:
+            raise RefreshError(f"Mirror refresh failed with status_code {response.status_code}")
+        try:
+            fresh = {issue['id']: issue for issue in response.json()}
+        except (ValueError, TypeError, KeyError) as e:
+            raise RefreshError(f"Mirror refresh got a malformed collection: {e!r}") from e
+
+        counts = {'added': 0, 'changed': 0, 'removed': 0}
+        for issue_id in self.issues.keys() - fresh.keys():
+            self._remove(issue_id)
+            counts['removed'] += 1
+        for issue_id, issue in fresh.items():
+            old = self.issues.get(issue_id)
+            if old == issue:
+                continue
+            counts['changed' if old is not None else 'added'] += 1
+            self._put(issue)
+        self.etag = response.headers.get('ETag')
+        self.last_modified = response.headers.get('Last-Modified')
+        self.refreshed_at = time.time()
+        self.dirty = True
+        return counts
+
+    def apply(self, results):
+        """Fold IssueResults from the batch operations in, so local writes show up without a refresh"""
+        for result in results:
+            if not result.ok:
+                continue
+            if result.op == 'delete':
+                self._remove(result.key)
+            elif result.op == 'update' and result.key in self.issues:
+                self._put({**self.issues[result.key], **(result.data or {}), 'id': result.key})
+            elif result.op == 'create' and result.data and 'id' in result.data:
+                self._put(result.data)
+            else:
+                continue
+            self.dirty = True
+
+    # queries
+    def list_issues(self, user_id):
+        return [self.issues[i] for i in sorted(self.by_user.get(user_id, ()))]
+
+    def search(self, query, user_id=None):
+        """Issues whose title or body contains every word of query, by id"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        sets = sorted((self.postings.get(token, set()) for token in tokens), key=len)
+        if user_id is not None:
+            sets.insert(0, self.by_user.get(user_id, set()))
+        ids = sets[0].intersection(*sets[1:])
+        return [self.issues[i] for i in sorted(ids)]
+
+    def __len__(self):
+        return len(self.issues)
+
+    # persistence
+    def load(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+            if state.get('version') != FORMAT_VERSION:
+                return False
+            issues = {issue['id']: issue for issue in state['issues']}
+            postings = defaultdict(set, ((token, set(ids)) for token, ids in state['postings'].items()))
+            meta = state['etag'], state['last_modified'], state['refreshed_at']
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, TypeError, KeyError, AttributeError) as e:
+            print(f"Ignoring unreadable mirror {self.path}: {e!r}")
+            return False
+        self.etag, self.last_modified, self.refreshed_at = meta
+        self.issues = issues
+        self.by_user = defaultdict(set)
+        for issue_id, issue in issues.items():
+            self.by_user[issue.get('userId')].add(issue_id)
+        self.postings = postings
+        return True
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        state = {
+            'version': FORMAT_VERSION,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'refreshed_at': self.refreshed_at,
+            'issues': list(self.issues.values()),
+            'postings': {token: sorted(ids) for token, ids in self.postings.items()},
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f, separators=(',', ':'))
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def close(self):
+        self.save()
+        self.session.close()
+
+def _discard(index, key, issue_id):
+    ids = index.get(key)
+    if ids is not None:
+        ids.discard(issue_id)
+        if not ids:
+            del index[key]
@@ -0,0 +1,129 @@
+"""Benchmark posts.py's bulk and per-user modes against a local stand-in API.
+
+Serves /users and /posts (with userId filtering and _page/_limit paging)
+for a synthetic 10k-user dataset, runs each mode, checks they agree, and
+reports round trips and wall time.
+
+    python bench_posts.py --users 10000 --posts 100000 --latency-ms 2
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from posts import PostsClient, TTLCache, report
+
+class StandIn:
+    """jsonplaceholder-shaped /users and /posts over a synthetic dataset"""
+    def __init__(self, users: int, posts: int, latency: float, seed: int = 1):
+        rng = random.Random(seed)
+        self.users = [{"id": i, "name": f"User {i}"} for i in range(1, users + 1)]
+        self.posts = [{"id": i, "userId": rng.randint(1, users), "title": f"post {i}"} for i in range(1, posts + 1)]
+        self.by_user = defaultdict(list)
+        for post in self.posts:
+            self.by_user[post["userId"]].append(post)
+        self.latency = latency
+        self.hits = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.hits += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                if url.path == "/users":
+                    payload = server.users
+                elif url.path == "/posts" and "userId" in query:
+                    payload = server.by_user.get(int(query["userId"]), [])
+                elif url.path == "/posts" and "_page" in query:
+                    limit = int(query.get("_limit", 10))
+                    start = (int(query["_page"]) - 1) * limit
+                    payload = server.posts[start:start + limit]
+                elif url.path == "/posts":
+                    payload = server.posts
+                else:
+                    self.send_error(404)
+                    return
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.httpd.server_port}"
+
+def run(base, mode, page_size=None, concurrency=1, cache=None, sample=None):
+    client = PostsClient(base, cache=cache, concurrency=concurrency)
+    start = time.perf_counter()
+    if sample:
+        # sequential per-user over the full set would take minutes; time a slice
+        users = client.users()[:sample]
+        counts = client.post_counts_per_user(users)
+        rows = [(u["name"], counts.get(u["id"], 0)) for u in users]
+    else:
+        rows = report(client, mode, page_size)
+    elapsed = time.perf_counter() - start
+    client.close()
+    return rows, elapsed, client.requests_made
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--posts", type=int, default=100000)
+    parser.add_argument("--latency-ms", type=float, default=2)
+    parser.add_argument("--page-size", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--sequential-sample", type=int, default=500,
+                        help="users to time in the old one-at-a-time mode")
+    args = parser.parse_args()
+
+    server = StandIn(args.users, args.posts, args.latency_ms / 1000)
+    cache_path = os.path.join(tempfile.mkdtemp(prefix="posts-cache-"), "cache.json")
+
+    rows, seq_time, seq_requests = run(server.base, "per-user", sample=args.sequential_sample)
+    per_user_seq = seq_time / args.sequential_sample * args.users
+    expected, fanout_time, fanout_requests = run(server.base, "per-user", concurrency=args.concurrency)
+    bulk, bulk_time, bulk_requests = run(server.base, "bulk")
+    paged, paged_time, paged_requests = run(server.base, "bulk", page_size=args.page_size)
+    cold, cold_time, cold_requests = run(server.base, "bulk", cache=TTLCache(cache_path, ttl=60))
+    warm, warm_time, warm_requests = run(server.base, "bulk", cache=TTLCache(cache_path, ttl=60))
+    server.httpd.shutdown()
+
+    results = [
+        ("per-user, sequential (est.)", per_user_seq, args.users + 1),
+        (f"per-user, {args.concurrency} in flight", fanout_time, fanout_requests),
+        ("bulk, one request", bulk_time, bulk_requests),
+        (f"bulk, pages of {args.page_size}", paged_time, paged_requests),
+        ("bulk + cache, cold", cold_time, cold_requests),
+        ("bulk + cache, warm", warm_time, warm_requests),
+    ]
+    print(f"{args.users} users, {args.posts} posts, {args.latency_ms:g} ms latency")
+    print(f"{'mode':30s} {'seconds':>8s} {'round trips':>12s}")
+    for name, elapsed, requests_made in results:
+        print(f"{name:30s} {elapsed:8.2f} {requests_made:12d}")
+
+    agree = rows == expected[:args.sequential_sample] and expected == bulk == paged == cold == warm
+    print(f"all modes agree: {agree}")
+    if not agree:
+        raise SystemExit("modes disagree on post counts")
+
+if __name__ == "__main__":
+    main()
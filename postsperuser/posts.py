@@ -1,12 +1,155 @@
+import argparse
+import json
+import os
 import requests
 import time
-url = 'https://jsonplaceholder.typicode.com/users'
-response = requests.get(url)
-if response.status_code == 200:
-    data = response.json()
-    for u in data:
-        url2 = f'https://jsonplaceholder.typicode.com/posts?userId={u['id']}'
-        response2 = requests.get(url2)
-        if response2.status_code == 200:
-            data2 = response2.json()
-            print(f'{u['name']} has {len(data2)} posts.')
\ No newline at end of file
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+BASE_URL = 'https://jsonplaceholder.typicode.com'
+# Kept out of the source tree; POSTS_CACHE_PATH overrides
+CACHE_PATH = os.environ.get('POSTS_CACHE_PATH', os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'postsperuser', 'posts_cache.json'))
+
+class TTLCache:
+    """URL -> JSON body, kept in a local file so repeat reports skip the API"""
+    def __init__(self, path=CACHE_PATH, ttl=300):
+        self.path = path
+        self.ttl = ttl
+        self.entries = {}
+        self.dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def get(self, url):
+        entry = self.entries.get(url)
+        if entry is None or time.time() - entry['fetched_at'] > self.ttl:
+            return None
+        return entry['body']
+
+    def set(self, url, body):
+        self.entries[url] = {'fetched_at': time.time(), 'body': body}
+        self.dirty = True
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+class PostsClient:
+    def __init__(self, base_url=BASE_URL, cache=None, concurrency=16, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.cache = cache
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.requests_made = 0
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=concurrency)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get_json(self, path, params=None):
+        url = requests.Request('GET', f'{self.base_url}{path}', params=params).prepare().url
+        if self.cache is not None:
+            body = self.cache.get(url)
+            if body is not None:
+                return body
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            self.requests_made += 1
+            if response.status_code != 200:
+                print(f'Request failed ({response.status_code}): {url}')
+                return None
+            body = response.json()
+        except requests.exceptions.RequestException as e:
+            print(f'Request failed ({e}): {url}')
+            return None
+        except ValueError:
+            print(f'Response was not JSON: {url}')
+            return None
+        if self.cache is not None:
+            self.cache.set(url, body)
+        return body
+
+    def users(self):
+        return self.get_json('/users') or []
+
+    def post_counts_bulk(self, page_size=None):
+        """Pull the posts collection (whole, or page by page) and count by userId in one pass.
+
+        Returns None if any request failed, since partial counts would look like real ones.
+        """
+        counts = Counter()
+        if not page_size:
+            posts = self.get_json('/posts')
+            if posts is None:
+                return None
+            counts.update(post['userId'] for post in posts)
+            return counts
+        page = 1
+        while True:
+            posts = self.get_json('/posts', {'_page': page, '_limit': page_size})
+            if posts is None:
+                return None
+            counts.update(post['userId'] for post in posts)
+            if len(posts) < page_size:
+                return counts
+            page += 1
+
+    def post_counts_per_user(self, users):
+        """One /posts?userId= query per user, at most `concurrency` in flight; None where it failed"""
+        def count(user):
+            posts = self.get_json('/posts', {'userId': user['id']})
+            return user['id'], None if posts is None else len(posts)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            return dict(pool.map(count, users))
+
+    def close(self):
+        self.session.close()
+        if self.cache is not None:
+            self.cache.save()
+
+def report(client, mode='bulk', page_size=None):
+    """(name, post count) per user; the count is None when it could not be fetched"""
+    users = client.users()
+    if mode == 'per-user':
+        counts = client.post_counts_per_user(users)
+    else:
+        bulk = client.post_counts_bulk(page_size)
+        counts = {u['id']: None if bulk is None else bulk.get(u['id'], 0) for u in users}
+    return [(u['name'], counts.get(u['id'])) for u in users]
+
+def main():
+    parser = argparse.ArgumentParser(description="Count posts per user")
+    parser.add_argument('--mode', choices=['bulk', 'per-user'], default='bulk',
+                        help="bulk: fetch /posts once and group by userId; per-user: one query per user")
+    parser.add_argument('--page-size', type=int, help="page through /posts instead of one bulk request")
+    parser.add_argument('--concurrency', type=int, default=16, help="per-user queries in flight")
+    parser.add_argument('--cache-ttl', type=float, default=300, help="seconds; 0 disables the cache")
+    parser.add_argument('--timeout', type=float, default=10, help="seconds per request")
+    parser.add_argument('--base-url', default=BASE_URL)
+    args = parser.parse_args()
+
+    cache = TTLCache(ttl=args.cache_ttl) if args.cache_ttl > 0 else None
+    client = PostsClient(args.base_url, cache=cache, concurrency=args.concurrency, timeout=args.timeout)
+    try:
+        for name, n in report(client, args.mode, args.page_size):
+            if n is None:
+                print(f'{name}: post count unavailable.')
+            else:
+                print(f'{name} has {n} posts.')
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    main()
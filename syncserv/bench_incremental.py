@@ -0,0 +1,100 @@
+"""Benchmark incremental syncs against full reconciles on the mock billing server.
+
+Runs a first full sync that seeds a state store, then several rounds of
+CRM churn. Each round is synced incrementally, and a full reconcile on
+the same data is then expected to find nothing left to do. Reports wall
+time and billing requests for each.
+
+A last round loses the reply to some writes (billing applies them, then
+answers 500). The follow-up sync must not create those customers a second
+time, so the full check after it must still find nothing to do.
+
+    python bench_incremental.py --users 20000 --churn 0.01 --rounds 3
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import urllib.request
+
+from mock_billing import free_port, spawn
+from state import SyncState
+from syncserv import BillingStream, fetch_crm_users, sync_users
+
+def post(url, payload):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+def server_requests(base):
+    with urllib.request.urlopen(f"{base}/_stats") as response:
+        return json.load(response)["requests"]
+
+def timed_sync(base, state, full, workers):
+    before = server_requests(base)
+    started = time.monotonic()
+    report = sync_users(fetch_crm_users(f"{base}/users"), BillingStream(f"{base}/customers"),
+                        deadline=started + 600, workers=workers, base_url=f"{base}/customers",
+                        state=state, full=full)
+    elapsed = time.monotonic() - started
+    # minus one for the CRM fetch
+    return report, elapsed, server_requests(base) - before - 1
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--churn", type=float, default=0.01, help="fraction of CRM users changed per round")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=10)
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--lost-reply-rate", type=float, default=0.2, help="writes answered 500 in the last round")
+    args = parser.parse_args()
+
+    port = free_port()
+    proc = spawn(port, ["--users", str(args.users), "--latency-ms", str(args.latency_ms),
+                        "--page-size", str(args.page_size)])
+    base = f"http://127.0.0.1:{port}"
+    state = SyncState(os.path.join(tempfile.mkdtemp(prefix="syncstate-"), "state.db"))
+    rows = []
+    try:
+        report, elapsed, requests_made = timed_sync(base, state, True, args.workers)
+        rows.append(("initial full", len(report.results), elapsed, requests_made))
+        clean = True
+        for round_number in range(1, args.rounds + 1):
+            changed = max(1, int(args.users * args.churn))
+            post(f"{base}/_crm/churn", {"changed": changed, "added": changed // 5, "removed": changed // 5,
+                                        "seed": round_number})
+            report, elapsed, requests_made = timed_sync(base, state, False, args.workers)
+            rows.append((f"round {round_number} incremental", len(report.results), elapsed, requests_made))
+            report, elapsed, requests_made = timed_sync(base, state, True, args.workers)
+            rows.append((f"round {round_number} full check", len(report.results), elapsed, requests_made))
+            clean = clean and not report.results
+
+        changed = max(1, int(args.users * args.churn))
+        post(f"{base}/_crm/churn", {"added": changed, "seed": args.rounds + 1})
+        post(f"{base}/_faults", {"lost_reply_rate": args.lost_reply_rate})
+        report, elapsed, requests_made = timed_sync(base, state, False, args.workers)
+        rows.append(("lost replies incremental", len(report.results), elapsed, requests_made))
+        post(f"{base}/_faults", {"lost_reply_rate": 0.0})
+        report, elapsed, requests_made = timed_sync(base, state, False, args.workers)
+        rows.append(("follow-up sync", len(report.results), elapsed, requests_made))
+        report, elapsed, requests_made = timed_sync(base, state, True, args.workers)
+        rows.append(("follow-up full check", len(report.results), elapsed, requests_made))
+        clean = clean and not report.results
+    finally:
+        state.close()
+        proc.terminate()
+        proc.wait()
+
+    print()
+    print(f"{'run':24s} {'actions':>8s} {'seconds':>8s} {'billing reqs':>13s}")
+    for name, actions, elapsed, requests_made in rows:
+        print(f"{name:24s} {actions:8d} {elapsed:8.2f} {requests_made:13d}")
+    if not clean:
+        raise SystemExit("full reconcile found work the incremental sync missed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Benchmark syncserv's billing executor against the local mock billing server.
+
+Seeds a mock with drift, runs a full sync (fetch, plan, apply) at each
+worker count on a fresh server, reports actions per second, and checks a
+second plan against the synced server comes back empty.
+
+    python bench_sync.py --users 5000 --latency-ms 20 --workers 1 8 32 --max-rps 800
+"""
+import argparse
+import json
+import time
+import urllib.request
+
+from mock_billing import free_port, spawn
+from syncserv import fetch_billing_users, fetch_crm_users, plan_sync, sync_users
+
+def run(args, workers: int):
+    port = free_port()
+    proc = spawn(port, ["--users", str(args.users), "--latency-ms", str(args.latency_ms),
+                        "--max-rps", str(args.max_rps), "--page-size", str(args.page_size)])
+    base = f"http://127.0.0.1:{port}"
+    try:
+        started = time.monotonic()
+        crm = fetch_crm_users(f"{base}/users")
+        billing = fetch_billing_users(f"{base}/customers")
+        fetched = time.monotonic()
+        report = sync_users(crm, billing, deadline=started + args.timeout, workers=workers,
+                            base_url=f"{base}/customers")
+        actions = len(report.results)
+        print(f"workers={workers:3d}: fetch {fetched - started:5.2f}s, {actions} actions in {report.elapsed:6.2f}s "
+              f"= {actions / report.elapsed:7.1f} actions/s, failed {report.failed}, skipped {report.skipped}")
+
+        leftover = plan_sync(fetch_crm_users(f"{base}/users"), fetch_billing_users(f"{base}/customers"))
+        with urllib.request.urlopen(f"{base}/_stats") as response:
+            stats = json.load(response)
+        print(f"             server saw {stats['requests']} requests, {stats['throttled']} throttled; "
+              f"actions left after sync: {len(leftover)}")
+        return len(leftover) == report.failed + report.skipped
+    finally:
+        proc.terminate()
+        proc.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--max-rps", type=float, default=0)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+    consistent = [run(args, workers) for workers in args.workers]
+    if not all(consistent):
+        raise SystemExit("billing does not match CRM after sync")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""Local stand-in for the MockBilling API, plus a CRM /users endpoint.
+
+Run it directly for manual testing:
+
+    python mock_billing.py --port 8082 --users 10000 --latency-ms 20 --max-rps 500
+
+then point syncserv.py at it:
+
+    python syncserv.py --crm-url http://127.0.0.1:8082/users \
+        --billing-url http://127.0.0.1:8082/customers
+
+The store is seeded so that a sync has work to do: some CRM users are
+missing from billing, some have a different email, and some billing
+customers have no CRM user at all. Requests above --max-rps get a 429 with
+Retry-After. Fault settings can be changed while it runs by POSTing JSON
+to /_faults; GET /_stats returns request counters, and POSTing to
+/_crm/churn changes, adds or removes CRM users between syncs.
+"""
+import argparse
+import asyncio
+import bisect
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+CRM_PATH = "/users"
+CUSTOMERS_PATH = "/customers"
+FAULTS_PATH = "/_faults"
+STATS_PATH = "/_stats"
+CHURN_PATH = "/_crm/churn"
+
+DEFAULT_FAULTS = {
+    "latency": 0.0,          # seconds added to every response
+    "max_rps": 0.0,          # requests/second before answering 429 (0 = unlimited)
+    "retry_after": 1,        # Retry-After header sent with 429s
+    "error_rate": 0.0,       # fraction of writes answered with 500
+    "read_error_rate": 0.0,  # fraction of GET /customers pages answered with 500
+    "lost_reply_rate": 0.0,  # fraction of writes applied but answered with 500 anyway
+    "page_size": 100,        # customers per GET /customers page
+}
+
+def seed(users: int, missing_rate: float, mismatch_rate: float, ghost_rate: float, rng_seed: int = 42):
+    """Build (crm_users, billing_customers) with a known amount of drift"""
+    rng = random.Random(rng_seed)
+    crm = [{"id": i, "name": f"User {i}", "email": f"user{i}@example.com"} for i in range(1, users + 1)]
+    customers = {}
+    next_id = 1
+    for user in crm:
+        if rng.random() < missing_rate:
+            continue
+        email = user["email"]
+        if rng.random() < mismatch_rate:
+            email = f"old{user['id']}@example.com"
+        elif rng.random() < 0.5:
+            email = email.upper()  # same address, different case: not a mismatch
+        customers[next_id] = {"id": next_id, "crm_id": user["id"], "full_name": user["name"], "email_address": email}
+        next_id += 1
+    for ghost in range(int(users * ghost_rate)):
+        crm_id = users + 1 + ghost
+        customers[next_id] = {"id": next_id, "crm_id": crm_id, "full_name": f"Ghost {crm_id}",
+                              "email_address": f"ghost{crm_id}@example.com"}
+        next_id += 1
+    return crm, customers
+
+class BillingStore:
+    """In-memory customers with ids kept sorted lazily for cursor paging"""
+    def __init__(self, customers: Dict[int, Dict[str, Any]]):
+        self.customers = customers
+        self.next_id = max(customers, default=0) + 1
+        self._ids: Optional[List[int]] = None
+
+    def ordered_ids(self) -> List[int]:
+        if self._ids is None:
+            self._ids = sorted(self.customers)
+        return self._ids
+
+    def create(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        customer = {**body, "id": self.next_id}
+        self.customers[self.next_id] = customer
+        self.next_id += 1
+        self._ids = None
+        return customer
+
+    def delete(self, customer_id: Optional[int]) -> bool:
+        if self.customers.pop(customer_id, None) is None:
+            return False
+        self._ids = None
+        return True
+
+class Throttle:
+    """Fixed one-second windows; enough to make clients back off"""
+    def __init__(self):
+        self.window = 0
+        self.count = 0
+
+    def allow(self, max_rps: float) -> bool:
+        if not max_rps:
+            return True
+        window = int(time.monotonic())
+        if window != self.window:
+            self.window, self.count = window, 0
+        self.count += 1
+        return self.count <= max_rps
+
+@web.middleware
+async def faults_middleware(request: web.Request, handler):
+    app = request.app
+    if request.path in (FAULTS_PATH, STATS_PATH, CHURN_PATH):
+        return await handler(request)
+    faults = app["faults"]
+    stats = app["stats"]
+    stats["requests"] += 1
+    if faults["latency"]:
+        await asyncio.sleep(faults["latency"])
+    if not app["throttle"].allow(faults["max_rps"]):
+        stats["throttled"] += 1
+        return web.json_response({"error": "rate limited"}, status=429,
+                                 headers={"Retry-After": str(faults["retry_after"])})
+    error_rate = faults["error_rate"] if request.method != "GET" else \
+        faults["read_error_rate"] if request.path == CUSTOMERS_PATH else 0.0
+    if error_rate and random.random() < error_rate:
+        stats["errors"] += 1
+        return web.json_response({"error": "internal error"}, status=500)
+    response = await handler(request)
+    if request.method != "GET" and faults["lost_reply_rate"] and random.random() < faults["lost_reply_rate"]:
+        # the write went through; the client just never hears so
+        stats["errors"] += 1
+        return web.json_response({"error": "internal error"}, status=500)
+    return response
+
+async def handle_crm(request: web.Request) -> web.Response:
+    return web.json_response(request.app["crm"])
+
+async def handle_list(request: web.Request) -> web.Response:
+    """Cursor pagination: ?after=<last id seen>, next link in meta.next"""
+    store = request.app["store"]
+    try:
+        after = int(request.query.get("after", 0))
+    except ValueError:
+        return web.json_response({"error": "bad cursor"}, status=400)
+    ids = store.ordered_ids()
+    start = bisect.bisect_right(ids, after)
+    page = [store.customers[i] for i in ids[start:start + request.app["faults"]["page_size"]]]
+    next_url = None
+    if start + len(page) < len(ids) and page:
+        next_url = str(request.url.with_query({"after": page[-1]["id"]}))
+    return web.json_response({"customers": page, "meta": {"next": next_url}})
+
+def _customer_id(request: web.Request) -> Optional[int]:
+    try:
+        return int(request.match_info["id"])
+    except ValueError:
+        return None
+
+async def handle_get(request: web.Request) -> web.Response:
+    customer = request.app["store"].customers.get(_customer_id(request))
+    if customer is None:
+        return web.json_response({"error": "not found"}, status=404)
+    return web.json_response(customer)
+
+async def handle_create(request: web.Request) -> web.Response:
+    customer = request.app["store"].create(await request.json())
+    request.app["stats"]["created"] += 1
+    return web.json_response(customer, status=201)
+
+async def handle_patch(request: web.Request) -> web.Response:
+    customer = request.app["store"].customers.get(_customer_id(request))
+    if customer is None:
+        return web.json_response({"error": "not found"}, status=404)
+    customer.update(await request.json())
+    request.app["stats"]["updated"] += 1
+    return web.json_response(customer)
+
+async def handle_delete(request: web.Request) -> web.Response:
+    if not request.app["store"].delete(_customer_id(request)):
+        return web.json_response({"error": "not found"}, status=404)
+    request.app["stats"]["deleted"] += 1
+    return web.Response(status=204)
+
+async def handle_faults(request: web.Request) -> web.Response:
+    """Update fault settings at runtime and return the current ones"""
+    if request.method == "POST":
+        updates = await request.json()
+        unknown = set(updates) - set(DEFAULT_FAULTS)
+        if unknown:
+            return web.json_response({"error": f"unknown settings: {sorted(unknown)}"}, status=400)
+        request.app["faults"].update(updates)
+    return web.json_response(request.app["faults"])
+
+async def handle_churn(request: web.Request) -> web.Response:
+    """Simulate CRM activity: {"changed": n, "added": n, "removed": n}"""
+    body = await request.json()
+    crm = request.app["crm"]
+    rng = random.Random(body.get("seed"))
+    for user in rng.sample(crm, min(len(crm), int(body.get("changed", 0)))):
+        user["email"] = f"{user['email'].split('@')[0]}.{rng.randrange(10**6)}@example.com"
+    for _ in range(min(len(crm), int(body.get("removed", 0)))):
+        crm.pop(rng.randrange(len(crm)))
+    next_id = max((user["id"] for user in crm), default=0) + 1
+    for crm_id in range(next_id, next_id + int(body.get("added", 0))):
+        crm.append({"id": crm_id, "name": f"User {crm_id}", "email": f"user{crm_id}@example.com"})
+    return web.json_response({"users": len(crm)})
+
+async def handle_stats(request: web.Request) -> web.Response:
+    return web.json_response({**request.app["stats"], "customers": len(request.app["store"].customers)})
+
+def create_app(users: int = 10, missing_rate: float = 0.2, mismatch_rate: float = 0.2,
+               ghost_rate: float = 0.1, **faults: Any) -> web.Application:
+    """Create the mock application; see DEFAULT_FAULTS for settings (seconds / fractions)"""
+    app = web.Application(middlewares=[faults_middleware])
+    app["crm"], customers = seed(users, missing_rate, mismatch_rate, ghost_rate)
+    app["store"] = BillingStore(customers)
+    app["faults"] = {**DEFAULT_FAULTS, **faults}
+    app["stats"] = {"requests": 0, "throttled": 0, "errors": 0, "created": 0, "updated": 0, "deleted": 0}
+    app["throttle"] = Throttle()
+    app.router.add_get(CRM_PATH, handle_crm)
+    app.router.add_get(CUSTOMERS_PATH, handle_list)
+    app.router.add_post(CUSTOMERS_PATH, handle_create)
+    app.router.add_get(CUSTOMERS_PATH + "/{id}", handle_get)
+    app.router.add_patch(CUSTOMERS_PATH + "/{id}", handle_patch)
+    app.router.add_delete(CUSTOMERS_PATH + "/{id}", handle_delete)
+    app.router.add_get(FAULTS_PATH, handle_faults)
+    app.router.add_post(FAULTS_PATH, handle_faults)
+    app.router.add_get(STATS_PATH, handle_stats)
+    app.router.add_post(CHURN_PATH, handle_churn)
+    return app
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def spawn(port: int, extra_args: Optional[List[str]] = None, startup_timeout: float = 10) -> subprocess.Popen:
+    """Start the mock server in a child process and wait until it accepts connections"""
+    cmd = [sys.executable, __file__, "--port", str(port)] + (extra_args or [])
+    proc = subprocess.Popen(cmd)
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.terminate()
+    raise RuntimeError(f"Mock server did not start on port {port}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock billing + CRM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8082)
+    parser.add_argument("--users", type=int, default=10, help="CRM users to seed")
+    parser.add_argument("--missing-rate", type=float, default=0.2, help="CRM users absent from billing")
+    parser.add_argument("--mismatch-rate", type=float, default=0.2, help="billing customers with a stale email")
+    parser.add_argument("--ghost-rate", type=float, default=0.1, help="extra billing customers, as a fraction of users")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--max-rps", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--read-error-rate", type=float, default=0.0)
+    parser.add_argument("--lost-reply-rate", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+    app = create_app(
+        users=args.users,
+        missing_rate=args.missing_rate,
+        mismatch_rate=args.mismatch_rate,
+        ghost_rate=args.ghost_rate,
+        latency=args.latency_ms / 1000,
+        max_rps=args.max_rps,
+        retry_after=args.retry_after,
+        error_rate=args.error_rate,
+        read_error_rate=args.read_error_rate,
+        lost_reply_rate=args.lost_reply_rate,
+        page_size=args.page_size,
+    )
+    web.run_app(app, host=args.host, port=args.port, print=None, access_log=None)
+
+if __name__ == "__main__":
+    main()
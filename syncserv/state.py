@@ -0,0 +1,72 @@
+"""Local record of what billing looked like after the last sync.
+
+One row per CRM user: the billing customer id it maps to and a
+fingerprint of the synced fields as billing holds them. A meta table keeps
+the high-water mark (when the last complete sync started). With this, an
+incremental run only has to touch users whose fingerprint moved.
+"""
+import hashlib
+import sqlite3
+
+def fingerprint(email):
+    """Hash of the fields sync keeps in step (just the normalized email)"""
+    normalized = (email or '').strip().lower()
+    return hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
+
+class SyncState:
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            " crm_key TEXT PRIMARY KEY,"
+            " crm_id TEXT,"
+            " billing_id TEXT,"
+            " fingerprint TEXT NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID")
+        self._conn.commit()
+
+    def records(self):
+        """{crm_key: (crm_id, billing_id, fingerprint)}"""
+        return {key: (crm_id, billing_id, fp) for key, crm_id, billing_id, fp in
+                self._conn.execute("SELECT crm_key, crm_id, billing_id, fingerprint FROM records")}
+
+    def upsert(self, rows):
+        """rows of (crm_key, crm_id, billing_id, fingerprint)"""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO records (crm_key, crm_id, billing_id, fingerprint) VALUES (?, ?, ?, ?)",
+                [(key, _text(crm_id), _text(billing_id), fp) for key, crm_id, billing_id, fp in rows])
+
+    def delete(self, keys):
+        with self._conn:
+            self._conn.executemany("DELETE FROM records WHERE crm_key = ?", [(key,) for key in keys])
+
+    def replace_all(self, rows):
+        """Swap in a complete snapshot in one transaction, e.g. after a full reconcile"""
+        with self._conn:
+            self._conn.execute("DELETE FROM records")
+            self._conn.executemany(
+                "INSERT INTO records (crm_key, crm_id, billing_id, fingerprint) VALUES (?, ?, ?, ?)",
+                [(key, _text(crm_id), _text(billing_id), fp) for key, crm_id, billing_id, fp in rows])
+
+    def get_meta(self, key, default=None):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def set_meta(self, key, value):
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+def _text(value):
+    return None if value is None else str(value)
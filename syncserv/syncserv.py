@@ -1,73 +1,520 @@
+import argparse
 import requests
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from requests.adapters import HTTPAdapter
+
+from state import SyncState, fingerprint
+
+CRM_URL = 'https://jsonplaceholder.typicode.com/users'
+BILLING_URL = 'https://api.mockbilling.com/customers'
+BILLING_HEADERS = {"Authorization": "Bearer faketoken123"}
+DEFAULT_TIMEOUT = 60
+
 # 1. Fetch CRM users
-def fetch_crm_users():
-    url = 'https://jsonplaceholder.typicode.com/users'
+def fetch_crm_users(url=CRM_URL):
     response = requests.get(url)
     if response.status_code == 200:
         data = response.json()
         return data
 
 # 2. Fetch Billing Users
-def fetch_billing_users():
-    url = 'https://api.mockbilling.com/customers'
+class BillingFetchError(Exception):
+    """A billing page could not be fetched; `cursor` is where to resume"""
+    def __init__(self, message, cursor):
+        super().__init__(message)
+        self.cursor = cursor
+
+class BillingStream:
+    """Billing customers as a stream, one page in memory at a time.
+
+    While the caller works through a page, the next one is already being
+    fetched in the background. A page that fails is retried from its own
+    cursor rather than from page one; if it still fails, BillingFetchError
+    carries the cursor and BillingStream(cursor=...) picks up exactly there.
+    A consumer that stops mid-page gets that page again on resume.
+    """
+    def __init__(self, url=BILLING_URL, cursor=None, session=None, max_retries=3, timeout=10):
+        self.cursor = cursor or url  # first page not yet fully yielded; None when done
+        self.session = session
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.pages = 0
+
+    def _fetch_page(self, session, url):
+        delay = 0.5
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                response = session.get(url, headers=BILLING_HEADERS, timeout=self.timeout)
+                if response.status_code == 429:
+                    wait = _retry_after(response, delay)
+                    print(f"Rate limited listing billing users, waiting {wait}s")
+                    time.sleep(wait)
+                    continue
+                if response.status_code == 404:
+                    raise BillingFetchError(f"Resource not found: {url}", url)
+                if response.status_code >= 500:
+                    print(f"Internal server error ({response.status_code}) on {url}, attempt {attempt}")
+                elif response.status_code != 200:
+                    raise BillingFetchError(f"Request failed ({response.status_code}): {url}", url)
+                else:
+                    data = response.json()
+                    # parse the meta block to find the next page
+                    return data.get('customers', []), data.get("meta", {}).get("next")
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"Request failed on {url}, attempt {attempt}: {e}")
+            time.sleep(delay)
+            delay *= 2
+        raise BillingFetchError(f"Giving up on {url} after {self.max_retries} attempts", url)
+
+    def __iter__(self):
+        session = self.session or requests.Session()
+        try:
+            with ThreadPoolExecutor(max_workers=1) as prefetcher:
+                pending = prefetcher.submit(self._fetch_page, session, self.cursor) if self.cursor else None
+                while pending is not None:
+                    customers, next_url = pending.result()
+                    pending = prefetcher.submit(self._fetch_page, session, next_url) if next_url else None
+                    yield from customers
+                    self.cursor = next_url
+                    self.pages += 1
+        finally:
+            if self.session is None:
+                session.close()
+
+def fetch_billing_users(url=BILLING_URL):
     all_customers = []
-    headers = {"Authorization": "Bearer faketoken123"}
-    while url: # use this to loop to next, if no more then this is None
-        response = requests.get(url, headers = headers)
-        if response.status_code != 200:
-            if response.status_code == 404:
-                print(f"Resource not found")
-            elif response.status_code == 500:
-                print(f"Internal server error")
-            else:
-                print(f"Request failed")
-            break
-        data = response.json()
-        all_customers.extend(data.get('customers', []))
-        # parse Link header to find next page
-        url = data.get("meta", {}).get("next")
+    try:
+        all_customers.extend(BillingStream(url))
+    except BillingFetchError as e:
+        print(f"{e}; returning {len(all_customers)} customers fetched so far")
     return all_customers
 
 # 3. Sync users
-def sync_users(crm_data, billing_users):
-    new_bill, update_email, delete_ghost = 0,0,0
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+def crm_key(crm_id):
+    # billing may hand crm_id back as a string; compare on one form
+    return None if crm_id is None else str(crm_id)
+
+@dataclass
+class SyncAction:
+    kind: str  # 'create', 'update' or 'delete'
+    crm_id: object
+    billing_id: Optional[object] = None
+    payload: Dict = field(default_factory=dict)
+
+@dataclass
+class SyncPlan:
+    creates: List[SyncAction] = field(default_factory=list)
+    updates: List[SyncAction] = field(default_factory=list)
+    deletes: List[SyncAction] = field(default_factory=list)
+    # crm key -> (crm_id, billing id, normalized billing email) for users found in billing
+    matched: Dict = field(default_factory=dict)
+
+    def actions(self):
+        return self.creates + self.updates + self.deletes
+
+    def __len__(self):
+        return len(self.creates) + len(self.updates) + len(self.deletes)
+
+def plan_sync(crm_data, billing_users):
+    """Work out every create/update/delete from the two bulk lists.
+
+    One pass to index billing by crm_id, one over CRM, one over what's
+    left: O(n+m) and no extra reads against either API. billing_users may
+    be any iterable, so indexing starts as the first billing page lands.
+    """
+    plan = SyncPlan()
+    # crm key -> (crm_id, billing id, normalized email); billing_users can be
+    # a BillingStream, so only these fields are kept, not whole records
+    billing_by_crm = {}
+    for bill_user in billing_users:
+        key = crm_key(bill_user.get('crm_id'))
+        if key in billing_by_crm and billing_by_crm[key][1] == bill_user.get('id'):
+            continue  # same record delivered twice, e.g. a page re-read on resume
+        if key is None or key in billing_by_crm:
+            # orphaned or duplicate billing record: not backed by a CRM user
+            plan.deletes.append(SyncAction('delete', bill_user.get('crm_id'), bill_user.get('id')))
+        else:
+            billing_by_crm[key] = (bill_user.get('crm_id'), bill_user.get('id'),
+                                   normalize_email(bill_user.get('email_address')))
+
     for crm_user in crm_data:
-        url = f'https://api.mockbilling.com/customers'
-        # in billing, crm_id is used for the crm_user's id
-        params = {'crm_id': crm_user['id']}
-        response = requests.get(url, params = params)
-        if response.status_code == 404:
-            payload = {
+        key = crm_key(crm_user['id'])
+        entry = billing_by_crm.pop(key, None)
+        if entry is not None:
+            plan.matched[key] = entry
+        if entry is None:
+            plan.creates.append(SyncAction('create', crm_user['id'], payload={
                 'crm_id': crm_user['id'],
-                'full_name': crm_user['name'], 
+                'full_name': crm_user['name'],
                 'email_address': crm_user['email']
-            }
-            postresp = requests.post(url, json=payload)
-            new_bill += 1
-        elif response.status_code == 200:
-            data = response.json()
-            if data['email_address'] != crm_user['email']:
-                payload = {
-                    'email_address': crm_user['email']
-                }
-                response.patch(url, json = payload)
-                update_email += 1
-    # if user not in CRM, delete
-    for bill_user in billing_users:
-        url = 'https://jsonplaceholder.typicode.com/users'
-        response = requests.get(url)
-        crm_ids = {u['id'] for u in crm_data}
-        for bill_user in billing_users:
-            if bill_user['crm_id'] not in crm_ids:
-                bill_url = f'https://api.mockbilling.com/customers'
-                params = {'crm_id': bill_user['crm_id']}
-                response = requests.delete(bill_url, params = params)
-                delete_ghost += 1
-    print(f'Created {new_bill} new billing users \n Updated {update_email} emails \n "Deleted {delete_ghost} ghost billing users')
-
-
-# literally didn't do anything w this or more cuz the apis are fake btw
+            }))
+        elif entry[2] != normalize_email(crm_user['email']):
+            plan.updates.append(SyncAction('update', crm_user['id'], entry[1],
+                                           {'email_address': crm_user['email']}))
+
+    # whatever CRM didn't claim is a ghost
+    for crm_id, billing_id, _ in billing_by_crm.values():
+        plan.deletes.append(SyncAction('delete', crm_id, billing_id))
+    return plan
+
+def plan_incremental(crm_data, records):
+    """Plan against the last sync's record of billing instead of listing it.
+
+    records is SyncState.records(). Only users whose fingerprint moved, or
+    who appeared or vanished since, produce actions; billing is not read.
+    Changes made directly in billing are only caught by a full reconcile.
+    """
+    plan = SyncPlan()
+    remaining = dict(records)
+    unresolved = 0
+    for crm_user in crm_data:
+        entry = remaining.pop(crm_key(crm_user['id']), None)
+        if entry is None:
+            plan.creates.append(SyncAction('create', crm_user['id'], payload={
+                'crm_id': crm_user['id'],
+                'full_name': crm_user['name'],
+                'email_address': crm_user['email']
+            }))
+        elif entry[2] != fingerprint(crm_user['email']):
+            if entry[1] is None:
+                unresolved += 1
+                continue
+            plan.updates.append(SyncAction('update', crm_user['id'], entry[1],
+                                           {'email_address': crm_user['email']}))
+
+    for crm_id, billing_id, _ in remaining.values():
+        if billing_id is None:
+            unresolved += 1
+            continue
+        plan.deletes.append(SyncAction('delete', crm_id, billing_id))
+    if unresolved:
+        print(f"{unresolved} changed users have no known billing id; run with --full to reconcile them")
+    return plan
+
+# 4. Apply the plan
+class AdaptiveLimiter:
+    """Caps in-flight billing writes and backs off when billing pushes back.
+
+    A 429 halves the cap and pauses everyone until Retry-After has passed;
+    each run of successes as long as the cap raises it by one again.
+    """
+    def __init__(self, max_inflight):
+        self.max_inflight = max_inflight
+        self.limit = max_inflight
+        self.inflight = 0
+        self.resume_at = 0.0
+        self.throttled = 0
+        self._streak = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, stop_at):
+        """Wait for a slot; False if none frees up before stop_at"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if now >= stop_at:
+                    return False
+                if now >= self.resume_at and self.inflight < self.limit:
+                    self.inflight += 1
+                    return True
+                wake = self.resume_at if now < self.resume_at else stop_at
+                self._cond.wait(min(wake, stop_at) - now)
+
+    def release(self, retry_after=None):
+        with self._cond:
+            self.inflight -= 1
+            if retry_after is not None:
+                self.throttled += 1
+                self.limit = max(1, self.limit // 2)
+                self._streak = 0
+                self.resume_at = max(self.resume_at, time.monotonic() + retry_after)
+            else:
+                self._streak += 1
+                if self._streak >= self.limit and self.limit < self.max_inflight:
+                    self.limit += 1
+                    self._streak = 0
+            self._cond.notify_all()
+
+@dataclass
+class ActionResult:
+    action: SyncAction
+    status: str  # 'done', 'failed', 'skipped' (deadline) or 'planned' (dry run)
+    status_code: Optional[int] = None
+    attempts: int = 0
+    error: Optional[str] = None
+    billing_id: Optional[object] = None  # id billing assigned, for creates
+
+    @property
+    def maybe_committed(self):
+        """A failed create whose POST may still have gone through: no response, or a 5xx"""
+        return (self.action.kind == 'create' and self.status == 'failed'
+                and (self.status_code is None or self.status_code >= 500))
+
+@dataclass
+class SyncReport:
+    results: List[ActionResult]
+    elapsed: float
+    dry_run: bool = False
+
+    def count(self, kind, status='done'):
+        return sum(1 for r in self.results if r.action.kind == kind and r.status == status)
+
+    @property
+    def created(self):
+        return self.count('create', 'planned' if self.dry_run else 'done')
+
+    @property
+    def updated(self):
+        return self.count('update', 'planned' if self.dry_run else 'done')
+
+    @property
+    def deleted(self):
+        return self.count('delete', 'planned' if self.dry_run else 'done')
+
+    @property
+    def failed(self):
+        return sum(1 for r in self.results if r.status == 'failed')
+
+    @property
+    def skipped(self):
+        return sum(1 for r in self.results if r.status == 'skipped')
+
+    def summary(self):
+        create, update, delete = ('Would create', 'Would update', 'Would delete') if self.dry_run \
+            else ('Created', 'Updated', 'Deleted')
+        lines = [
+            f'{create} {self.created} new billing users',
+            f'{update} {self.updated} emails',
+            f'{delete} {self.deleted} ghost billing users',
+        ]
+        if self.failed or self.skipped:
+            lines.append(f'{self.failed} failed, {self.skipped} not started before the deadline')
+        return '\n '.join(lines)
+
+def _report(response, action):
+    if response.status_code in (200, 201, 204):
+        return True
+    if response.status_code == 404:
+        print(f"Resource not found: {action.kind} crm_id={action.crm_id}")
+    elif response.status_code == 500:
+        print(f"Internal server error: {action.kind} crm_id={action.crm_id}")
+    else:
+        print(f"Request failed ({response.status_code}): {action.kind} crm_id={action.crm_id}")
+    return False
+
+def create_user(session, action, base_url=BILLING_URL, timeout=None):
+    return session.post(base_url, json=action.payload, headers=BILLING_HEADERS, timeout=timeout)
+
+def update_user(session, action, base_url=BILLING_URL, timeout=None):
+    return session.patch(f'{base_url}/{action.billing_id}', json=action.payload, headers=BILLING_HEADERS,
+                         timeout=timeout)
+
+def delete_user(session, action, base_url=BILLING_URL, timeout=None):
+    return session.delete(f'{base_url}/{action.billing_id}', headers=BILLING_HEADERS, timeout=timeout)
+
+SENDERS = {'create': create_user, 'update': update_user, 'delete': delete_user}
+# A POST that timed out or got a 5xx may still have been committed; retrying it
+# could create a second customer. Creates are retried on 429 only. record_sync
+# marks such a create PENDING_CREATE, and the next sync_users run reconciles in
+# full (listing billing) rather than POSTing it again.
+IDEMPOTENT = {'update', 'delete'}
+PENDING_CREATE = 'pending-create'  # fingerprint of a create whose outcome is unknown
+
+def _retry_after(response, default=1.0):
+    try:
+        return max(0.0, float(response.headers.get('Retry-After', default)))
+    except ValueError:
+        return default
+
+def _run_action(session, limiter, action, base_url, stop_at, deadline, max_attempts):
+    result = ActionResult(action, 'skipped')
+    backoff = 0.5
+    while result.attempts < max_attempts:
+        # stop_at leaves room for a request started now to finish by the deadline
+        if not limiter.acquire(stop_at):
+            if result.attempts:
+                result.status = 'failed'
+                result.error = result.error or 'deadline reached while retrying'
+            return result
+        result.attempts += 1
+        retry_after = None
+        try:
+            response = SENDERS[action.kind](session, action, base_url, timeout=max(0.1, deadline - time.monotonic()))
+        except requests.exceptions.RequestException as e:
+            limiter.release()
+            result.status, result.error = 'failed', str(e)
+            if action.kind not in IDEMPOTENT:
+                return result
+            time.sleep(min(backoff, max(0.0, stop_at - time.monotonic())))
+            backoff *= 2
+            continue
+        result.status_code = response.status_code
+        if response.status_code == 429:
+            retry_after = _retry_after(response)
+        limiter.release(retry_after)
+        if retry_after is not None:
+            result.status, result.error = 'failed', 'rate limited'
+            continue
+        if response.status_code >= 500 and result.attempts < max_attempts and action.kind in IDEMPOTENT:
+            result.status, result.error = 'failed', f'HTTP {response.status_code}'
+            time.sleep(min(backoff, max(0.0, stop_at - time.monotonic())))
+            backoff *= 2
+            continue
+        result.status = 'done' if _report(response, action) else 'failed'
+        result.error = None if result.status == 'done' else f'HTTP {response.status_code}'
+        result.billing_id = action.billing_id
+        if result.status == 'done' and action.kind == 'create':
+            try:
+                result.billing_id = response.json().get('id')
+            except (ValueError, AttributeError):
+                pass
+        return result
+    return result
+
+def apply_plan(plan, deadline=None, workers=8, dry_run=False, base_url=BILLING_URL,
+               margin=None, max_attempts=4):
+    """Run a SyncPlan against billing with up to `workers` writes in flight.
+
+    Nothing new starts within `margin` seconds of the deadline (monotonic
+    clock); those actions come back as 'skipped' so the caller can see
+    exactly what was left undone.
+    """
+    started = time.monotonic()
+    if deadline is None:
+        deadline = started + DEFAULT_TIMEOUT
+    if margin is None:
+        margin = min(5.0, max(0.0, deadline - started) * 0.1)
+    actions = plan.actions()
+
+    if dry_run:
+        for action in actions:
+            target = f' billing_id={action.billing_id}' if action.billing_id is not None else ''
+            print(f"[dry-run] {action.kind} crm_id={action.crm_id}{target} {action.payload or ''}".rstrip())
+        return SyncReport([ActionResult(a, 'planned') for a in actions], time.monotonic() - started, dry_run=True)
+
+    limiter = AdaptiveLimiter(workers)
+    stop_at = deadline - margin
+    with requests.Session() as session:
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_action, session, limiter, action, base_url, stop_at, deadline, max_attempts)
+                       for action in actions]
+            results = [future.result() for future in futures]
+
+    report = SyncReport(results, time.monotonic() - started)
+    if report.skipped:
+        print(f"Approaching timeout: {report.skipped} actions were not started")
+    if limiter.throttled:
+        print(f"Billing rate limited us {limiter.throttled} times; ended at {limiter.limit} concurrent writes")
+    return report
+
+def record_sync(state, plan, report, full):
+    """Write what billing now holds into the state store.
+
+    Only confirmed writes move a fingerprint, so anything that failed or
+    was skipped shows up as a change again on the next run. A create that
+    may have been committed is kept as PENDING_CREATE with no billing id.
+    """
+    if full:
+        rows = {key: (crm_id, billing_id, fingerprint(email)) for key, (crm_id, billing_id, email) in plan.matched.items()}
+    else:
+        rows = {}
+    removed = []
+    for result in report.results:
+        action = result.action
+        key = crm_key(action.crm_id)
+        if key is None:
+            continue
+        if result.status == 'done':
+            if action.kind == 'delete':
+                rows.pop(key, None)
+                removed.append(key)
+            else:
+                rows[key] = (action.crm_id, result.billing_id, fingerprint(action.payload['email_address']))
+        elif action.kind == 'delete' and full and key not in rows:
+            # ghost still in billing: remember it so an incremental run retries the delete
+            rows[key] = (action.crm_id, action.billing_id, '')
+        elif result.maybe_committed:
+            rows[key] = (action.crm_id, None, PENDING_CREATE)
+
+    if full:
+        state.replace_all((key,) + row for key, row in rows.items())
+    else:
+        state.upsert((key,) + row for key, row in rows.items())
+        state.delete(removed)
+
+def sync_users(crm_data, billing_users, deadline=None, workers=8, dry_run=False, base_url=BILLING_URL,
+               state=None, full=False):
+    """Plan and apply a sync; with a SyncState, only changes since the last run are planned.
+
+    The first run against a state store, or full=True, lists billing and
+    reconciles everything. So does a run after one that left creates whose
+    outcome is unknown (PENDING_CREATE): only billing can say whether they
+    exist. billing_users is not read on incremental runs.
+    """
+    started = time.time()
+    incremental = state is not None and not full and state.get_meta('high_water_mark') is not None
+    records = state.records() if incremental else None
+    if incremental:
+        pending = sum(1 for _, _, fp in records.values() if fp == PENDING_CREATE)
+        if pending:
+            print(f"{pending} creates from an earlier run may have gone through; reconciling in full")
+            incremental = False
+    if incremental:
+        since = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(float(state.get_meta('high_water_mark'))))
+        plan = plan_incremental(crm_data, records)
+        print(f"Incremental sync: {len(plan)} changes since {since}")
+    else:
+        plan = plan_sync(crm_data, billing_users)
+    report = apply_plan(plan, deadline=deadline, workers=workers, dry_run=dry_run, base_url=base_url)
+    print(report.summary())
+
+    if state is not None and not dry_run:
+        record_sync(state, plan, report, full=not incremental)
+        if not report.failed and not report.skipped:
+            state.set_meta('high_water_mark', started)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync CRM users into billing")
+    parser.add_argument('--dry-run', action='store_true', help="print the actions without making them")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="seconds for the whole sync")
+    parser.add_argument('--workers', type=int, default=8, help="billing writes in flight at once")
+    parser.add_argument('--crm-url', default=CRM_URL)
+    parser.add_argument('--billing-url', default=BILLING_URL)
+    parser.add_argument('--state', help="sqlite file recording the last sync; enables incremental runs")
+    parser.add_argument('--full', action='store_true', help="list billing and reconcile everything")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    deadline = started + args.timeout
+    crm_data = fetch_crm_users(args.crm_url)
+    if crm_data is None:
+        print("Could not fetch CRM users")
+        return
+    # planning consumes billing pages as they arrive
+    billing_users = BillingStream(args.billing_url)
+    state = SyncState(args.state) if args.state else None
+    try:
+        report = sync_users(crm_data, billing_users, deadline=deadline, workers=args.workers,
+                            dry_run=args.dry_run, base_url=args.billing_url, state=state, full=args.full)
+    except BillingFetchError as e:
+        # a partial billing list would plan spurious creates, so stop here
+        print(f"{e}; nothing was changed. Billing listing stopped at {e.cursor}")
+        return
+    finally:
+        if state is not None:
+            state.close()
+    print(f"Finished in {time.monotonic() - started:.1f}s")
+
 if __name__ == "__main__":
-    fetch_crm_users()
-    fetch_billing_users()
+    main()